@@ -0,0 +1,220 @@
+"""
+Local stand-in for the Ollama HTTP API used by the benchmarks
+
+Serves `/api/chat` from a list of recorded or synthetic response contents, as a
+single JSON response or as NDJSON stream, with configurable chunk size, latency
+and rate of invalid outputs. Runs in a background thread:
+
+    with FakeOllamaServer(responses=[...], chunk_size=8) as server:
+        client = OllamaInstructor(host=server.url)
+"""
+import itertools
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Sequence
+
+INVALID_RESPONSE = '{"friends": [{"name": "Ollama", "age": "unknown"'
+
+
+def load_responses(path: str | Path) -> list[str]:
+    """
+    Read response contents from a JSONL file
+
+    Every line is either a ChatResponse as returned by Ollama (the message content
+    is used), an object with a "content" key or a plain JSON string.
+    """
+    responses = []
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if isinstance(record, str):
+                responses.append(record)
+            elif "message" in record:
+                responses.append(record["message"]["content"])
+            else:
+                responses.append(record["content"])
+    return responses
+
+
+def synthetic_friend_list(items: int) -> str:
+    """Content matching the FriendList model of the benchmarks with `items` friends"""
+    return json.dumps({
+        "friends": [
+            {"name": f"Friend {i}", "age": 20 + i % 50, "is_available": i % 2 == 0}
+            for i in range(items)
+        ]
+    })
+
+
+class FakeOllamaServer:
+    """
+    Threaded HTTP server answering Ollama chat requests
+
+    Args:
+        responses: Contents to answer with, used round-robin
+        chunk_size: Characters per chunk of streamed responses
+        first_chunk_latency: Seconds before the first chunk (or the whole response)
+        chunk_latency: Seconds between two chunks of a stream
+        invalid_rate: Probability of answering with `invalid_response` instead
+        invalid_response: Content used for invalid answers
+        seed: Seed of the random generator deciding about invalid answers
+        host: Interface to bind to
+        port: Port to bind to, 0 picks a free one
+    """
+    def __init__(
+        self,
+        responses: Sequence[str],
+        *,
+        chunk_size: int = 16,
+        first_chunk_latency: float = 0.0,
+        chunk_latency: float = 0.0,
+        invalid_rate: float = 0.0,
+        invalid_response: str = INVALID_RESPONSE,
+        seed: int = 0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        if not responses:
+            raise ValueError("responses must not be empty")
+        self.chunk_size = chunk_size
+        self.first_chunk_latency = first_chunk_latency
+        self.chunk_latency = chunk_latency
+        self.invalid_rate = invalid_rate
+        self.invalid_response = invalid_response
+        self.requests = 0
+        self._responses = itertools.cycle(responses)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeOllamaServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "FakeOllamaServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def next_content(self) -> str:
+        with self._lock:
+            self.requests += 1
+            if self.invalid_rate and self._random.random() < self.invalid_rate:
+                return self.invalid_response
+            return next(self._responses)
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                if self.path == "/":
+                    self._send_text("Ollama is running")
+                else:
+                    self._send_json({"error": f"{self.path} not supported"}, status=404)
+
+            def do_HEAD(self) -> None:
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if self.path != "/api/chat":
+                    self._send_json({"error": f"{self.path} not supported"}, status=404)
+                    return
+                content = server.next_content()
+                if server.first_chunk_latency:
+                    time.sleep(server.first_chunk_latency)
+                if body.get("stream", True):
+                    self._stream(body.get("model", ""), content)
+                else:
+                    self._send_json(_final(body.get("model", ""), content))
+
+            def _stream(self, model: str, content: str) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for start in range(0, len(content), server.chunk_size):
+                    if start and server.chunk_latency:
+                        time.sleep(server.chunk_latency)
+                    self._write_chunk(_chunk(model, content[start:start + server.chunk_size]))
+                self._write_chunk(_final(model, ""))
+                self.wfile.write(b"0\r\n\r\n")
+
+            def _write_chunk(self, record: dict) -> None:
+                data = json.dumps(record).encode() + b"\n"
+                self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+
+            def _send_json(self, record: dict, status: int = 200) -> None:
+                data = json.dumps(record).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_text(self, text: str) -> None:
+                data = text.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+
+def _chunk(model: str, content: str) -> dict:
+    return {
+        "model": model,
+        "created_at": "2025-01-01T00:00:00Z",
+        "message": {"role": "assistant", "content": content},
+        "done": False,
+    }
+
+
+def _final(model: str, content: str) -> dict:
+    tokens = max(len(content) // 4, 1)
+    return {
+        "model": model,
+        "created_at": "2025-01-01T00:00:00Z",
+        "message": {"role": "assistant", "content": content},
+        "done": True,
+        "done_reason": "stop",
+        "total_duration": 1_000_000,
+        "load_duration": 0,
+        "prompt_eval_count": 10,
+        "prompt_eval_duration": 100_000,
+        "eval_count": tokens,
+        "eval_duration": tokens * 10_000,
+    }
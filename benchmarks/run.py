@@ -0,0 +1,307 @@
+"""
+Offline benchmarks of ollama-instructor against a local fake Ollama server
+
+Measures the overhead the library adds on top of the ollama client, stream
+throughput, the cost of retries, memory per concurrent request, how batches
+scale with concurrency and the cost of validating large outputs. Results are written as JSON and can be compared with
+the results of another version to catch regressions:
+
+    python benchmarks/run.py --output before.json
+    python benchmarks/run.py --output after.json --compare before.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from importlib import metadata
+from pathlib import Path
+from typing import Callable
+
+from ollama import AsyncClient, Client
+from pydantic import BaseModel
+from pydantic_core import from_json
+
+from ollama_instructor import OllamaInstructor, OllamaInstructorAsync, compile_format
+from ollama_instructor._partial import PartialValidator
+
+sys.path.insert(0, str(Path(__file__).parent))
+from fake_server import FakeOllamaServer, load_responses, synthetic_friend_list  # noqa: E402
+
+MODEL = "benchmark:latest"
+MESSAGES = [{"role": "user", "content": "List my friends"}]
+
+
+class FriendInfo(BaseModel):
+    name: str
+    age: int
+    is_available: bool
+
+
+class FriendList(BaseModel):
+    friends: list[FriendInfo]
+
+
+@dataclass
+class Result:
+    """A single measurement; `better` is "lower" or "higher" """
+    value: float
+    unit: str
+    better: str
+
+
+def timed(func: Callable[[], object], repeat: int) -> float:
+    """Seconds per call of `func`, after one warm-up call"""
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+async def atimed(func: Callable[[], object], repeat: int) -> float:
+    await func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        await func()
+    return (time.perf_counter() - start) / repeat
+
+
+def bench_overhead(responses: list[str], repeat: int) -> dict[str, Result]:
+    results = {}
+    with FakeOllamaServer(responses) as server:
+        raw = Client(host=server.url)
+        client = OllamaInstructor(host=server.url)
+        schema = FriendList.model_json_schema()
+        raw_time = timed(lambda: raw.chat(model=MODEL, messages=MESSAGES, format=schema), repeat)
+        completion_time = timed(lambda: client.chat_completion(format=FriendList, model=MODEL, messages=MESSAGES), repeat)
+        stream_time = timed(lambda: list(client.chat_stream(format=FriendList, model=MODEL, messages=MESSAGES)), repeat)
+        raw_stream_time = timed(lambda: list(raw.chat(model=MODEL, messages=MESSAGES, format=schema, stream=True)), repeat)
+
+        async def run_async() -> tuple[float, float]:
+            raw_async = AsyncClient(host=server.url)
+            client_async = OllamaInstructorAsync(host=server.url)
+            raw_async_time = await atimed(lambda: raw_async.chat(model=MODEL, messages=MESSAGES, format=schema), repeat)
+            completion_async_time = await atimed(
+                lambda: client_async.chat_completion(format=FriendList, model=MODEL, messages=MESSAGES), repeat
+            )
+            return raw_async_time, completion_async_time
+
+        raw_async_time, completion_async_time = asyncio.run(run_async())
+
+    results["completion_overhead_sync"] = Result((completion_time - raw_time) * 1e3, "ms/call", "lower")
+    results["completion_overhead_async"] = Result((completion_async_time - raw_async_time) * 1e3, "ms/call", "lower")
+    results["stream_overhead_sync"] = Result((stream_time - raw_stream_time) * 1e3, "ms/call", "lower")
+    results["completion_latency_sync"] = Result(completion_time * 1e3, "ms/call", "lower")
+    return results
+
+
+def bench_stream_throughput(items: int, chunk_size: int, repeat: int) -> dict[str, Result]:
+    content = synthetic_friend_list(items)
+    with FakeOllamaServer([content], chunk_size=chunk_size) as server:
+        client = OllamaInstructor(host=server.url)
+        seconds = timed(lambda: list(client.chat_stream(format=FriendList, model=MODEL, messages=MESSAGES)), repeat)
+        partial_seconds = timed(
+            lambda: list(client.chat_stream_partial(format=FriendList, model=MODEL, messages=MESSAGES)), repeat
+        )
+
+        async def run_async() -> float:
+            client_async = OllamaInstructorAsync(host=server.url)
+
+            async def consume() -> None:
+                async for _ in await client_async.chat_stream(format=FriendList, model=MODEL, messages=MESSAGES):
+                    pass
+
+            return await atimed(consume, repeat)
+
+        async_seconds = asyncio.run(run_async())
+    megabytes = len(content) / 1e6
+    return {
+        "stream_throughput_sync": Result(megabytes / seconds, "MB/s", "higher"),
+        "stream_throughput_async": Result(megabytes / async_seconds, "MB/s", "higher"),
+        "stream_partial_throughput_sync": Result(megabytes / partial_seconds, "MB/s", "higher"),
+    }
+
+
+def bench_retry_cost(responses: list[str], repeat: int, invalid_rate: float) -> dict[str, Result]:
+    with FakeOllamaServer(responses, invalid_rate=invalid_rate, seed=1) as server:
+        client = OllamaInstructor(host=server.url)
+        calls = 0
+
+        def call() -> None:
+            nonlocal calls
+            calls += 1
+            try:
+                client.chat_completion(format=FriendList, model=MODEL, messages=MESSAGES, retries=5)
+            except Exception:
+                pass
+
+        seconds = timed(call, repeat)
+        attempts = server.requests / calls
+    return {
+        "retry_latency": Result(seconds * 1e3, "ms/call", "lower"),
+        "retry_attempts_per_call": Result(attempts, "attempts/call", "lower"),
+    }
+
+
+def bench_memory(responses: list[str], concurrency: int) -> dict[str, Result]:
+    with FakeOllamaServer(responses, first_chunk_latency=0.2) as server:
+        async def run() -> int:
+            client = OllamaInstructorAsync(host=server.url)
+            await client.chat_completion(format=FriendList, model=MODEL, messages=MESSAGES)
+            tracemalloc.start()
+            await asyncio.gather(*(
+                client.chat_completion(format=FriendList, model=MODEL, messages=MESSAGES)
+                for _ in range(concurrency)
+            ))
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            return peak
+
+        peak = asyncio.run(run())
+    return {"memory_per_concurrent_request": Result(peak / concurrency / 1024, "KiB", "lower")}
+
+
+def bench_batch_scaling(responses: list[str], items: int, latency: float) -> dict[str, Result]:
+    results = {}
+    messages_list = [MESSAGES] * items
+    with FakeOllamaServer(responses, first_chunk_latency=latency) as server:
+        client = OllamaInstructor(host=server.url)
+        for concurrency in (1, 2, 4, 8):
+            # The async client is bound to the event loop it was first used in
+            client_async = OllamaInstructorAsync(host=server.url)
+            start = time.perf_counter()
+            asyncio.run(client_async.chat_completion_batch(
+                format=FriendList, model=MODEL, messages_list=messages_list, max_concurrency=concurrency
+            ))
+            results[f"batch_async_c{concurrency}"] = Result(items / (time.perf_counter() - start), "req/s", "higher")
+            start = time.perf_counter()
+            client.chat_completion_batch(
+                format=FriendList, model=MODEL, messages_list=messages_list, max_workers=concurrency
+            )
+            results[f"batch_sync_c{concurrency}"] = Result(items / (time.perf_counter() - start), "req/s", "higher")
+    return results
+
+
+def bench_validation(items: int, repeat: int) -> dict[str, Result]:
+    """
+    Validation of one large list-heavy output by the engine the clients use (the
+    cached validator of the compiled format) compared with the alternatives
+    """
+    content = synthetic_friend_list(items)
+    encoded = content.encode()
+    compiled = compile_format(FriendList)
+
+    def construct() -> FriendList:
+        # Skips validation entirely, as a trusted-schema shortcut would
+        data = from_json(encoded)
+        return FriendList.model_construct(friends=[FriendInfo.model_construct(**friend) for friend in data["friends"]])
+
+    return {
+        f"validation_compiled_{items}": Result(timed(lambda: compiled.validate_json(content), repeat) * 1e3, "ms", "lower"),
+        f"validation_compiled_bytes_{items}": Result(
+            timed(lambda: compiled.validate_json(encoded), repeat) * 1e3, "ms", "lower"
+        ),
+        f"validation_model_validate_json_{items}": Result(
+            timed(lambda: FriendList.model_validate_json(content), repeat) * 1e3, "ms", "lower"
+        ),
+        f"validation_construct_{items}": Result(timed(construct, repeat) * 1e3, "ms", "lower"),
+    }
+
+
+def bench_partial_long_list(items: int, chunk_size: int, repeat: int) -> dict[str, Result]:
+    """Incremental validation of a long list, without the network, per item of the list"""
+    content = synthetic_friend_list(items)
+    chunks = [content[i:i + chunk_size] for i in range(0, len(content), chunk_size)]
+    compiled = compile_format(FriendList)
+
+    def feed() -> None:
+        validator = PartialValidator(compiled)
+        for chunk in chunks:
+            validator.feed(chunk)
+
+    return {f"partial_validation_per_item_{items}": Result(timed(feed, repeat) / items * 1e6, "us", "lower")}
+
+
+def metadata_info() -> dict[str, str]:
+    try:
+        version = metadata.version("ollama-instructor")
+    except metadata.PackageNotFoundError:
+        version = "unknown"
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = "unknown"
+    return {
+        "version": version,
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Print the change of every metric and return the names of the regressed ones"""
+    regressions = []
+    print(f"\n{'metric':<34}{'baseline':>14}{'current':>14}{'change':>10}")
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None or not before["value"]:
+            continue
+        change = (result["value"] - before["value"]) / abs(before["value"])
+        worse = change > threshold if result["better"] == "lower" else change < -threshold
+        marker = "  REGRESSION" if worse else ""
+        print(f"{name:<34}{before['value']:>14.3f}{result['value']:>14.3f}{change:>+10.1%}{marker}")
+        if worse:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", type=Path, help="Write the results as JSON to this file")
+    parser.add_argument("--compare", type=Path, help="Results of a previous run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change counted as regression")
+    parser.add_argument("--responses", type=Path, help="JSONL file with recorded responses to replay")
+    parser.add_argument("--items", type=int, default=20, help="Friends per synthetic response")
+    parser.add_argument("--quick", action="store_true", help="Fewer repetitions, for smoke testing")
+    args = parser.parse_args(argv)
+    logging.disable(logging.ERROR)
+
+    responses = load_responses(args.responses) if args.responses else [synthetic_friend_list(args.items)]
+    repeat = 20 if args.quick else 200
+
+    results: dict[str, Result] = {}
+    results.update(bench_overhead(responses, repeat))
+    results.update(bench_stream_throughput(items=10 * args.items, chunk_size=4, repeat=max(repeat // 10, 2)))
+    results.update(bench_retry_cost(responses, repeat, invalid_rate=0.5))
+    results.update(bench_memory(responses, concurrency=20 if args.quick else 100))
+    results.update(bench_batch_scaling(responses, items=16 if args.quick else 64, latency=0.02))
+    results.update(bench_validation(items=25 * args.items, repeat=repeat))
+    results.update(bench_partial_long_list(items=50 * args.items, chunk_size=4, repeat=max(repeat // 100, 2)))
+
+    report = {"meta": metadata_info(), "results": {name: asdict(result) for name, result in results.items()}}
+    for name, result in results.items():
+        print(f"{name:<34}{result.value:>14.3f} {result.unit}")
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+    if args.compare:
+        regressions = compare(report, json.loads(args.compare.read_text()), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
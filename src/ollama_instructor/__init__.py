@@ -1,6 +1,98 @@
 from .ollama_instructor import OllamaInstructor, OllamaInstructorAsync
+from ._types import ParsedChatResponse, PartialChatResponse, BatchResult, StreamReset, SplitChatResponse
+from ._partial import PartialJSONParser, PartialJSONError, partial_model
+from ._stream import StreamBuffer
+from ._cache import ResponseCache, MemoryCache, SQLiteCache, make_cache_key
+from ._metrics import (
+    AttemptEvent,
+    Instrumentation,
+    CompositeInstrumentation,
+    MetricsAggregator,
+    Histogram,
+    PrometheusInstrumentation,
+    OpenTelemetryInstrumentation,
+)
+from ._repair import JSONRepairer, Repair, RepairStats, extract_json_object
+from ._policy import RetryPolicy, RetryBudget, retry_budget, is_transient
+from ._retry import RetryStrategy, BlindRetry, ErrorFeedbackRetry, TemperatureBumpRetry, AttemptRequest, AttemptFailure, summarize_validation_error
+from ._connection import ConnectionConfig, ConnectionPool
+from ._hosts import HostPool, HostStatus, NoHealthyHostError
+from ._batch_file import BatchFileStats, batch_file, abatch_file
+from ._session import ChatSession, AsyncChatSession, SessionUsage, estimate_tokens
+from ._scheduler import Scheduler, SchedulerStatus, AdmissionError, QueueFullError, DeadlineExceededError, priority_scope
+from ._traffic import TrafficRecorder, TrafficReplay, TrafficRecord, ReplayMismatchError, read_traffic
+from ._warmup import ModelKeeper, AsyncModelKeeper
+from ._logging import InfoSampler, JSONFormatter
+from ._format import CompiledFormat, FormatRegistry, FormatCacheInfo, compile_format, format_registry
 
 __all__ = [
     'OllamaInstructor',
-    'OllamaInstructorAsync'
+    'OllamaInstructorAsync',
+    'ParsedChatResponse',
+    'PartialChatResponse',
+    'BatchResult',
+    'StreamReset',
+    'SplitChatResponse',
+    'PartialJSONParser',
+    'PartialJSONError',
+    'partial_model',
+    'StreamBuffer',
+    'AttemptEvent',
+    'Instrumentation',
+    'CompositeInstrumentation',
+    'MetricsAggregator',
+    'Histogram',
+    'PrometheusInstrumentation',
+    'OpenTelemetryInstrumentation',
+    'JSONRepairer',
+    'Repair',
+    'RepairStats',
+    'extract_json_object',
+    'RetryStrategy',
+    'BlindRetry',
+    'ErrorFeedbackRetry',
+    'TemperatureBumpRetry',
+    'AttemptRequest',
+    'AttemptFailure',
+    'summarize_validation_error',
+    'RetryPolicy',
+    'RetryBudget',
+    'retry_budget',
+    'is_transient',
+    'ResponseCache',
+    'MemoryCache',
+    'SQLiteCache',
+    'make_cache_key',
+    'CompiledFormat',
+    'FormatRegistry',
+    'FormatCacheInfo',
+    'compile_format',
+    'format_registry',
+    'InfoSampler',
+    'JSONFormatter',
+    'ConnectionConfig',
+    'ConnectionPool',
+    'HostPool',
+    'HostStatus',
+    'NoHealthyHostError',
+    'ModelKeeper',
+    'AsyncModelKeeper',
+    'Scheduler',
+    'SchedulerStatus',
+    'AdmissionError',
+    'QueueFullError',
+    'DeadlineExceededError',
+    'priority_scope',
+    'BatchFileStats',
+    'batch_file',
+    'abatch_file',
+    'ChatSession',
+    'AsyncChatSession',
+    'SessionUsage',
+    'estimate_tokens',
+    'TrafficRecorder',
+    'TrafficReplay',
+    'TrafficRecord',
+    'ReplayMismatchError',
+    'read_traffic',
 ]
@@ -0,0 +1,128 @@
+"""
+Command line interface of ollama-instructor
+
+    python -m ollama_instructor batch records.jsonl --format myapp.models:Invoice \\
+        --model llama3.2 --output invoices.jsonl --concurrency 8
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Type
+
+from pydantic import BaseModel
+
+from ._batch_file import BatchFileStats, abatch_file
+from .ollama_instructor import OllamaInstructorAsync
+
+
+def load_format(path: str) -> Type[BaseModel]:
+    """Import a format model given as `package.module:ClassName`"""
+    module_name, _, attribute = path.partition(":")
+    if not module_name or not attribute:
+        raise ValueError(f"format must be given as module:ClassName, got {path!r}")
+    try:
+        format = importlib.import_module(module_name)
+        for name in attribute.split("."):
+            format = getattr(format, name)
+    except (ImportError, AttributeError) as e:
+        raise ValueError(f"cannot load format {path}: {e}") from None
+    if not (isinstance(format, type) and issubclass(format, BaseModel)):
+        raise ValueError(f"{path} is not a pydantic model")
+    return format
+
+
+class _UsageError(Exception):
+    """An argument that cannot be used, reported with the usage of the command"""
+
+
+def _print_stats(stats: BatchFileStats) -> None:
+    print(stats, file=sys.stderr, flush=True)
+
+
+def batch(args: argparse.Namespace) -> int:
+    try:
+        format = load_format(args.format)
+        options = json.loads(args.options) if args.options else None
+    except ValueError as e:
+        raise _UsageError(str(e)) from None
+    checkpoint = args.checkpoint
+    if checkpoint is None:
+        checkpoint = args.output.with_name(args.output.name + ".checkpoint")
+    if args.restart:
+        checkpoint.unlink(missing_ok=True)
+    stats = asyncio.run(_run_batch(args, format, options, checkpoint))
+    if not args.quiet:
+        _print_stats(stats)
+    return 1 if stats.failed else 0
+
+
+async def _run_batch(
+    args: argparse.Namespace, format: Type[BaseModel], options: dict | None, checkpoint: Path
+) -> BatchFileStats:
+    async with OllamaInstructorAsync(host=args.host) as client:
+        return await abatch_file(
+            client,
+            format=format,
+            model=args.model,
+            input=args.input,
+            output=args.output,
+            failures=args.failures,
+            checkpoint=checkpoint,
+            options=options,
+            keep_alive=args.keep_alive,
+            max_concurrency=args.concurrency,
+            retries=args.retries,
+            progress=None if args.quiet else _print_stats,
+            interval=args.interval,
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m ollama_instructor", description="ollama-instructor command line")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    batch_parser = commands.add_parser(
+        "batch",
+        help="Run a chat completion for every record of a JSONL file",
+        description=(
+            "Validate a chat completion for every record of a JSONL file (a list of messages or an "
+            "object with messages and an optional id per line) and write the outputs as JSONL. "
+            "Progress is checkpointed; running the same command again resumes."
+        ),
+    )
+    batch_parser.add_argument("input", type=Path, help="JSONL file with the records")
+    batch_parser.add_argument("--format", required=True, help="Format model as module:ClassName")
+    batch_parser.add_argument("--model", required=True, help="Ollama model to use")
+    batch_parser.add_argument("--output", type=Path, required=True, help="JSONL file for the validated outputs")
+    batch_parser.add_argument("--failures", type=Path, help="JSONL file for failed records (default: the output file)")
+    batch_parser.add_argument("--checkpoint", type=Path, help="Checkpoint file (default: OUTPUT.checkpoint)")
+    batch_parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint and start over")
+    batch_parser.add_argument("--host", help="URL of the Ollama server")
+    batch_parser.add_argument("--concurrency", type=int, default=4, help="Records in flight at once")
+    batch_parser.add_argument("--retries", type=int, default=3, help="Attempts per record")
+    batch_parser.add_argument("--options", help='Model options as JSON, e.g. \'{"temperature": 0}\'')
+    batch_parser.add_argument("--keep-alive", help="How long Ollama keeps the model loaded, e.g. 30m")
+    batch_parser.add_argument("--interval", type=float, default=5.0, help="Seconds between checkpoints and stats")
+    batch_parser.add_argument("--quiet", action="store_true", help="Do not print stats")
+    batch_parser.set_defaults(run=batch)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.ERROR)
+    try:
+        return args.run(args)
+    except _UsageError as e:
+        parser.error(str(e))
+    except (OSError, ValueError) as e:
+        print(f"{parser.prog}: error: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        print("Interrupted, run the same command again to resume", file=sys.stderr)
+        return 130
+
+
+if __name__ == "__main__":
+    sys.exit(main())
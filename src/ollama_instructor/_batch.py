@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ThreadPoolExecutor, wait
+from itertools import islice
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Iterator, TypeVar
+
+from ._types import BatchResult
+
+logger = logging.getLogger("ollama_instructor.batch")
+
+ItemT = TypeVar("ItemT")
+
+
+async def abatch(
+    func: Callable[[ItemT], Awaitable[Any]],
+    items: Iterable[ItemT],
+    max_concurrency: int,
+) -> AsyncIterator[BatchResult]:
+    """
+    Run `func` for every item with at most `max_concurrency` calls in flight
+
+    A fixed pool of worker tasks pulls items from the input lazily, so the input
+    may be a generator of arbitrary length. Results are yielded in completion
+    order. An exception of one item is stored in its BatchResult and does not
+    cancel the other items. Leaving the iteration early cancels the workers.
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+    source = enumerate(items)
+    results: asyncio.Queue[BatchResult | None] = asyncio.Queue()
+
+    async def worker() -> None:
+        try:
+            for index, item in source:
+                try:
+                    response = await func(item)
+                except Exception as e:
+                    logger.warning("Batch item %d failed: %r", index, e)
+                    results.put_nowait(BatchResult(index=index, error=e))
+                else:
+                    results.put_nowait(BatchResult(index=index, response=response))
+        finally:
+            results.put_nowait(None)
+
+    workers = [asyncio.create_task(worker()) for _ in range(max_concurrency)]
+    try:
+        running = len(workers)
+        while running:
+            result = await results.get()
+            if result is None:
+                running -= 1
+            else:
+                yield result
+        # Surface errors of the input iterable itself
+        for task in workers:
+            task.result()
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+
+def batch(
+    func: Callable[[ItemT], Any],
+    items: Iterable[ItemT],
+    max_workers: int,
+    timeout: float | None = None,
+    executor: Executor | None = None,
+) -> Iterator[BatchResult]:
+    """
+    Run `func` for every item in a thread pool and yield results in completion order
+
+    Items are submitted lazily, at most `max_workers` at a time. With `timeout`, an
+    item that runs longer than `timeout` seconds is reported with a TimeoutError.
+    Its thread cannot be interrupted and finishes in the background, the result is
+    discarded. Without `executor` a ThreadPoolExecutor is created for the call.
+    """
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1")
+    own_executor = executor is None
+    if executor is None:
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ollama_instructor")
+    source = enumerate(items)
+    start_times: dict[int, float] = {}
+    pending: dict[Future, int] = {}
+
+    def run(index: int, item: ItemT) -> Any:
+        start_times[index] = time.monotonic()
+        return func(item)
+
+    def submit(count: int) -> None:
+        for index, item in islice(source, count):
+            pending[executor.submit(run, index, item)] = index
+
+    try:
+        submit(max_workers)
+        while pending:
+            wait_timeout = None
+            if timeout is not None:
+                started = [start_times[index] for index in pending.values() if index in start_times]
+                wait_timeout = max(0.0, min(started) + timeout - time.monotonic()) if started else timeout
+            done, _ = wait(pending, timeout=wait_timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                error = future.exception()
+                if error is not None:
+                    logger.warning("Batch item %d failed: %r", index, error)
+                    yield BatchResult(index=index, error=error)
+                else:
+                    yield BatchResult(index=index, response=future.result())
+            if timeout is not None:
+                now = time.monotonic()
+                for future, index in list(pending.items()):
+                    start = start_times.get(index)
+                    if start is not None and now - start >= timeout:
+                        del pending[future]
+                        future.cancel()
+                        logger.warning("Batch item %d timed out after %.1fs", index, timeout)
+                        yield BatchResult(index=index, error=TimeoutError(f"Batch item {index} timed out after {timeout}s"))
+            submit(max_workers - len(pending))
+    finally:
+        for future in pending:
+            future.cancel()
+        if own_executor:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,298 @@
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from pathlib import Path
+from typing import IO, Any, Callable, Iterator, Mapping, Type
+
+from ollama import Options
+from pydantic import BaseModel
+
+from ._types import BatchResult
+from .ollama_instructor import OllamaInstructor, OllamaInstructorAsync
+
+logger = logging.getLogger("ollama_instructor.batch_file")
+
+
+@dataclass(slots=True)
+class BatchFileStats:
+    """
+    Progress of a batch file run
+
+    Attributes:
+        succeeded: Records validated and written to the output in this run
+        failed: Records that failed in this run, including unreadable ones
+        skipped: Records done by an earlier run, according to the checkpoint
+        started: Start of the run on the monotonic clock
+    """
+    succeeded: int = 0
+    failed: int = 0
+    skipped: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    @property
+    def processed(self) -> int:
+        return self.succeeded + self.failed
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def rate(self) -> float:
+        """Records processed per second"""
+        elapsed = self.elapsed
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.processed} records ({self.failed} failed, {self.skipped} skipped) "
+            f"in {self.elapsed:.1f}s, {self.rate:.1f} records/s"
+        )
+
+
+class _Checkpoint:
+    """
+    Records done so far: every record before `offset` and the ones in `done`
+
+    Results arrive in completion order, so records after the offset may be done
+    while an earlier one is still running. `done` holds those and stays as small
+    as the number of records in flight.
+    """
+    def __init__(self, path: Path | None) -> None:
+        self.path = path
+        self.offset = 0
+        self.done: set[int] = set()
+        self.resumed = path is not None and path.exists()
+        if self.resumed:
+            data = json.loads(path.read_text())
+            self.offset = data["offset"]
+            self.done = set(data.get("done", ()))
+
+    def covers(self, index: int) -> bool:
+        return index < self.offset or index in self.done
+
+    def complete(self, index: int) -> None:
+        self.done.add(index)
+        while self.offset in self.done:
+            self.done.remove(self.offset)
+            self.offset += 1
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps({"offset": self.offset, "done": sorted(self.done)}))
+        os.replace(tmp, self.path)
+
+
+def parse_record(line: str) -> tuple[Any, list]:
+    """
+    Read a record of the input file: a JSON list of messages, or an object with a
+    `messages` list and an optional `id` that is copied to the output
+
+    Returns:
+        The id, None if the record has none, and the messages
+    """
+    record = json.loads(line)
+    if isinstance(record, list):
+        return None, record
+    if isinstance(record, dict) and isinstance(record.get("messages"), list):
+        return record.get("id"), record["messages"]
+    raise ValueError("record must be a list of messages or an object with a messages list")
+
+
+class _FileRun:
+    def __init__(
+        self,
+        input: str | os.PathLike,
+        output: str | os.PathLike,
+        failures: str | os.PathLike | None,
+        checkpoint: str | os.PathLike | None,
+        progress: Callable[[BatchFileStats], None] | None,
+        interval: float,
+    ) -> None:
+        self.input = Path(input)
+        self.checkpoint = _Checkpoint(Path(checkpoint) if checkpoint is not None else None)
+        mode = "a" if self.checkpoint.resumed else "w"
+        self._output = _open_output(Path(output), mode)
+        self._failures = _open_output(Path(failures), mode) if failures is not None else self._output
+        self.progress = progress
+        self.interval = interval
+        self.stats = BatchFileStats()
+        # Record index and id of the submitted items, by their index in the batch
+        self._submitted: dict[int, tuple[int, Any]] = {}
+        self._last_report = time.monotonic()
+
+    def records(self) -> Iterator[list]:
+        """Messages of the records still to do, read lazily from the input file"""
+        submitted = 0
+        with self.input.open(encoding="utf-8") as input:
+            for index, line in enumerate(input):
+                if self.checkpoint.covers(index):
+                    self.stats.skipped += 1
+                    continue
+                if not line.strip():
+                    self.checkpoint.complete(index)
+                    continue
+                try:
+                    record_id, messages = parse_record(line)
+                except ValueError as e:
+                    logger.warning("Record %d is invalid: %s", index, e)
+                    self._write_failure(index, None, e)
+                    continue
+                self._submitted[submitted] = (index, record_id)
+                submitted += 1
+                yield messages
+
+    def handle(self, result: BatchResult) -> None:
+        index, record_id = self._submitted.pop(result.index)
+        if result.ok:
+            output = result.response.parsed.model_dump(mode="json")
+            self._write(self._output, {"index": index, "id": record_id, "output": output})
+            self.stats.succeeded += 1
+            self.checkpoint.complete(index)
+        else:
+            self._write_failure(index, record_id, result.error)
+        if time.monotonic() - self._last_report >= self.interval:
+            self._flush()
+            if self.progress is not None:
+                self.progress(self.stats)
+            self._last_report = time.monotonic()
+
+    def _write_failure(self, index: int, record_id: Any, error: BaseException) -> None:
+        self._write(self._failures, {"index": index, "id": record_id, "error": type(error).__name__, "message": str(error)})
+        self.stats.failed += 1
+        self.checkpoint.complete(index)
+
+    @staticmethod
+    def _write(file: IO[str], record: dict) -> None:
+        file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+    def _flush(self) -> None:
+        # Outputs first, so the checkpoint never covers records that were not written
+        self._output.flush()
+        self._failures.flush()
+        self.checkpoint.save()
+
+    def close(self) -> None:
+        try:
+            self._flush()
+        finally:
+            self._output.close()
+            if self._failures is not self._output:
+                self._failures.close()
+
+    def __enter__(self) -> "_FileRun":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _open_output(path: Path, mode: str) -> IO[str]:
+    file = path.open(mode, encoding="utf-8")
+    if mode == "a" and file.tell() > 0:
+        # Terminate a line cut off by an interrupted run
+        with path.open("rb") as existing:
+            existing.seek(-1, os.SEEK_END)
+            if existing.read(1) != b"\n":
+                file.write("\n")
+    return file
+
+
+def batch_file(
+    client: OllamaInstructor,
+    format: Type[BaseModel],
+    model: str,
+    input: str | os.PathLike,
+    output: str | os.PathLike,
+    failures: str | os.PathLike | None = None,
+    *,
+    checkpoint: str | os.PathLike | None = None,
+    options: Mapping[str, Any] | Options | None = None,
+    keep_alive: float | str | None = None,
+    max_workers: int = 4,
+    retries: int = 3,
+    stamina_timeout: float | timedelta | None = None,
+    progress: Callable[[BatchFileStats], None] | None = None,
+    interval: float = 5.0,
+) -> BatchFileStats:
+    """
+    Run a chat completion for every record of a JSONL file and write the results to JSONL
+
+    The input is read lazily and results are written as they complete, so memory
+    stays constant for files of any size. Every input line is a list of messages
+    or an object with `messages` and an optional `id`. Output lines hold the
+    `index` (line number) and `id` of the record and the validated `output`;
+    failure lines the `error` type and `message` instead.
+
+    With `checkpoint`, the progress is saved to that file every `interval`
+    seconds and at the end, also when interrupted. Running again with the same
+    checkpoint resumes after the records done, appending to the output files.
+    Records finished after the last save are processed again, so deduplicate by
+    `index` if an interruption must not produce duplicates.
+
+    Args:
+        client: The client to send the requests with
+        format: The format model the outputs are validated against
+        model: The model to use
+        input: Path of the JSONL file with the records
+        output: Path of the JSONL file the validated outputs are written to
+        failures: Path of the JSONL file for failed records, the output file if None
+        checkpoint: Path of the checkpoint file, None to not save progress
+        max_workers: Number of records in flight at once
+        progress: Called with the stats every `interval` seconds
+        interval: Seconds between checkpoints and progress reports
+
+    Returns:
+        The stats of the run
+    """
+    with _FileRun(input, output, failures, checkpoint, progress, interval) as run:
+        for result in client.chat_completion_batch_iter(
+            format=format,
+            model=model,
+            messages_list=run.records(),
+            options=options,
+            keep_alive=keep_alive,
+            max_workers=max_workers,
+            retries=retries,
+            stamina_timeout=stamina_timeout
+        ):
+            run.handle(result)
+    return run.stats
+
+
+async def abatch_file(
+    client: OllamaInstructorAsync,
+    format: Type[BaseModel],
+    model: str,
+    input: str | os.PathLike,
+    output: str | os.PathLike,
+    failures: str | os.PathLike | None = None,
+    *,
+    checkpoint: str | os.PathLike | None = None,
+    options: Mapping[str, Any] | Options | None = None,
+    keep_alive: float | str | None = None,
+    max_concurrency: int = 4,
+    retries: int = 3,
+    stamina_timeout: float | timedelta | None = None,
+    progress: Callable[[BatchFileStats], None] | None = None,
+    interval: float = 5.0,
+) -> BatchFileStats:
+    """Like `batch_file`, with the async client and `max_concurrency` records in flight"""
+    with _FileRun(input, output, failures, checkpoint, progress, interval) as run:
+        async for result in await client.chat_completion_batch_iter(
+            format=format,
+            model=model,
+            messages_list=run.records(),
+            options=options,
+            keep_alive=keep_alive,
+            max_concurrency=max_concurrency,
+            retries=retries,
+            stamina_timeout=stamina_timeout
+        ):
+            run.handle(result)
+    return run.stats
@@ -0,0 +1,223 @@
+import base64
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from os import PathLike
+from typing import Any, AsyncIterator, Iterator, Mapping, Sequence
+
+from ollama import ChatResponse, Message, Options
+from pydantic import BaseModel
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(exclude_none=True)
+    if isinstance(value, (bytes, bytearray)):
+        return base64.b64encode(value).decode()
+    return str(value)
+
+
+def normalize_message(message: Mapping[str, Any] | Message) -> dict[str, Any]:
+    """A message as plain dict without unset values, the same for a Message and the equivalent dict"""
+    if isinstance(message, BaseModel):
+        return message.model_dump(exclude_none=True)
+    return {key: value for key, value in message.items() if value is not None}
+
+
+def make_cache_key(
+    model: str,
+    messages: Sequence[Mapping[str, Any] | Message] | None,
+    schema_json: bytes,
+    options: Mapping[str, Any] | Options | None,
+) -> str:
+    """
+    Stable hash of everything that determines the response of a request
+
+    Messages and options are normalized first, so a Message and the equivalent
+    dict, or options with and without unset values, produce the same key.
+    """
+    if isinstance(options, BaseModel):
+        options = options.model_dump(exclude_none=True)
+    elif options is not None:
+        options = {key: value for key, value in options.items() if value is not None}
+    digest = hashlib.sha256()
+    digest.update(model.encode())
+    digest.update(b"\0")
+    digest.update(schema_json)
+    digest.update(b"\0")
+    digest.update(json.dumps(
+        [normalize_message(message) for message in messages or ()],
+        sort_keys=True, separators=(",", ":"), default=_json_default,
+    ).encode())
+    digest.update(b"\0")
+    digest.update(json.dumps(options or {}, sort_keys=True, separators=(",", ":"), default=_json_default).encode())
+    return digest.hexdigest()
+
+
+class ResponseCache(ABC):
+    """
+    Storage backend for validated responses
+
+    Only responses whose content passed validation are stored. Values are the
+    complete ChatResponse serialized to JSON bytes.
+    """
+    @abstractmethod
+    def get(self, key: str) -> bytes | None:
+        """Return the stored value or None if the key is missing or expired"""
+
+    @abstractmethod
+    def set(self, key: str, value: bytes) -> None:
+        """Store a value"""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove all entries"""
+
+    def get_response(self, key: str) -> ChatResponse | None:
+        value = self.get(key)
+        if value is None:
+            return None
+        return ChatResponse.model_validate_json(value)
+
+    def set_response(self, key: str, response: ChatResponse) -> None:
+        self.set(key, response.model_dump_json(exclude_none=True).encode())
+
+
+class MemoryCache(ResponseCache):
+    """
+    In-process LRU cache with optional time to live
+
+    Args:
+        maxsize: Maximum number of responses to keep
+        ttl: Seconds after which an entry expires, None to keep entries until evicted
+    """
+    def __init__(self, maxsize: int = 1024, ttl: float | None = None) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache(ResponseCache):
+    """
+    Persistent cache in a SQLite database that survives restarts
+
+    Args:
+        path: Path of the database file, created if it does not exist
+        ttl: Seconds after which an entry expires, None to keep entries forever
+        maxsize: Maximum number of responses to keep, the least recently used
+            entries are removed beyond it. None for no limit
+    """
+    def __init__(self, path: str | PathLike[str], ttl: float | None = None, maxsize: int | None = None) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+
+    def get(self, key: str) -> bytes | None:
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created = row
+            if self.ttl is not None and created + self.ttl < now:
+                self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._connection.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            return value
+
+    def set(self, key: str, value: bytes) -> None:
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            if self.maxsize is not None:
+                self._connection.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                    (self.maxsize,),
+                )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+def replay_chunks(response: ChatResponse, chunk_size: int = 64) -> Iterator[ChatResponse]:
+    """
+    Split a complete response into stream chunks like Ollama sends them
+
+    The content is yielded in chunks of `chunk_size` characters, followed by a
+    final chunk with empty content that carries the metadata of the response.
+    """
+    content = response.message.content or ""
+    for start in range(0, len(content), chunk_size):
+        yield ChatResponse(
+            model=response.model,
+            created_at=response.created_at,
+            message=Message(role="assistant", content=content[start:start + chunk_size]),
+            done=False,
+        )
+    yield with_content(response, "")
+
+
+async def areplay_chunks(response: ChatResponse, chunk_size: int = 64) -> AsyncIterator[ChatResponse]:
+    """Async variant of `replay_chunks`"""
+    for chunk in replay_chunks(response, chunk_size):
+        yield chunk
+
+
+def with_content(chunk: ChatResponse, content: str) -> ChatResponse:
+    """Complete response built from the final chunk of a stream and the accumulated content"""
+    return chunk.model_copy(update={"message": Message(role="assistant", content=content)})
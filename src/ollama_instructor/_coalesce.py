@@ -0,0 +1,146 @@
+import asyncio
+import hashlib
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Generic, TypeVar
+
+logger = logging.getLogger("ollama_instructor.coalesce")
+
+R = TypeVar("R")
+
+
+def coalesce_key(request_key: str, *parameters: Any) -> str:
+    """
+    Key of a call given the key of its request and the parameters of the call that
+    change its outcome, such as retries and deadlines. Only calls agreeing on all of
+    them may share a result.
+    """
+    return request_key + hashlib.sha256(repr(parameters).encode()).hexdigest()[:16]
+
+
+class _Call(Generic[R]):
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Future[R]") -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight(Generic[R]):
+    """
+    Collapses concurrent calls with the same key into one
+
+    The first call for a key runs `func` as a task; calls with the same key arriving
+    while it runs wait for the same task and get the same result or exception. A
+    waiter being cancelled does not cancel the task for the others; the task is only
+    cancelled when no waiter is left. With `copy`, the calls that joined get
+    `copy(result)`, so they do not share mutable results with the first call.
+    """
+    def __init__(self) -> None:
+        self._calls: dict[str, _Call[R]] = {}
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: str, func: Callable[[], Awaitable[R]], copy: Callable[[R], R] | None = None) -> R:
+        call = self._calls.get(key)
+        joined = call is not None
+        if call is None:
+            call = _Call(asyncio.ensure_future(func()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+        else:
+            self.coalesced += 1
+            logger.debug("Joining in-flight request %s", key[:12])
+        call.waiters += 1
+        try:
+            result = await asyncio.shield(call.task)
+            return copy(result) if joined and copy is not None else result
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+
+    def _forget(self, key: str, call: _Call[R]) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+
+class _Broadcast(Generic[R]):
+    """Runs one async iterator and replays its items to every subscriber"""
+    def __init__(self, source: AsyncIterator[R], on_done: Callable[[], None]) -> None:
+        self._items: list[R] = []
+        self._error: BaseException | None = None
+        self._done = False
+        self._changed = asyncio.Event()
+        self._subscribers = 0
+        self._on_done = on_done
+        self._task = asyncio.ensure_future(self._pump(source))
+
+    async def _pump(self, source: AsyncIterator[R]) -> None:
+        try:
+            async for item in source:
+                self._items.append(item)
+                self._notify()
+        except asyncio.CancelledError:
+            self._error = asyncio.CancelledError()
+            raise
+        except Exception as e:
+            self._error = e
+        finally:
+            self._done = True
+            self._on_done()
+            self._notify()
+
+    def _notify(self) -> None:
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def subscribe(self) -> AsyncIterator[R]:
+        self._subscribers += 1
+        index = 0
+        try:
+            while True:
+                if index < len(self._items):
+                    yield self._items[index]
+                    index += 1
+                elif self._done:
+                    if self._error is not None:
+                        raise self._error
+                    return
+                else:
+                    await self._changed.wait()
+        finally:
+            self._subscribers -= 1
+            if self._subscribers == 0 and not self._task.done():
+                self._task.cancel()
+
+
+class StreamFanout(Generic[R]):
+    """
+    Shares one upstream stream between concurrent identical stream requests
+
+    Subscribers joining while the upstream runs first get the items streamed so far,
+    then the new ones as they arrive. The upstream is cancelled when every
+    subscriber has stopped consuming.
+    """
+    def __init__(self) -> None:
+        self._streams: dict[str, _Broadcast[R]] = {}
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._streams)
+
+    def subscribe(self, key: str, factory: Callable[[], AsyncIterator[R]]) -> AsyncIterator[R]:
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            broadcast = _Broadcast(factory(), lambda: self._forget(key, broadcast))
+            self._streams[key] = broadcast
+        else:
+            self.coalesced += 1
+            logger.debug("Joining in-flight stream %s", key[:12])
+        return broadcast.subscribe()
+
+    def _forget(self, key: str, broadcast: "_Broadcast[R]") -> None:
+        if self._streams.get(key) is broadcast:
+            del self._streams[key]
@@ -0,0 +1,172 @@
+import importlib.util
+import threading
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+
+
+@dataclass(frozen=True, slots=True)
+class ConnectionConfig:
+    """
+    Connection pool, keep-alive and timeout settings of the underlying httpx client
+
+    The defaults keep more idle connections alive for longer than httpx does, so
+    bursts of concurrent requests reuse sockets instead of opening new ones. The
+    read timeout is disabled because generations may take minutes.
+
+    Args:
+        max_connections: Maximum number of open connections, None for no limit
+        max_keepalive_connections: Maximum number of idle connections kept open
+        keepalive_expiry: Seconds an idle connection is kept open
+        connect_timeout: Seconds to establish a connection
+        read_timeout: Seconds to wait for the next bytes of a response. For streams
+            this bounds the time between two chunks
+        write_timeout: Seconds to send a request
+        pool_timeout: Seconds to wait for a free connection when `max_connections`
+            are in use
+        http2: Use HTTP/2, multiplexing concurrent requests over few connections.
+            Requires the `h2` package (`pip install ollama-instructor[http2]`)
+    """
+    max_connections: int | None = 100
+    max_keepalive_connections: int | None = 50
+    keepalive_expiry: float | None = 30.0
+    connect_timeout: float | None = 5.0
+    read_timeout: float | None = None
+    write_timeout: float | None = 30.0
+    pool_timeout: float | None = None
+    http2: bool = False
+
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    def timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(
+            connect=self.connect_timeout,
+            read=self.read_timeout,
+            write=self.write_timeout,
+            pool=self.pool_timeout,
+        )
+
+    def check_http2(self) -> None:
+        if self.http2 and importlib.util.find_spec("h2") is None:
+            raise ImportError("HTTP/2 requires the h2 package: pip install ollama-instructor[http2]")
+
+
+class SharedTransport(httpx.BaseTransport):
+    """Transport of a ConnectionPool; closing a client using it leaves the pool open"""
+    def __init__(self, transport: httpx.HTTPTransport) -> None:
+        self._transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        return self._transport.handle_request(request)
+
+    def close(self) -> None:
+        pass
+
+
+class AsyncSharedTransport(httpx.AsyncBaseTransport):
+    def __init__(self, transport: httpx.AsyncHTTPTransport) -> None:
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        pass
+
+
+class ConnectionPool:
+    """
+    A connection pool shared by many instructor clients
+
+    Pass it as `pool` to clients, e.g. one per tenant or model, so they reuse the
+    same sockets instead of each opening their own. Closing a client does not close
+    the pool; close the pool itself once all clients are done. The sync and the
+    async transport are created on first use; the async one is bound to the event
+    loop it is first used in.
+
+    Args:
+        config: Pool limits, keep-alive and HTTP/2 setting. Timeouts of the config
+            apply to every client using the pool
+    """
+    def __init__(self, config: ConnectionConfig | None = None) -> None:
+        self.config = config if config is not None else ConnectionConfig()
+        self.config.check_http2()
+        self._lock = threading.Lock()
+        self._transport: httpx.HTTPTransport | None = None
+        self._async_transport: httpx.AsyncHTTPTransport | None = None
+
+    @property
+    def transport(self) -> httpx.BaseTransport:
+        return SharedTransport(self._http_transport())
+
+    @property
+    def async_transport(self) -> httpx.AsyncBaseTransport:
+        return AsyncSharedTransport(self._async_http_transport())
+
+    def _http_transport(self) -> httpx.HTTPTransport:
+        with self._lock:
+            if self._transport is None:
+                self._transport = httpx.HTTPTransport(limits=self.config.limits(), http2=self.config.http2)
+            return self._transport
+
+    def _async_http_transport(self) -> httpx.AsyncHTTPTransport:
+        with self._lock:
+            if self._async_transport is None:
+                self._async_transport = httpx.AsyncHTTPTransport(limits=self.config.limits(), http2=self.config.http2)
+            return self._async_transport
+
+    def close(self) -> None:
+        with self._lock:
+            transport, self._transport = self._transport, None
+        if transport is not None:
+            transport.close()
+
+    async def aclose(self) -> None:
+        self.close()
+        with self._lock:
+            transport, self._async_transport = self._async_transport, None
+        if transport is not None:
+            await transport.aclose()
+
+    def __enter__(self) -> "ConnectionPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    async def __aenter__(self) -> "ConnectionPool":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+
+def client_kwargs(
+    kwargs: dict[str, Any],
+    connection: ConnectionConfig | None,
+    pool: ConnectionPool | None,
+    asynchronous: bool,
+) -> dict[str, Any]:
+    """Merge the connection settings into the keyword arguments of the ollama client"""
+    if pool is not None:
+        if "transport" in kwargs:
+            raise ValueError("pass either pool or transport, not both")
+        if connection is not None:
+            raise ValueError("pass either pool or connection, the pool has its own ConnectionConfig")
+        connection = pool.config
+        kwargs = {**kwargs, "transport": pool.async_transport if asynchronous else pool.transport}
+    if connection is None:
+        return kwargs
+    connection.check_http2()
+    return {
+        "limits": connection.limits(),
+        "timeout": connection.timeout(),
+        "http2": connection.http2,
+        **kwargs,
+    }
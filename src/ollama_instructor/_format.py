@@ -0,0 +1,158 @@
+import json
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Generic, NamedTuple, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+from pydantic_core import SchemaValidator
+
+from ._partial import partial_model
+
+T = TypeVar("T", bound=BaseModel)
+
+
+class FormatCacheInfo(NamedTuple):
+    """Statistics of a FormatRegistry, modeled after functools.lru_cache"""
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class CompiledFormat(Generic[T]):
+    """
+    Everything derived from a format model that is needed per request
+
+    The JSON schema is generated once and kept both as dict (passed to Ollama as
+    `format`) and as serialized bytes (for hashing and cache keys). The model
+    itself is only referenced weakly, so a registry entry never keeps a
+    dynamically created model class alive.
+
+    Attributes:
+        schema: JSON schema of the model as returned by `model_json_schema()`
+        schema_json: The schema serialized to compact, key-sorted JSON bytes
+    """
+    __slots__ = ("_model_ref", "_partial_model", "schema", "schema_json", "__weakref__")
+
+    def __init__(self, format: Type[T]) -> None:
+        self._model_ref = weakref.ref(format)
+        self._partial_model: Type[BaseModel] | None = None
+        self.schema: dict[str, Any] = format.model_json_schema()
+        self.schema_json: bytes = json.dumps(
+            self.schema, sort_keys=True, separators=(",", ":")
+        ).encode()
+
+    @property
+    def model(self) -> Type[T]:
+        model = self._model_ref()
+        if model is None:
+            raise ReferenceError("The format model of this CompiledFormat was garbage collected")
+        return model
+
+    @property
+    def validator(self) -> SchemaValidator:
+        """The pydantic-core validator pydantic built for the model at class creation"""
+        return self.model.__pydantic_validator__
+
+    def validate_json(self, data: str | bytes | bytearray) -> T:
+        """Validate a JSON document against the format model and return the instance"""
+        return self.validator.validate_json(data)
+
+    @property
+    def partial_model(self) -> Type[BaseModel]:
+        """Variant of the model with all fields optional, used to validate incomplete streams"""
+        if self._partial_model is None:
+            self._partial_model = partial_model(self.model)
+        return self._partial_model
+
+    def json_error(self, message: str, input: Any = None) -> ValidationError:
+        """ValidationError for content that is not valid JSON"""
+        return ValidationError.from_exception_data(
+            self.model.__name__,
+            [{"type": "json_invalid", "loc": (), "input": input, "ctx": {"error": message}}],
+        )
+
+    def no_content_error(self) -> ValidationError:
+        """ValidationError for a response that carries no content at all"""
+        return self.json_error("response has no content")
+
+    def __repr__(self) -> str:
+        model = self._model_ref()
+        name = model.__name__ if model is not None else "<collected>"
+        return f"CompiledFormat({name})"
+
+
+class FormatRegistry:
+    """
+    Bounded, thread-safe cache of CompiledFormat objects keyed weakly on the model class
+
+    Entries are evicted in least-recently-used order once `maxsize` is reached
+    and dropped automatically when their model class is garbage collected.
+
+    Args:
+        maxsize: Maximum number of compiled formats to keep
+    """
+    def __init__(self, maxsize: int = 128) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self._entries: OrderedDict[weakref.ref, CompiledFormat] = OrderedDict()
+        self._lock = threading.RLock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, format: Type[T]) -> CompiledFormat[T]:
+        """Return the compiled format for `format`, compiling it on first use"""
+        key = weakref.ref(format, self._discard)
+        with self._lock:
+            compiled = self._entries.get(key)
+            if compiled is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return compiled
+            self._misses += 1
+
+        # Compile outside the lock, schema generation of large models is slow
+        compiled = CompiledFormat(format)
+        with self._lock:
+            existing = self._entries.get(key)
+            if existing is not None:
+                return existing
+            self._entries[key] = compiled
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return compiled
+
+    def cache_info(self) -> FormatCacheInfo:
+        with self._lock:
+            return FormatCacheInfo(self._hits, self._misses, self.maxsize, len(self._entries))
+
+    def clear(self) -> None:
+        """Drop all entries and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, format: object) -> bool:
+        try:
+            return weakref.ref(format) in self._entries
+        except TypeError:
+            return False
+
+    def _discard(self, key: weakref.ref) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+# Registry shared by all clients that are not given their own
+format_registry = FormatRegistry()
+
+
+def compile_format(format: Type[T]) -> CompiledFormat[T]:
+    """Return the compiled format for `format` from the shared registry"""
+    return format_registry.get(format)
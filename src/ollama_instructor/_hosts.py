@@ -0,0 +1,422 @@
+import json
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, Literal, NamedTuple, Sequence
+
+import httpx
+
+from ._connection import AsyncSharedTransport, ConnectionConfig, ConnectionPool, SharedTransport
+
+logger = logging.getLogger("ollama_instructor.hosts")
+
+Routing = Literal["least_outstanding", "model_affinity"]
+
+_MODEL_PATTERN = re.compile(rb'"model"\s*:\s*"((?:[^"\\]|\\.)*)"')
+# Statuses of a node that is overloaded or restarting, not of a bad request
+_FAILOVER_STATUSES = frozenset({502, 503, 504})
+
+
+class NoHealthyHostError(httpx.TransportError):
+    """Raised when every host of a HostPool failed for a request"""
+
+
+class HostStatus(NamedTuple):
+    """
+    Snapshot of a host of a HostPool
+
+    Attributes:
+        host: URL of the host
+        healthy: False while the host is ejected
+        outstanding: Number of requests in flight
+        failures: Consecutive failures
+        models: Models known to be loaded on the host
+    """
+    host: str
+    healthy: bool
+    outstanding: int
+    failures: int
+    models: frozenset[str]
+
+
+@dataclass(slots=True)
+class _Node:
+    url: httpx.URL
+    outstanding: int = 0
+    failures: int = 0
+    ejected_until: float = 0.0
+    models: set[str] = field(default_factory=set)
+
+    @property
+    def name(self) -> str:
+        return str(self.url).rstrip("/")
+
+    def endpoint(self, path: bytes) -> httpx.URL:
+        """URL of `path` (with query) on this host, below the base path of the host URL"""
+        return self.url.copy_with(raw_path=self.url.raw_path.rstrip(b"/") + path)
+
+
+@dataclass(slots=True)
+class _RouteHint:
+    avoid: set[str] = field(default_factory=set)
+    last: str | None = None
+
+    def avoid_last(self) -> None:
+        if self.last is not None:
+            self.avoid.add(self.last)
+
+
+_route_hint: ContextVar[_RouteHint | None] = ContextVar("ollama_instructor_route_hint", default=None)
+
+
+@contextmanager
+def route_scope() -> Iterator[_RouteHint]:
+    """
+    Scope of a request whose attempts are routed by a HostPool
+
+    Call `avoid_last()` on the hint after an attempt failed validation, so the next
+    attempt prefers another host. Without a HostPool the hint is ignored. Streams
+    keep the scope open across their chunks, as their requests are sent lazily.
+    """
+    hint = _RouteHint()
+    token = _route_hint.set(hint)
+    try:
+        yield hint
+    finally:
+        try:
+            _route_hint.reset(token)
+        except ValueError:
+            # A stream generator finalized from another context, its own context is gone
+            pass
+
+
+def _parse_host(host: str) -> httpx.URL:
+    url = httpx.URL(host if "://" in host else f"http://{host}")
+    if url.port is None:
+        url = url.copy_with(port=11434)
+    return url
+
+
+def _model_of(request: httpx.Request) -> str | None:
+    content = request.content
+    # The ollama client sends the model as first key, so the head is enough
+    match = _MODEL_PATTERN.search(content, 0, 512) or _MODEL_PATTERN.search(content)
+    if match is None:
+        return None
+    return json.loads(b'"' + match.group(1) + b'"')
+
+
+class _Router:
+    def __init__(self, hosts: Sequence[str], routing: Routing, max_failures: int, ejection_time: float) -> None:
+        if not hosts:
+            raise ValueError("hosts must not be empty")
+        if routing not in ("least_outstanding", "model_affinity"):
+            raise ValueError(f"unknown routing {routing!r}")
+        self.nodes = [_Node(_parse_host(host)) for host in hosts]
+        self.routing = routing
+        self.max_failures = max_failures
+        self.ejection_time = ejection_time
+        self._lock = threading.Lock()
+        self._turn = 0
+
+    def acquire(self, model: str | None, exclude: set[str]) -> _Node | None:
+        """Pick the node for the next request and count it as outstanding"""
+        hint = _route_hint.get()
+        with self._lock:
+            now = time.monotonic()
+            candidates = [node for node in self.nodes if node.name not in exclude]
+            if not candidates:
+                return None
+            healthy = [node for node in candidates if node.ejected_until <= now]
+            # Fail open: when every node is ejected, try them anyway
+            candidates = healthy or candidates
+            if hint is not None and hint.avoid:
+                candidates = [node for node in candidates if node.name not in hint.avoid] or candidates
+            if self.routing == "model_affinity" and model is not None:
+                candidates = [node for node in candidates if model in node.models] or candidates
+            # Rotate the start so ties are spread over the nodes
+            self._turn = (self._turn + 1) % len(candidates)
+            rotated = candidates[self._turn:] + candidates[:self._turn]
+            node = min(rotated, key=lambda node: node.outstanding)
+            node.outstanding += 1
+        if hint is not None:
+            hint.last = node.name
+        return node
+
+    def release(self, node: _Node, model: str | None, ok: bool) -> None:
+        with self._lock:
+            node.outstanding -= 1
+            if ok:
+                node.failures = 0
+                node.ejected_until = 0.0
+                if model is not None:
+                    node.models.add(model)
+                return
+            node.failures += 1
+            if node.failures >= self.max_failures:
+                node.ejected_until = time.monotonic() + self.ejection_time
+                ejected = True
+            else:
+                ejected = False
+        if ejected:
+            logger.warning("Ejecting host %s for %.0fs after %d failures", node.name, self.ejection_time, node.failures)
+
+    def set_health(self, node: _Node, models: Iterable[str] | None) -> None:
+        with self._lock:
+            if models is None:
+                node.failures = max(node.failures + 1, self.max_failures)
+                node.ejected_until = time.monotonic() + self.ejection_time
+            else:
+                node.failures = 0
+                node.ejected_until = 0.0
+                node.models = set(models)
+
+    def status(self) -> list[HostStatus]:
+        with self._lock:
+            now = time.monotonic()
+            return [
+                HostStatus(node.name, node.ejected_until <= now, node.outstanding, node.failures, frozenset(node.models))
+                for node in self.nodes
+            ]
+
+
+def _route(request: httpx.Request, node: _Node, path: bytes) -> None:
+    # `path` is the path and query the client requested, before any earlier routing
+    request.url = node.endpoint(path)
+    request.headers["Host"] = request.url.netloc.decode("ascii")
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    def __init__(self, stream: httpx.SyncByteStream, release) -> None:
+        self._stream = stream
+        self._release = release
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield from self._stream
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            self._release()
+
+
+class _AsyncReleasingStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, release) -> None:
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for part in self._stream:
+            yield part
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+def _releaser(router: _Router, node: _Node, model: str | None, ok: bool):
+    released = False
+
+    def release() -> None:
+        nonlocal released
+        if not released:
+            released = True
+            router.release(node, model, ok)
+    return release
+
+
+class _RoutingTransport(httpx.BaseTransport):
+    def __init__(self, router: _Router, transport: httpx.HTTPTransport) -> None:
+        self._router = router
+        self._transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        model = _model_of(request)
+        path = request.url.raw_path
+        tried: set[str] = set()
+        while True:
+            node = self._router.acquire(model, tried)
+            if node is None:
+                raise NoHealthyHostError(f"All hosts failed: {', '.join(sorted(tried))}", request=request)
+            tried.add(node.name)
+            _route(request, node, path)
+            try:
+                response = self._transport.handle_request(request)
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                # Nothing was sent, so the request can go to another host
+                self._router.release(node, model, ok=False)
+                logger.warning("Could not connect to %s, trying another host", node.name)
+                continue
+            except httpx.TransportError:
+                self._router.release(node, model, ok=False)
+                raise
+            if response.status_code in _FAILOVER_STATUSES:
+                response.close()
+                self._router.release(node, model, ok=False)
+                continue
+            release = _releaser(self._router, node, model, ok=response.status_code < 500)
+            return httpx.Response(
+                response.status_code,
+                headers=response.headers,
+                stream=_ReleasingStream(response.stream, release),
+                extensions=response.extensions,
+            )
+
+    def close(self) -> None:
+        pass
+
+
+class _AsyncRoutingTransport(httpx.AsyncBaseTransport):
+    def __init__(self, router: _Router, transport: httpx.AsyncHTTPTransport) -> None:
+        self._router = router
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        model = _model_of(request)
+        path = request.url.raw_path
+        tried: set[str] = set()
+        while True:
+            node = self._router.acquire(model, tried)
+            if node is None:
+                raise NoHealthyHostError(f"All hosts failed: {', '.join(sorted(tried))}", request=request)
+            tried.add(node.name)
+            _route(request, node, path)
+            try:
+                response = await self._transport.handle_async_request(request)
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                self._router.release(node, model, ok=False)
+                logger.warning("Could not connect to %s, trying another host", node.name)
+                continue
+            except httpx.TransportError:
+                self._router.release(node, model, ok=False)
+                raise
+            if response.status_code in _FAILOVER_STATUSES:
+                await response.aclose()
+                self._router.release(node, model, ok=False)
+                continue
+            release = _releaser(self._router, node, model, ok=response.status_code < 500)
+            return httpx.Response(
+                response.status_code,
+                headers=response.headers,
+                stream=_AsyncReleasingStream(response.stream, release),
+                extensions=response.extensions,
+            )
+
+    async def aclose(self) -> None:
+        pass
+
+
+class HostPool(ConnectionPool):
+    """
+    A connection pool spreading the requests of its clients over several Ollama hosts
+
+    Every attempt is routed on its own, so retries may go to another host. A host
+    that refuses connections or answers 502/503/504 is skipped for the request, and
+    after `max_failures` consecutive failures it is ejected for `ejection_time`
+    seconds. When the content of an attempt fails validation, the next attempt
+    prefers another host. The `host` argument of clients using the pool is ignored.
+
+    Args:
+        hosts: URLs of the Ollama servers, e.g. "http://gpu-1:11434" or "gpu-1"
+        routing: "least_outstanding" sends a request to the host with the fewest
+            requests in flight. "model_affinity" prefers hosts that have the
+            requested model loaded, avoiding cold loads, and picks the least busy
+            of them
+        config: Pool limits, keep-alive, timeouts and HTTP/2, shared by all hosts
+        max_failures: Consecutive failures after which a host is ejected
+        ejection_time: Seconds a host stays ejected
+        health_check_interval: Seconds between background health checks, None to
+            only check when `check_health` is called
+    """
+    def __init__(
+        self,
+        hosts: Sequence[str],
+        routing: Routing = "least_outstanding",
+        *,
+        config: ConnectionConfig | None = None,
+        max_failures: int = 3,
+        ejection_time: float = 30.0,
+        health_check_interval: float | None = None,
+    ) -> None:
+        super().__init__(config)
+        self._router = _Router(hosts, routing, max_failures, ejection_time)
+        self._stop = threading.Event()
+        self._health_thread: threading.Thread | None = None
+        if health_check_interval is not None:
+            self._health_thread = threading.Thread(
+                target=self._health_loop, args=(health_check_interval,), name="ollama-instructor-health", daemon=True
+            )
+            self._health_thread.start()
+
+    @property
+    def transport(self) -> httpx.BaseTransport:
+        return _RoutingTransport(self._router, self._http_transport())
+
+    @property
+    def async_transport(self) -> httpx.AsyncBaseTransport:
+        return _AsyncRoutingTransport(self._router, self._async_http_transport())
+
+    def status(self) -> list[HostStatus]:
+        return self._router.status()
+
+    def check_health(self, timeout: float = 2.0) -> list[HostStatus]:
+        """
+        Ask every host for its loaded models (`/api/ps`)
+
+        Hosts that do not answer are ejected, hosts that answer are readmitted and
+        their loaded models are used for model affinity.
+        """
+        with httpx.Client(transport=SharedTransport(self._http_transport()), timeout=timeout) as client:
+            for node in self._router.nodes:
+                try:
+                    response = client.get(node.endpoint(b"/api/ps"))
+                    response.raise_for_status()
+                    models = _loaded_models(response)
+                except (httpx.HTTPError, ValueError) as e:
+                    logger.warning("Health check of %s failed: %r", node.name, e)
+                    models = None
+                self._router.set_health(node, models)
+        return self.status()
+
+    async def acheck_health(self, timeout: float = 2.0) -> list[HostStatus]:
+        """Like `check_health`, using the async transport"""
+        transport = AsyncSharedTransport(self._async_http_transport())
+        async with httpx.AsyncClient(transport=transport, timeout=timeout) as client:
+            for node in self._router.nodes:
+                try:
+                    response = await client.get(node.endpoint(b"/api/ps"))
+                    response.raise_for_status()
+                    models = _loaded_models(response)
+                except (httpx.HTTPError, ValueError) as e:
+                    logger.warning("Health check of %s failed: %r", node.name, e)
+                    models = None
+                self._router.set_health(node, models)
+        return self.status()
+
+    def _health_loop(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.check_health()
+            except Exception:
+                # Keep checking; a dead thread would leave ejected hosts out for good
+                logger.exception("Health check failed")
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._health_thread is not None and self._health_thread is not threading.current_thread():
+            self._health_thread.join()
+        super().close()
+
+
+def _loaded_models(response: httpx.Response) -> set[str]:
+    try:
+        return {model["name"] for model in response.json().get("models", [])}
+    except (AttributeError, KeyError, TypeError):
+        raise ValueError(f"unexpected answer of /api/ps: {response.text[:200]!r}") from None
@@ -1,5 +1,93 @@
+import itertools
+import json
 import logging
-from typing import Literal
+import os
+import random
+import zlib
+from typing import Any, Literal, MutableMapping
+
+CONTEXT_FIELDS = ("request_id", "model", "attempt")
+
+_process_token = os.urandom(3).hex()
+_request_ids = itertools.count(1)
+
+
+def new_request_id() -> str:
+    """Short id of a request, unique within the process, e.g. `3fa2c1-42`"""
+    return f"{_process_token}-{next(_request_ids)}"
+
+
+class RequestLogger(logging.LoggerAdapter):
+    """
+    Logger adapter attaching `request_id`, `model` and `attempt` to every record
+
+    The level is checked before anything is formatted, so calls for disabled levels
+    only cost that check. Pass arguments %-style instead of pre-formatting messages.
+
+    Args:
+        logger: The logger to log to
+        request_id: Id of the request, see `new_request_id`
+        model: Name of the model the request is sent to
+        attempt: Number of the current attempt, None outside of attempts
+    """
+    def __init__(self, logger: logging.Logger, request_id: str, model: str, attempt: int | None = None) -> None:
+        context: dict[str, Any] = {"request_id": request_id, "model": model}
+        if attempt is not None:
+            context["attempt"] = attempt
+        super().__init__(logger, context)
+
+    def for_attempt(self, attempt: int) -> "RequestLogger":
+        return RequestLogger(self.logger, self.extra["request_id"], self.extra["model"], attempt)
+
+    def process(self, msg: Any, kwargs: MutableMapping[str, Any]) -> tuple[Any, MutableMapping[str, Any]]:
+        extra = kwargs.get("extra")
+        kwargs["extra"] = self.extra if extra is None else {**self.extra, **extra}
+        return msg, kwargs
+
+
+class InfoSampler(logging.Filter):
+    """
+    Let only a fraction of the INFO records through, for use under heavy load
+
+    Records of other levels always pass. Records carrying a `request_id` are sampled
+    per request, so either all or none of the INFO records of a request are kept.
+
+    Args:
+        rate: Fraction of INFO records to keep, between 0 and 1
+    """
+    def __init__(self, rate: float) -> None:
+        super().__init__()
+        if not 0 <= rate <= 1:
+            raise ValueError("rate must be between 0 and 1")
+        self.rate = rate
+        self._threshold = int(rate * 0xFFFFFFFF)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno != logging.INFO or self.rate >= 1:
+            return True
+        request_id = getattr(record, "request_id", None)
+        if request_id is None:
+            return random.random() < self.rate
+        return zlib.crc32(request_id.encode()) <= self._threshold
+
+
+class JSONFormatter(logging.Formatter):
+    """Format records as one JSON object per line, including the request context"""
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                data[field] = value
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str)
+
 
 class LoggingMixin:
     """Mixin class to handle logging configuration"""
@@ -7,13 +95,21 @@ class LoggingMixin:
     def setup_logging(
         level: Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"] | int = "INFO",
         format: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        structured: bool = False,
+        info_sample_rate: float = 1.0,
     ) -> None:
         """
         Configure logging for the ollama-instructor library.
 
+        Records of requests carry `request_id`, `model` and `attempt`, which can be
+        used in `format` (e.g. `[%(request_id)s #%(attempt)s]`); records without
+        them show "-".
+
         Args:
             level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL or logging constants)
             format: Logging format string
+            structured: Log one JSON object per record instead of using `format`
+            info_sample_rate: Fraction of requests whose INFO records are logged
         """
         logger = logging.getLogger("ollama_instructor")
 
@@ -24,7 +120,12 @@ class LoggingMixin:
         # Create handler if none exists
         if not logger.handlers:
             handler = logging.StreamHandler()
-            handler.setFormatter(logging.Formatter(format))
+            if structured:
+                handler.setFormatter(JSONFormatter())
+            else:
+                handler.setFormatter(logging.Formatter(format, defaults=dict.fromkeys(CONTEXT_FIELDS, "-")))
+            if info_sample_rate < 1:
+                handler.addFilter(InfoSampler(info_sample_rate))
             logger.addHandler(handler)
 
         logger.setLevel(level)
@@ -0,0 +1,372 @@
+import math
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from typing import Any, ContextManager, Iterator
+
+from ollama import ChatResponse
+from pydantic import ValidationError
+
+
+@dataclass(frozen=True, slots=True)
+class AttemptEvent:
+    """
+    Measurements of a single attempt of a request
+
+    Attributes:
+        kind: "completion", "stream" or "stream_partial"
+        model: Name of the requested model
+        attempt: Number of the attempt, starting at 1. 0 for responses served from the cache
+        outcome: "success", "repaired", "validation_error", "error", "cancelled" or "cache_hit"
+        duration: Seconds from sending the request to the end of the attempt
+        validation_duration: Seconds spent validating the content
+        time_to_first_chunk: Seconds until the first chunk of a stream arrived
+        failure: Short reason of a failed attempt, e.g. "int_parsing at friends.0.age"
+        prompt_eval_count: Number of prompt tokens as reported by Ollama
+        prompt_eval_duration: Prompt evaluation time in nanoseconds as reported by Ollama
+        eval_count: Number of generated tokens as reported by Ollama
+        eval_duration: Generation time in nanoseconds as reported by Ollama
+    """
+    kind: str
+    model: str
+    attempt: int
+    outcome: str
+    duration: float
+    validation_duration: float | None = None
+    time_to_first_chunk: float | None = None
+    failure: str | None = None
+    prompt_eval_count: int | None = None
+    prompt_eval_duration: int | None = None
+    eval_count: int | None = None
+    eval_duration: int | None = None
+
+    @property
+    def tokens_per_second(self) -> float | None:
+        if not self.eval_count or not self.eval_duration:
+            return None
+        return self.eval_count / (self.eval_duration / 1e9)
+
+
+class Instrumentation:
+    """
+    Hook interface receiving an AttemptEvent for every attempt of every request
+
+    Subclass and override `on_attempt`. The hook is called synchronously on the
+    request path, so it should be fast and must not raise.
+    """
+    def on_attempt(self, event: AttemptEvent) -> None:
+        pass
+
+
+class CompositeInstrumentation(Instrumentation):
+    """Forward every event to several instrumentations"""
+    def __init__(self, *instrumentations: Instrumentation) -> None:
+        self.instrumentations = instrumentations
+
+    def on_attempt(self, event: AttemptEvent) -> None:
+        for instrumentation in self.instrumentations:
+            instrumentation.on_attempt(event)
+
+
+def describe_failure(error: BaseException) -> str:
+    if isinstance(error, ValidationError):
+        errors = error.errors(include_url=False, include_context=False, include_input=False)
+        if errors:
+            location = ".".join(str(part) for part in errors[0]["loc"])
+            return f"{errors[0]['type']} at {location}" if location else errors[0]["type"]
+    return type(error).__name__
+
+
+class AttemptRecorder:
+    """Collects the measurements of one attempt and emits them when the attempt ends"""
+    __slots__ = (
+        "_instrumentation", "_kind", "_model", "_attempt", "_start", "_first_chunk",
+        "_validation", "_response", "_outcome",
+    )
+
+    def __init__(self, instrumentation: Instrumentation, kind: str, model: str, attempt: int) -> None:
+        self._instrumentation = instrumentation
+        self._kind = kind
+        self._model = model
+        self._attempt = attempt
+        self._start = time.perf_counter()
+        self._first_chunk: float | None = None
+        self._validation: float | None = None
+        self._response: ChatResponse | None = None
+        self._outcome = "success"
+
+    def __enter__(self) -> "AttemptRecorder":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        failure = None
+        outcome = self._outcome
+        if exc is not None:
+            if isinstance(exc, ValidationError):
+                outcome = "validation_error"
+            elif isinstance(exc, (GeneratorExit, KeyboardInterrupt)) or exc_type.__name__ == "CancelledError":
+                outcome = "cancelled"
+            else:
+                outcome = "error"
+            failure = describe_failure(exc)
+        response = self._response
+        self._instrumentation.on_attempt(AttemptEvent(
+            kind=self._kind,
+            model=self._model,
+            attempt=self._attempt,
+            outcome=outcome,
+            duration=time.perf_counter() - self._start,
+            validation_duration=self._validation,
+            time_to_first_chunk=self._first_chunk,
+            failure=failure,
+            prompt_eval_count=response.prompt_eval_count if response is not None else None,
+            prompt_eval_duration=response.prompt_eval_duration if response is not None else None,
+            eval_count=response.eval_count if response is not None else None,
+            eval_duration=response.eval_duration if response is not None else None,
+        ))
+
+    def chunk(self) -> None:
+        if self._first_chunk is None:
+            self._first_chunk = time.perf_counter() - self._start
+
+    def set_response(self, response: ChatResponse) -> None:
+        self._response = response
+
+    def repaired(self) -> None:
+        self._outcome = "repaired"
+
+    def cache_hit(self) -> None:
+        self._outcome = "cache_hit"
+
+    @contextmanager
+    def validation(self) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._validation = (self._validation or 0.0) + time.perf_counter() - start
+
+
+class NoopRecorder:
+    """Stand-in for AttemptRecorder when instrumentation is disabled"""
+    __slots__ = ()
+
+    def __enter__(self) -> "NoopRecorder":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+    def chunk(self) -> None:
+        pass
+
+    def set_response(self, response: ChatResponse) -> None:
+        pass
+
+    def repaired(self) -> None:
+        pass
+
+    def cache_hit(self) -> None:
+        pass
+
+    def validation(self) -> ContextManager[None]:
+        return _NULL_CONTEXT
+
+
+_NULL_CONTEXT = nullcontext()
+NOOP_RECORDER = NoopRecorder()
+
+
+def record_attempt(
+    instrumentation: Instrumentation | None, kind: str, model: str, attempt: int
+) -> AttemptRecorder | NoopRecorder:
+    """Return a recorder for the attempt, a shared no-op one if instrumentation is disabled"""
+    if instrumentation is None:
+        return NOOP_RECORDER
+    return AttemptRecorder(instrumentation, kind, model, attempt)
+
+
+class Histogram:
+    """
+    Distribution of the most recent samples of a measurement
+
+    Keeps the last `max_samples` values for exact percentiles, plus count and sum
+    over all values ever observed.
+    """
+    def __init__(self, max_samples: int = 10_000) -> None:
+        self._samples: deque[float] = deque(maxlen=max_samples)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self._samples.append(value)
+        self.count += 1
+        self.sum += value
+
+    @property
+    def mean(self) -> float | None:
+        return self.sum / self.count if self.count else None
+
+    def percentile(self, q: float) -> float | None:
+        """Nearest-rank percentile of the retained samples, `q` between 0 and 100"""
+        return _nearest_rank(sorted(self._samples), q)
+
+    def summary(self) -> dict[str, float | int | None]:
+        ordered = sorted(self._samples)
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "p50": _nearest_rank(ordered, 50),
+            "p90": _nearest_rank(ordered, 90),
+            "p99": _nearest_rank(ordered, 99),
+            "max": ordered[-1] if ordered else None,
+        }
+
+
+def _nearest_rank(ordered: list[float], q: float) -> float | None:
+    if not ordered:
+        return None
+    return ordered[max(math.ceil(q / 100 * len(ordered)), 1) - 1]
+
+
+class MetricsAggregator(Instrumentation):
+    """
+    In-process aggregation of attempt events into counters and histograms
+
+    Histograms (seconds unless noted): `duration`, `validation_duration`,
+    `time_to_first_chunk`, `tokens_per_second` and `attempts` (attempts needed per
+    successful request). Counters: events by outcome and failures by reason.
+
+    Args:
+        max_samples: Number of recent samples each histogram keeps for percentiles
+    """
+    HISTOGRAMS = ("duration", "validation_duration", "time_to_first_chunk", "tokens_per_second", "attempts")
+
+    def __init__(self, max_samples: int = 10_000) -> None:
+        self._lock = threading.Lock()
+        self._max_samples = max_samples
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.outcomes: Counter[str] = Counter()
+            self.failures: Counter[str] = Counter()
+            self.histograms = {name: Histogram(self._max_samples) for name in self.HISTOGRAMS}
+
+    def on_attempt(self, event: AttemptEvent) -> None:
+        with self._lock:
+            self.outcomes[event.outcome] += 1
+            if event.failure is not None:
+                self.failures[event.failure] += 1
+            if event.outcome == "cache_hit":
+                return
+            self.histograms["duration"].observe(event.duration)
+            if event.validation_duration is not None:
+                self.histograms["validation_duration"].observe(event.validation_duration)
+            if event.time_to_first_chunk is not None:
+                self.histograms["time_to_first_chunk"].observe(event.time_to_first_chunk)
+            tokens_per_second = event.tokens_per_second
+            if tokens_per_second is not None:
+                self.histograms["tokens_per_second"].observe(tokens_per_second)
+            if event.outcome in ("success", "repaired"):
+                self.histograms["attempts"].observe(event.attempt)
+
+    def snapshot(self) -> dict[str, Any]:
+        """Current counters and histogram summaries as plain dict"""
+        with self._lock:
+            return {
+                "outcomes": dict(self.outcomes),
+                "failures": dict(self.failures),
+                "histograms": {name: histogram.summary() for name, histogram in self.histograms.items()},
+            }
+
+
+class PrometheusInstrumentation(Instrumentation):
+    """
+    Export attempt events as Prometheus metrics
+
+    Requires the `prometheus-client` package (`pip install ollama-instructor[prometheus]`).
+
+    Args:
+        registry: Registry to register the metrics in, the default registry if None
+        namespace: Prefix of the metric names
+    """
+    def __init__(self, registry: Any = None, namespace: str = "ollama_instructor") -> None:
+        try:
+            from prometheus_client import REGISTRY, Counter as PromCounter, Histogram as PromHistogram
+        except ImportError as e:
+            raise ImportError(
+                "PrometheusInstrumentation requires prometheus-client: pip install ollama-instructor[prometheus]"
+            ) from e
+        registry = registry if registry is not None else REGISTRY
+        self._attempts = PromCounter(
+            "attempts", "Attempts by outcome", ["kind", "model", "outcome"],
+            namespace=namespace, registry=registry,
+        )
+        self._duration = PromHistogram(
+            "attempt_duration_seconds", "Duration of an attempt", ["kind", "model"],
+            namespace=namespace, registry=registry,
+        )
+        self._validation = PromHistogram(
+            "validation_duration_seconds", "Time spent validating content", ["kind", "model"],
+            namespace=namespace, registry=registry,
+            buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0),
+        )
+        self._first_chunk = PromHistogram(
+            "time_to_first_chunk_seconds", "Time until the first chunk of a stream", ["model"],
+            namespace=namespace, registry=registry,
+        )
+        self._tokens = PromCounter(
+            "eval_tokens", "Generated tokens", ["model"], namespace=namespace, registry=registry,
+        )
+
+    def on_attempt(self, event: AttemptEvent) -> None:
+        self._attempts.labels(event.kind, event.model, event.outcome).inc()
+        if event.outcome == "cache_hit":
+            return
+        self._duration.labels(event.kind, event.model).observe(event.duration)
+        if event.validation_duration is not None:
+            self._validation.labels(event.kind, event.model).observe(event.validation_duration)
+        if event.time_to_first_chunk is not None:
+            self._first_chunk.labels(event.model).observe(event.time_to_first_chunk)
+        if event.eval_count:
+            self._tokens.labels(event.model).inc(event.eval_count)
+
+
+class OpenTelemetryInstrumentation(Instrumentation):
+    """
+    Export attempt events as OpenTelemetry metrics
+
+    Requires the `opentelemetry-api` package (`pip install ollama-instructor[opentelemetry]`).
+
+    Args:
+        meter: Meter to create the instruments with, `metrics.get_meter("ollama_instructor")` if None
+    """
+    def __init__(self, meter: Any = None) -> None:
+        try:
+            from opentelemetry import metrics
+        except ImportError as e:
+            raise ImportError(
+                "OpenTelemetryInstrumentation requires opentelemetry-api: pip install ollama-instructor[opentelemetry]"
+            ) from e
+        meter = meter if meter is not None else metrics.get_meter("ollama_instructor")
+        self._attempts = meter.create_counter("ollama_instructor.attempts", description="Attempts by outcome")
+        self._duration = meter.create_histogram("ollama_instructor.attempt.duration", unit="s")
+        self._validation = meter.create_histogram("ollama_instructor.validation.duration", unit="s")
+        self._first_chunk = meter.create_histogram("ollama_instructor.time_to_first_chunk", unit="s")
+        self._tokens = meter.create_counter("ollama_instructor.eval_tokens", unit="{token}")
+
+    def on_attempt(self, event: AttemptEvent) -> None:
+        attributes = {"kind": event.kind, "model": event.model}
+        self._attempts.add(1, {**attributes, "outcome": event.outcome})
+        if event.outcome == "cache_hit":
+            return
+        self._duration.record(event.duration, attributes)
+        if event.validation_duration is not None:
+            self._validation.record(event.validation_duration, attributes)
+        if event.time_to_first_chunk is not None:
+            self._first_chunk.record(event.time_to_first_chunk, attributes)
+        if event.eval_count:
+            self._tokens.add(event.eval_count, attributes)
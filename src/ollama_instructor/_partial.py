@@ -0,0 +1,399 @@
+import json
+import re
+import types
+import weakref
+from typing import Annotated, Any, Literal, Optional, Type, Union, get_args, get_origin
+
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, create_model
+
+_WHITESPACE = frozenset(" \t\n\r")
+_NUMBER_CHARS = frozenset("0123456789+-.eE")
+_NUMBER = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?")
+_STRING_SPECIAL = re.compile(r'["\\]')
+_LITERALS = {"true": True, "false": False, "null": None}
+
+# Errors that only say the document is not finished yet
+_INCOMPLETE_ERROR_TYPES = frozenset({"missing", "too_short"})
+
+# Values completed at this nesting depth or above are milestones: a field of the
+# document, or a field or item of one of its values
+_MILESTONE_DEPTH = 2
+
+
+class PartialJSONError(ValueError):
+    """Raised when a JSON prefix can no longer become a valid JSON document"""
+    def __init__(self, message: str, position: int) -> None:
+        super().__init__(f"{message} at position {position}")
+        self.position = position
+
+
+class PartialJSONParser:
+    """
+    Incremental JSON parser for streamed content
+
+    Text is fed chunk by chunk. The parser keeps its state between chunks and
+    builds the document while it arrives: containers appear as soon as they are
+    opened, scalars once they are complete. Incomplete strings, numbers and
+    literals are left out of `value` until they are finished.
+
+    A `PartialJSONError` is raised as soon as the text seen so far cannot be the
+    prefix of a valid JSON document.
+
+    `changed` is set whenever a value was added. `milestones` collects the path of
+    every value completed at the top two levels: `(key,)` for a field of the
+    document, `(key, index_or_key)` for an item or field of one of its values and
+    `()` for the complete document. The caller resets both.
+    """
+    def __init__(self) -> None:
+        # Frames of open containers: [container, pending key, state]
+        self._stack: list[list[Any]] = []
+        self._root_state = "value"
+        self._value: Any = None
+        self._token: str | None = None
+        self._parts: list[str] = []
+        self._escape = False
+        self._offset = 0
+        self.changed = False
+        self.milestones: list[tuple[Any, ...]] = []
+
+    @property
+    def value(self) -> Any:
+        """The document parsed so far; None before the first value started"""
+        return self._value
+
+    @property
+    def complete(self) -> bool:
+        return self._root_state == "done"
+
+    def feed(self, text: str) -> None:
+        i, n = 0, len(text)
+        while i < n:
+            if self._token is not None:
+                i = self._continue_token(text, i)
+                continue
+            char = text[i]
+            if char in _WHITESPACE:
+                i += 1
+                continue
+            self._structural(char, self._offset + i)
+            i += 1
+        self._offset += n
+
+    def close(self) -> Any:
+        """Signal the end of the input and return the complete document"""
+        if self._token == "number" and not self._stack:
+            self._finish_number(self._offset)
+        if not self.complete:
+            raise PartialJSONError("Unexpected end of JSON input", self._offset)
+        return self._value
+
+    def _structural(self, char: str, position: int) -> None:
+        frame = self._stack[-1] if self._stack else None
+        state = frame[2] if frame is not None else self._root_state
+
+        if state in ("value", "value_or_end"):
+            if char == "]" and state == "value_or_end":
+                self._close_container()
+            elif char == "{":
+                self._open({}, "key_or_end")
+            elif char == "[":
+                self._open([], "value_or_end")
+            elif char == '"':
+                self._start_token("string")
+            elif char == "-" or char.isdigit():
+                self._start_token("number")
+                self._parts.append(char)
+            elif char in "tfn":
+                self._start_token("literal")
+                self._parts.append(char)
+            else:
+                raise PartialJSONError(f"Expected value, found {char!r}", position)
+        elif state in ("key_or_end", "key"):
+            if char == '"':
+                self._start_token("key")
+            elif char == "}" and state == "key_or_end":
+                self._close_container()
+            else:
+                raise PartialJSONError(f"Expected object key, found {char!r}", position)
+        elif state == "colon":
+            if char != ":":
+                raise PartialJSONError(f"Expected ':', found {char!r}", position)
+            frame[2] = "value"
+        elif state == "comma_or_end":
+            is_object = isinstance(frame[0], dict)
+            if char == ",":
+                frame[2] = "key" if is_object else "value"
+            elif char == ("}" if is_object else "]"):
+                self._close_container()
+            else:
+                raise PartialJSONError(f"Expected ',' or closing bracket, found {char!r}", position)
+        else:
+            raise PartialJSONError(f"Trailing characters after JSON document: {char!r}", position)
+
+    def _start_token(self, kind: str) -> None:
+        self._token = kind
+        self._parts = []
+        self._escape = False
+
+    def _continue_token(self, text: str, i: int) -> int:
+        if self._token in ("string", "key"):
+            return self._continue_string(text, i)
+        if self._token == "number":
+            start = i
+            while i < len(text) and text[i] in _NUMBER_CHARS:
+                i += 1
+            self._parts.append(text[start:i])
+            if i < len(text):
+                self._finish_number(self._offset + i)
+            return i
+        # literal
+        start = i
+        while i < len(text) and text[i].isalpha():
+            i += 1
+        self._parts.append(text[start:i])
+        word = "".join(self._parts)
+        if word in _LITERALS:
+            self._token = None
+            self._add_value(_LITERALS[word])
+            return i
+        if i < len(text) or not any(literal.startswith(word) for literal in _LITERALS):
+            raise PartialJSONError(f"Invalid literal {word!r}", self._offset + start)
+        return i
+
+    def _continue_string(self, text: str, i: int) -> int:
+        n = len(text)
+        start = i
+        if self._escape:
+            self._escape = False
+            i += 1
+        while True:
+            match = _STRING_SPECIAL.search(text, i)
+            if match is None:
+                self._parts.append(text[start:])
+                return n
+            index = match.start()
+            if text[index] == "\\":
+                if index + 1 < n:
+                    i = index + 2
+                    continue
+                self._escape = True
+                self._parts.append(text[start:])
+                return n
+            self._parts.append(text[start:index])
+            raw = "".join(self._parts)
+            try:
+                string = json.loads(f'"{raw}"')
+            except ValueError as e:
+                raise PartialJSONError(f"Invalid string: {e.msg}", self._offset + index) from None
+            kind, self._token = self._token, None
+            if kind == "key":
+                frame = self._stack[-1]
+                frame[1] = string
+                frame[2] = "colon"
+            else:
+                self._add_value(string)
+            return index + 1
+
+    def _finish_number(self, position: int) -> None:
+        raw = "".join(self._parts)
+        self._token = None
+        if _NUMBER.fullmatch(raw) is None:
+            raise PartialJSONError(f"Invalid number {raw!r}", position)
+        self._add_value(json.loads(raw))
+
+    def _open(self, container: dict | list, state: str) -> None:
+        self._add_value(container)
+        self._stack.append([container, None, state])
+
+    def _close_container(self) -> None:
+        self._stack.pop()
+        self._milestone()
+        if self._stack:
+            self._stack[-1][2] = "comma_or_end"
+        else:
+            self._root_state = "done"
+
+    def _add_value(self, value: Any) -> None:
+        self.changed = True
+        if not self._stack:
+            self._value = value
+            if not isinstance(value, (dict, list)):
+                self._root_state = "done"
+            return
+        frame = self._stack[-1]
+        container = frame[0]
+        if isinstance(container, dict):
+            container[frame[1]] = value
+        else:
+            container.append(value)
+        frame[2] = "comma_or_end"
+        if not isinstance(value, (dict, list)):
+            self._milestone()
+
+    def _milestone(self) -> None:
+        """Record the path of the value just completed, if it is near the top"""
+        depth = len(self._stack)
+        if depth > _MILESTONE_DEPTH:
+            return
+        path = []
+        for container, key, _ in self._stack:
+            path.append(key if isinstance(container, dict) else len(container) - 1)
+        self.milestones.append(tuple(path))
+
+
+_partial_models: "weakref.WeakKeyDictionary[type, Type[BaseModel]]" = weakref.WeakKeyDictionary()
+
+_UNION_TYPES = (Union, types.UnionType)
+
+
+def partial_model(model: Type[BaseModel]) -> Type[BaseModel]:
+    """
+    Return a variant of `model` in which every field is optional
+
+    Nested models are replaced by their partial variants as well. Field
+    constraints and validators are dropped, aliases and the `extra` setting are
+    kept, so unknown keys are still rejected for models that forbid them.
+    """
+    return _partial_model(model, set())
+
+
+def _partial_model(model: Type[BaseModel], building: set[type]) -> Type[BaseModel]:
+    cached = _partial_models.get(model)
+    if cached is not None:
+        return cached
+    building.add(model)
+    fields: dict[str, Any] = {}
+    for name, field in model.model_fields.items():
+        annotation = _partial_annotation(field.annotation, building)
+        fields[name] = (
+            Optional[annotation],
+            Field(default=None, alias=field.alias, validation_alias=field.validation_alias),
+        )
+    building.discard(model)
+    config = ConfigDict(
+        extra=model.model_config.get("extra") or "ignore",
+        populate_by_name=model.model_config.get("populate_by_name", False),
+    )
+    partial = create_model(f"Partial{model.__name__}", __config__=config, **fields)
+    _partial_models[model] = partial
+    return partial
+
+
+def _partial_annotation(annotation: Any, building: set[type]) -> Any:
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        # Recursive models are not descended into a second time
+        return Any if annotation in building else _partial_model(annotation, building)
+    origin = get_origin(annotation)
+    args = get_args(annotation)
+    if origin is None or not args or origin is Literal:
+        return annotation
+    if origin is Annotated:
+        return _partial_annotation(args[0], building)
+    partial_args = tuple(
+        arg if arg is Ellipsis else _partial_annotation(arg, building) for arg in args
+    )
+    if origin in _UNION_TYPES:
+        return Union[partial_args]
+    try:
+        return origin[partial_args if len(partial_args) > 1 else partial_args[0]]
+    except TypeError:
+        return annotation
+
+
+class PartialValidator:
+    """
+    Validates a streamed response incrementally against the partial variant of a format
+
+    Validating the whole document after every value would take quadratic time
+    for long lists. Instead every milestone reported by the parser is validated
+    on its own, as the only field of the partial model: a completed field of the
+    document, or a completed item or field of one of its values. The partial
+    model is assembled from the validated fields. An invalid value deeper inside
+    an item is found once its item is complete.
+
+    Args:
+        compiled: The compiled format of the requested model
+    """
+    def __init__(self, compiled) -> None:
+        self.compiled = compiled
+        self.parser = PartialJSONParser()
+        self.partial: BaseModel | None = None
+        # Validated values by field name, and the validated items of list fields by key
+        self._values: dict[str, Any] = {}
+        self._items: dict[str, list[Any]] = {}
+        self._whole: set[str] = set()
+
+    def feed(self, text: str) -> BaseModel | None:
+        """
+        Feed the next chunk of content and return the latest partial model
+
+        Raises:
+            ValidationError: If the content seen so far can no longer become valid
+        """
+        try:
+            self.parser.feed(text)
+        except PartialJSONError as e:
+            raise self.compiled.json_error(str(e)) from None
+        if self.parser.milestones:
+            milestones, self.parser.milestones = self.parser.milestones, []
+            for path in milestones:
+                self._apply(path)
+        return self.partial
+
+    def _apply(self, path: tuple[Any, ...]) -> None:
+        document = self.parser.value
+        if not path or not isinstance(document, dict):
+            # The document is complete or not an object: validate all of it once
+            self._validate(document)
+            return
+        key = path[0]
+        value = document[key]
+        if len(path) == 2 and isinstance(value, list) and key not in self._whole:
+            try:
+                field = self._validate_field(key, [value[path[1]]])
+            except ValidationError:
+                # Items may depend on their position, as in tuples: validate the
+                # list as a whole from now on, which raises if it is invalid
+                self._whole.add(key)
+                self._items.pop(key, None)
+                field = self._validate_field(key, value)
+                if field is not None:
+                    self._values[field[0]] = field[1]
+            else:
+                if field is None:
+                    return
+                name, items = field
+                validated = self._items.setdefault(key, [])
+                validated.extend(items)
+                # A copy, so partials yielded earlier do not change
+                self._values[name] = list(validated)
+        else:
+            if len(path) == 1 and isinstance(value, list) and len(self._items.get(key, ())) == len(value):
+                # Every item is validated already
+                return
+            field = self._validate_field(key, value)
+            if field is None:
+                return
+            name, validated = field
+            self._values[name] = validated
+        self.partial = self.compiled.partial_model.model_construct(**self._values)
+
+    def _validate_field(self, key: str, value: Any) -> tuple[str, Any] | None:
+        """Validate `value` as the field `key` of the partial model and return its name and validated value"""
+        partial = self._validate({key: value})
+        if partial is None or not partial.model_fields_set:
+            # Unknown keys are ignored unless the model forbids them
+            return None
+        name = next(iter(partial.model_fields_set))
+        return name, getattr(partial, name)
+
+    def _validate(self, document: Any) -> BaseModel | None:
+        try:
+            partial = self.compiled.partial_model.model_validate(document, strict=False)
+        except ValidationError as e:
+            if any(error["type"] not in _INCOMPLETE_ERROR_TYPES for error in e.errors()):
+                raise
+            return None
+        if document is self.parser.value:
+            self.partial = partial
+        return partial
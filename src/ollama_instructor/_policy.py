@@ -0,0 +1,184 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+
+import httpx
+import stamina
+from ollama import ResponseError
+from pydantic import ValidationError
+
+logger = logging.getLogger("ollama_instructor.retry")
+
+# Statuses of an overloaded or restarting server, worth retrying after a pause
+_TRANSIENT_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def is_transient(error: BaseException) -> bool:
+    """Whether `error` is a transport error or an overload answer that may pass on its own"""
+    if isinstance(error, ResponseError):
+        return error.status_code in _TRANSIENT_STATUSES
+    return isinstance(error, (httpx.TransportError, ConnectionError))
+
+
+class RetryBudget:
+    """
+    Token bucket limiting retries to a fraction of the requests
+
+    Every call adds `ratio` tokens, up to `capacity`; every retry takes one. When
+    the bucket is empty, failed attempts are not retried, so a degraded model
+    or server gets at most `1 + ratio` times the load of its callers instead of
+    `retries` times. Share one budget between all clients of a process, e.g.
+    the module-level `retry_budget`.
+
+    Args:
+        ratio: Retries allowed per call in the long run
+        capacity: Maximum number of tokens, allowing bursts of retries. The bucket
+            starts full
+    """
+    def __init__(self, ratio: float = 0.1, capacity: float = 10.0) -> None:
+        if ratio < 0 or capacity < 1:
+            raise ValueError("ratio must not be negative and capacity must be at least 1")
+        self.ratio = ratio
+        self.capacity = capacity
+        self._tokens = capacity
+        self._lock = threading.Lock()
+        self.denied = 0
+
+    @property
+    def tokens(self) -> float:
+        return self._tokens
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            self.denied += 1
+            return False
+
+
+retry_budget = RetryBudget()
+
+
+@dataclass(frozen=True, slots=True)
+class RetryPolicy:
+    """
+    When and how fast failed attempts are retried
+
+    The number of attempts stays a per call argument (`retries`). The policy
+    decides how long to wait in between, which errors are retried and whether a
+    retry is allowed at all.
+
+    Args:
+        deadline: Seconds after which no new attempt of a call is started, counted
+            from the start of the call. `stamina_timeout` of a call overrides it
+        validation_backoff: Seconds to wait before retrying content that failed
+            validation. The model will not produce better output by waiting, so
+            the default is to retry right away
+        retry_transport_errors: Also retry connection errors, timeouts and 429/5xx
+            answers of completions, with exponential backoff and jitter. Streams
+            only retry validation failures
+        wait_initial: First backoff after a transport error, in seconds
+        wait_max: Maximum backoff after a transport error, in seconds
+        wait_jitter: Maximum random seconds added to a backoff
+        budget: Optional RetryBudget every retry needs a token of
+    """
+    deadline: float | timedelta | None = None
+    validation_backoff: float = 0.0
+    retry_transport_errors: bool = False
+    wait_initial: float = 0.1
+    wait_max: float = 5.0
+    wait_jitter: float = 1.0
+    budget: RetryBudget | None = None
+
+    def timeout(self, stamina_timeout: float | timedelta | None) -> float | timedelta | None:
+        """The deadline of a call given its `stamina_timeout`"""
+        return stamina_timeout if stamina_timeout is not None else self.deadline
+
+    def retrying(self, attempts: int, stamina_timeout: float | timedelta | None, transport: bool = True) -> "_CallRetries":
+        """
+        Retries of one call: iterate it and run every attempt in `with attempt:`
+        (`async for` in coroutines)
+        """
+        timeout = self.timeout(stamina_timeout)
+        if self.budget is not None:
+            self.budget.deposit()
+        return _CallRetries(self, attempts, timeout, transport and self.retry_transport_errors)
+
+
+class _CallRetries:
+    """
+    Stamina retry context of one call, deciding per failed attempt through its
+    backoff hook whether and after which wait the call is retried
+    """
+    __slots__ = ("policy", "attempts", "deadline", "transport", "failures", "_context", "_decided")
+
+    def __init__(self, policy: RetryPolicy, attempts: int, timeout: float | timedelta | None, transport: bool) -> None:
+        self.policy = policy
+        self.attempts = attempts
+        if isinstance(timeout, timedelta):
+            timeout = timeout.total_seconds()
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        self.transport = transport
+        self.failures = 0
+        self._decided: tuple[Exception, bool | float] | None = None
+        self._context = stamina.retry_context(
+            on=self.backoff,
+            attempts=attempts,
+            timeout=timeout,
+            wait_initial=policy.wait_initial,
+            wait_max=policy.wait_max,
+            wait_jitter=policy.wait_jitter,
+        )
+
+    def __iter__(self):
+        return iter(self._context)
+
+    def __aiter__(self):
+        return self._context.__aiter__()
+
+    def will_retry(self, error: Exception) -> bool:
+        """
+        Decide now whether `error`, about to be raised from the current attempt, is
+        retried. The decision, including a budget token taken for it, is kept for
+        the backoff hook, so it is made once per failed attempt.
+        """
+        if not stamina.is_active():
+            return False
+        self._decided = (error, self._decide(error))
+        return self._decided[1] is not False
+
+    def backoff(self, error: Exception) -> bool | float:
+        if self._decided is not None and self._decided[0] is error:
+            decided, self._decided = self._decided[1], None
+            return decided
+        self._decided = None
+        return self._decide(error)
+
+    def _decide(self, error: Exception) -> bool | float:
+        self.failures += 1
+        if self.failures >= self.attempts:
+            # Stamina stops here anyway, do not spend a token
+            return False
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return False
+        if isinstance(error, ValidationError):
+            wait: bool | float = self.policy.validation_backoff
+            if self.deadline is not None and time.monotonic() + wait >= self.deadline:
+                # The next attempt could not start before the deadline
+                return False
+        elif self.transport and is_transient(error):
+            wait = True
+        else:
+            return False
+        budget = self.policy.budget
+        if budget is not None and not budget.withdraw():
+            logger.warning("Retry budget exhausted, not retrying %s", type(error).__name__)
+            return False
+        return wait
@@ -0,0 +1,183 @@
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Generic, NamedTuple
+
+from pydantic import ValidationError
+
+from ._format import CompiledFormat
+from ._types import T
+
+logger = logging.getLogger("ollama_instructor.repair")
+
+
+class RepairStats(NamedTuple):
+    """
+    Counters of a JSONRepairer
+
+    Attributes:
+        attempted: Number of invalid contents the repairer was given
+        repaired: Number of contents it repaired, each one a retry saved
+    """
+    attempted: int
+    repaired: int
+
+    @property
+    def retries_saved(self) -> int:
+        return self.repaired
+
+
+@dataclass(frozen=True, slots=True)
+class Repair(Generic[T]):
+    """
+    A successfully repaired content
+
+    Attributes:
+        parsed: The validated instance of the format model
+        content: The repaired content as JSON
+        steps: Names of the repair steps that were applied
+    """
+    parsed: T
+    content: str
+    steps: tuple[str, ...]
+
+
+def extract_json_object(text: str) -> str | None:
+    """Return the first balanced JSON object in `text`, ignoring text around it"""
+    start = text.find("{")
+    while start != -1:
+        depth = 0
+        in_string = False
+        escape = False
+        for index in range(start, len(text)):
+            char = text[index]
+            if in_string:
+                if escape:
+                    escape = False
+                elif char == "\\":
+                    escape = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char == "{":
+                depth += 1
+            elif char == "}":
+                depth -= 1
+                if depth == 0:
+                    candidate = text[start:index + 1]
+                    try:
+                        json.loads(candidate)
+                    except ValueError:
+                        break
+                    return candidate
+        start = text.find("{", start + 1)
+    return None
+
+
+def _set_path(data: Any, path: tuple[int | str, ...], value: Any) -> bool:
+    for part in path[:-1]:
+        try:
+            data = data[part]
+        except (KeyError, IndexError, TypeError):
+            return False
+    if not isinstance(data, dict) or not path:
+        return False
+    data[path[-1]] = value
+    return True
+
+
+class JSONRepairer:
+    """
+    Local repair of near-valid content before a retry is spent on it
+
+    The steps are tried in order, each one on the result of the previous:
+
+    - `extract`: use the first balanced JSON object when there is text around it
+    - `lax`: validate in lax mode, coercing e.g. "22" to 22 even for strict models
+    - `fill_missing`: set missing fields to None where the model accepts None
+
+    Args:
+        extract: Enable the `extract` step
+        lax: Enable the `lax` step
+        fill_missing: Enable the `fill_missing` step
+        max_fills: Maximum number of fields `fill_missing` sets
+    """
+    def __init__(self, extract: bool = True, lax: bool = True, fill_missing: bool = True, max_fills: int = 10) -> None:
+        self.extract = extract
+        self.lax = lax
+        self.fill_missing = fill_missing
+        self.max_fills = max_fills
+        self._lock = threading.Lock()
+        self._attempted = 0
+        self._repaired = 0
+
+    def stats(self) -> RepairStats:
+        with self._lock:
+            return RepairStats(self._attempted, self._repaired)
+
+    def repair(self, compiled: CompiledFormat[T], content: str | None, error: ValidationError) -> Repair[T] | None:
+        """Try to repair `content` which failed validation with `error`"""
+        if content is None:
+            return None
+        with self._lock:
+            self._attempted += 1
+        repair = self._repair(compiled, content, error)
+        if repair is not None:
+            with self._lock:
+                self._repaired += 1
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Repaired invalid content with steps: %s", ", ".join(repair.steps))
+        return repair
+
+    def _repair(self, compiled: CompiledFormat[T], content: str, error: ValidationError) -> Repair[T] | None:
+        steps: list[str] = []
+        strict: bool | None = None
+
+        if self.extract:
+            extracted = extract_json_object(content)
+            if extracted is not None and extracted != content.strip():
+                content = extracted
+                steps.append("extract")
+                try:
+                    return Repair(compiled.validate_json(content), content, tuple(steps))
+                except ValidationError as e:
+                    error = e
+
+        if self.lax:
+            strict = False
+            try:
+                parsed = compiled.validator.validate_json(content, strict=False)
+                steps.append("lax")
+                return Repair(parsed, content, tuple(steps))
+            except ValidationError as e:
+                error = e
+
+        if self.fill_missing:
+            try:
+                data = json.loads(content)
+            except ValueError:
+                return None
+            for _ in range(self.max_fills):
+                missing = [item["loc"] for item in error.errors() if item["type"] == "missing"]
+                if not missing or not all(_set_path(data, tuple(loc), None) for loc in missing):
+                    return None
+                candidate = json.dumps(data)
+                try:
+                    parsed = compiled.validator.validate_json(candidate, strict=strict)
+                except ValidationError as e:
+                    if {tuple(item["loc"]) for item in e.errors()} & {tuple(loc) for loc in missing}:
+                        # Setting None did not help for these fields
+                        return None
+                    error = e
+                    continue
+                if strict is False:
+                    try:
+                        parsed = compiled.validator.validate_json(candidate)
+                    except ValidationError:
+                        # Valid only with the coercion of the lax step
+                        steps.append("lax")
+                steps.append("fill_missing")
+                return Repair(parsed, candidate, tuple(steps))
+        return None
@@ -0,0 +1,142 @@
+import random
+from dataclasses import dataclass, replace
+from typing import Any, Mapping, Sequence
+
+from ollama import Message, Options
+from pydantic import BaseModel, ValidationError
+
+
+@dataclass(frozen=True, slots=True)
+class AttemptRequest:
+    """The parts of a request a retry strategy may change between attempts"""
+    messages: Sequence[Mapping[str, Any] | Message] | None
+    options: Mapping[str, Any] | Options | None
+
+
+@dataclass(frozen=True, slots=True)
+class AttemptFailure:
+    """
+    Outcome of an attempt whose content failed validation
+
+    Attributes:
+        attempt: Number of the failed attempt, starting at 1
+        error: The ValidationError raised for the content
+        content: The invalid content, None if the response had none
+        fields: Keys of the JSON object the next attempt asks for if it requests
+            only part of the format model, e.g. with targeted retries, else None
+    """
+    attempt: int
+    error: ValidationError
+    content: str | None
+    fields: tuple[str, ...] | None = None
+
+
+def summarize_validation_error(error: ValidationError, max_errors: int = 5) -> str:
+    """
+    Compact, one line per error summary of a ValidationError for use in a prompt
+
+    Example:
+        - friends.0.age: Input should be a valid integer (got 'twenty')
+    """
+    lines = []
+    errors = error.errors(include_url=False, include_context=False)
+    for item in errors[:max_errors]:
+        location = ".".join(str(part) for part in item["loc"]) or "<root>"
+        line = f"- {location}: {item['msg']}"
+        if item["type"] not in ("missing", "json_invalid"):
+            line += f" (got {item['input']!r:.80})"
+        lines.append(line)
+    if len(errors) > max_errors:
+        lines.append(f"- ... and {len(errors) - max_errors} more errors")
+    return "\n".join(lines)
+
+
+class RetryStrategy:
+    """
+    Decides how the next attempt is sent after the content of an attempt failed validation
+
+    Strategies always derive the next request from the original one, so the prompt
+    does not grow with every attempt. Subclass and override `next_request` to
+    implement your own.
+    """
+    def next_request(self, original: AttemptRequest, failure: AttemptFailure) -> AttemptRequest:
+        return original
+
+
+class BlindRetry(RetryStrategy):
+    """Send the identical request again. This is the default"""
+
+
+class ErrorFeedbackRetry(RetryStrategy):
+    """
+    Show the model its invalid output and what was wrong with it
+
+    The invalid content is added as assistant message, followed by a user message
+    listing the validation errors and asking for a corrected response.
+
+    Args:
+        max_errors: Maximum number of validation errors listed in the correction
+        instruction: Text of the correction turn. `{errors}` is replaced by the
+            summary of the validation errors
+        fields_instruction: Text of the correction turn if the next attempt asks
+            for only some fields. `{fields}` is replaced by their keys
+    """
+    def __init__(
+        self,
+        max_errors: int = 5,
+        instruction: str = (
+            "Your previous response did not match the required JSON schema:\n{errors}\n"
+            "Respond again with the complete, corrected JSON object only."
+        ),
+        fields_instruction: str = (
+            "Your previous response did not match the required JSON schema:\n{errors}\n"
+            "Respond again with a corrected JSON object containing only the fields {fields}."
+        ),
+    ) -> None:
+        self.max_errors = max_errors
+        self.instruction = instruction
+        self.fields_instruction = fields_instruction
+
+    def next_request(self, original: AttemptRequest, failure: AttemptFailure) -> AttemptRequest:
+        errors = summarize_validation_error(failure.error, self.max_errors)
+        if failure.fields is None:
+            instruction = self.instruction.format(errors=errors)
+        else:
+            instruction = self.fields_instruction.format(errors=errors, fields=", ".join(failure.fields))
+        correction = [
+            {"role": "assistant", "content": failure.content or ""},
+            {"role": "user", "content": instruction},
+        ]
+        return replace(original, messages=[*(original.messages or ()), *correction])
+
+
+class TemperatureBumpRetry(RetryStrategy):
+    """
+    Perturb the sampling options so the model does not repeat the same output
+
+    The temperature is raised by `step` per failed attempt, up to `max_temperature`.
+    A fixed seed would make the output deterministic again, so it is replaced by
+    a random one.
+
+    Args:
+        step: Increase of the temperature per failed attempt
+        max_temperature: Upper bound of the temperature
+        base_temperature: Temperature assumed if the request does not set one
+    """
+    def __init__(self, step: float = 0.2, max_temperature: float = 1.0, base_temperature: float = 0.8) -> None:
+        self.step = step
+        self.max_temperature = max_temperature
+        self.base_temperature = base_temperature
+
+    def next_request(self, original: AttemptRequest, failure: AttemptFailure) -> AttemptRequest:
+        options = original.options
+        if isinstance(options, BaseModel):
+            options = options.model_dump(exclude_none=True)
+        options = dict(options or {})
+        temperature = options.get("temperature")
+        if temperature is None:
+            temperature = self.base_temperature
+        options["temperature"] = min(temperature + self.step * failure.attempt, self.max_temperature)
+        if options.get("seed") is not None:
+            options["seed"] = random.randrange(2**31)
+        return replace(original, options=options)
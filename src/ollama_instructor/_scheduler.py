@@ -0,0 +1,244 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import AsyncIterator, Iterator, Literal, Mapping, NamedTuple
+
+logger = logging.getLogger("ollama_instructor.scheduler")
+
+Priority = Literal["interactive", "bulk"]
+
+_PRIORITY_RANK = {"interactive": 0, "bulk": 1}
+
+_priority: ContextVar[Priority] = ContextVar("ollama_instructor_priority", default="interactive")
+
+
+class AdmissionError(Exception):
+    """Raised when the Scheduler does not send a request"""
+
+
+class QueueFullError(AdmissionError):
+    """Raised when the queue of a model is full and the request was shed"""
+
+
+class DeadlineExceededError(AdmissionError, TimeoutError):
+    """Raised when a request is still queued at its deadline"""
+
+
+@contextmanager
+def priority_scope(priority: Priority) -> Iterator[None]:
+    """
+    Run the requests sent within the scope with `priority`
+
+    Requests are "interactive" by default; the batch methods of the async client
+    send theirs as "bulk".
+    """
+    if priority not in _PRIORITY_RANK:
+        raise ValueError(f"unknown priority {priority!r}")
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def deadline_after(timeout: float | timedelta | None) -> float | None:
+    """Deadline on the monotonic clock for a request limited to `timeout`"""
+    if timeout is None:
+        return None
+    if isinstance(timeout, timedelta):
+        timeout = timeout.total_seconds()
+    return time.monotonic() + timeout
+
+
+class SchedulerStatus(NamedTuple):
+    """
+    Snapshot of the queue of a model
+
+    Attributes:
+        model: Name of the model
+        running: Requests holding a slot
+        queued: Requests waiting for a slot
+        shed: Requests rejected or evicted because the queue was full
+        expired: Requests dropped because their deadline passed while queued
+    """
+    model: str
+    running: int
+    queued: int
+    shed: int
+    expired: int
+
+
+@dataclass(order=True, slots=True)
+class _Waiter:
+    rank: int
+    seq: int
+    future: "asyncio.Future[None]" = field(compare=False)
+    deadline: float | None = field(compare=False)
+    timer: asyncio.TimerHandle | None = field(default=None, compare=False)
+
+
+@dataclass(slots=True)
+class _ModelQueue:
+    limit: int
+    running: int = 0
+    queued: int = 0
+    shed: int = 0
+    expired: int = 0
+    heap: list[_Waiter] = field(default_factory=list)
+
+
+class Scheduler:
+    """
+    Client-side admission control for the requests of OllamaInstructorAsync clients
+
+    Ollama runs a limited number of requests per model in parallel and queues the
+    rest where they can not be prioritized. The scheduler keeps that queue on the
+    client instead: at most the concurrency limit of a model is sent at once, and
+    free slots go to "interactive" requests before "bulk" ones (see
+    `priority_scope`), in arrival order within a priority. Every attempt takes a
+    slot of its own; streams hold it until they are closed.
+
+    When the queue of a model is full, a new interactive request evicts the
+    newest queued bulk request; otherwise the new request is shed. Both fail with
+    QueueFullError. A request with a deadline (from `stamina_timeout`) that is
+    still queued when the deadline passes fails with DeadlineExceededError instead
+    of being sent.
+
+    Pass it as `scheduler` to one or more clients talking to the same server.
+
+    Args:
+        max_concurrency: Requests per model sent at once, usually the
+            `OLLAMA_NUM_PARALLEL` of the server
+        model_concurrency: Limits for single models overriding `max_concurrency`
+        max_queue: Requests per model waiting for a slot, None for no limit
+    """
+    def __init__(
+        self,
+        max_concurrency: int = 1,
+        *,
+        model_concurrency: Mapping[str, int] | None = None,
+        max_queue: int | None = 100,
+    ) -> None:
+        limits = dict(model_concurrency or {})
+        if max_concurrency < 1 or any(limit < 1 for limit in limits.values()):
+            raise ValueError("concurrency limits must be at least 1")
+        if max_queue is not None and max_queue < 0:
+            raise ValueError("max_queue must not be negative")
+        self.max_concurrency = max_concurrency
+        self.model_concurrency = limits
+        self.max_queue = max_queue
+        self._queues: dict[str, _ModelQueue] = {}
+        self._seq = itertools.count()
+
+    def status(self) -> list[SchedulerStatus]:
+        return [
+            SchedulerStatus(model, queue.running, queue.queued, queue.shed, queue.expired)
+            for model, queue in self._queues.items()
+        ]
+
+    @asynccontextmanager
+    async def slot(
+        self, model: str, priority: Priority | None = None, deadline: float | None = None
+    ) -> AsyncIterator[None]:
+        """
+        Wait for a free slot of `model` and hold it within the context
+
+        Args:
+            model: Model the request is sent to
+            priority: "interactive" or "bulk", the priority of the current
+                `priority_scope` if None
+            deadline: Time on the monotonic clock after which the request is not
+                sent anymore
+
+        Raises:
+            QueueFullError: If the request was shed because the queue is full
+            DeadlineExceededError: If the deadline passed before a slot was free
+        """
+        queue = self._queue(model)
+        await self._acquire(model, queue, priority if priority is not None else _priority.get(), deadline)
+        try:
+            yield
+        finally:
+            self._release(model, queue)
+
+    def _queue(self, model: str) -> _ModelQueue:
+        queue = self._queues.get(model)
+        if queue is None:
+            queue = _ModelQueue(limit=self.model_concurrency.get(model, self.max_concurrency))
+            self._queues[model] = queue
+        return queue
+
+    async def _acquire(self, model: str, queue: _ModelQueue, priority: Priority, deadline: float | None) -> None:
+        if deadline is not None and deadline <= time.monotonic():
+            queue.expired += 1
+            raise DeadlineExceededError(f"deadline passed before the request to {model} was sent")
+        if queue.running < queue.limit and queue.queued == 0:
+            queue.running += 1
+            return
+        rank = _PRIORITY_RANK[priority]
+        if self.max_queue is not None and queue.queued >= self.max_queue:
+            self._shed(model, queue, rank)
+
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(rank, next(self._seq), loop.create_future(), deadline)
+        if deadline is not None:
+            waiter.timer = loop.call_later(deadline - time.monotonic(), self._expire, model, queue, waiter)
+        heapq.heappush(queue.heap, waiter)
+        queue.queued += 1
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.cancelled():
+                # Still queued, give up the place
+                self._settle(queue, waiter)
+            elif waiter.future.exception() is None:
+                # The slot was handed over just before the cancellation
+                self._release(model, queue)
+            raise
+
+    def _shed(self, model: str, queue: _ModelQueue, rank: int) -> None:
+        live = [waiter for waiter in queue.heap if not waiter.future.done()]
+        worst = max(live, default=None)
+        if worst is None or worst.rank <= rank:
+            queue.shed += 1
+            logger.warning("Queue of %s is full, shedding request", model)
+            raise QueueFullError(f"queue of {model} is full ({self.max_queue} requests)")
+        queue.shed += 1
+        logger.warning("Queue of %s is full, evicting a lower priority request", model)
+        self._settle(queue, worst)
+        worst.future.set_exception(QueueFullError(f"evicted from the full queue of {model}"))
+
+    def _expire(self, model: str, queue: _ModelQueue, waiter: _Waiter) -> None:
+        if waiter.future.done():
+            return
+        queue.expired += 1
+        logger.debug("Dropping queued request to %s, its deadline passed", model)
+        self._settle(queue, waiter)
+        waiter.future.set_exception(DeadlineExceededError(f"deadline passed while queued for {model}"))
+
+    def _settle(self, queue: _ModelQueue, waiter: _Waiter) -> None:
+        queue.queued -= 1
+        if waiter.timer is not None:
+            waiter.timer.cancel()
+
+    def _release(self, model: str, queue: _ModelQueue) -> None:
+        now = time.monotonic()
+        while queue.heap:
+            waiter = heapq.heappop(queue.heap)
+            if waiter.future.done():
+                continue
+            self._settle(queue, waiter)
+            if waiter.deadline is not None and waiter.deadline <= now:
+                queue.expired += 1
+                waiter.future.set_exception(DeadlineExceededError(f"deadline passed while queued for {model}"))
+                continue
+            # The slot passes to the waiter, so `running` stays the same
+            waiter.future.set_result(None)
+            return
+        queue.running -= 1
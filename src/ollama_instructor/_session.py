@@ -0,0 +1,320 @@
+import copy
+import inspect
+import logging
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Mapping, Sequence, Type
+
+from ollama import ChatResponse, Message, Options
+
+from ._cache import normalize_message
+from ._types import ParsedChatResponse, T
+from .ollama_instructor import OllamaInstructor, OllamaInstructorAsync
+
+logger = logging.getLogger("ollama_instructor.session")
+
+Summarizer = Callable[[list[dict[str, Any]]], str]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of `text`, about four characters per token"""
+    return len(text) // 4 + 1
+
+
+@dataclass(slots=True)
+class SessionUsage:
+    """
+    Token counts and prompt evaluation time of the requests of a session
+
+    Ollama only evaluates the part of the prompt that is not cached from the
+    previous request, so a `prompt_tokens` much smaller than the prompt means the
+    prefix was reused.
+
+    Attributes:
+        requests: Number of successful requests
+        prompt_tokens: Sum of `prompt_eval_count`, the prompt tokens evaluated
+        completion_tokens: Sum of `eval_count`, the generated tokens
+        prompt_eval_duration: Seconds spent evaluating prompts
+        compactions: How often the history was compacted
+    """
+    requests: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    prompt_eval_duration: float = 0.0
+    compactions: int = 0
+
+    def add(self, response: ChatResponse) -> None:
+        self.requests += 1
+        self.prompt_tokens += response.prompt_eval_count or 0
+        self.completion_tokens += response.eval_count or 0
+        self.prompt_eval_duration += (response.prompt_eval_duration or 0) / 1e9
+
+
+@dataclass(frozen=True, slots=True)
+class _Turn:
+    messages: tuple[dict[str, Any], ...]
+    tokens: int
+
+
+class _Session:
+    def __init__(
+        self,
+        model: str,
+        prefix: Sequence[Mapping[str, Any] | Message],
+        options: Mapping[str, Any] | Options | None,
+        keep_alive: float | str | None,
+        max_history_tokens: int,
+        compact_to: float,
+        count_tokens: Callable[[str], int],
+        summarize: Callable[[list[dict[str, Any]]], Any] | None,
+    ) -> None:
+        if not 0 <= compact_to < 1:
+            raise ValueError("compact_to must be at least 0 and below 1")
+        self.model = model
+        # Normalized and copied once, so every request sends the identical prefix
+        self.prefix: tuple[dict[str, Any], ...] = tuple(copy.deepcopy(normalize_message(message)) for message in prefix)
+        self.options = copy.deepcopy(options)
+        self.keep_alive = keep_alive
+        self.max_history_tokens = max_history_tokens
+        self.compact_to = compact_to
+        self.count_tokens = count_tokens
+        self.summarize = summarize
+        self.usage = SessionUsage()
+        self._summary: dict[str, Any] | None = None
+        self._summary_tokens = 0
+        self._turns: list[_Turn] = []
+
+    @property
+    def history(self) -> list[dict[str, Any]]:
+        """Messages after the prefix: the summary of compacted turns, if any, and the recent turns"""
+        messages = [self._summary] if self._summary is not None else []
+        for turn in self._turns:
+            messages.extend(turn.messages)
+        return messages
+
+    @property
+    def history_tokens(self) -> int:
+        return self._summary_tokens + sum(turn.tokens for turn in self._turns)
+
+    def reset(self) -> None:
+        """Forget the history, keeping the prefix"""
+        self._summary = None
+        self._summary_tokens = 0
+        self._turns.clear()
+
+    def _messages(self, user: dict[str, Any], with_history: bool) -> list[dict[str, Any]]:
+        if not with_history:
+            return [*self.prefix, user]
+        return [*self.prefix, *self.history, user]
+
+    def _record(self, user: dict[str, Any], result: ParsedChatResponse) -> None:
+        self.usage.add(result.response)
+        content = result.content or ""
+        tokens = self.count_tokens(user["content"]) + (result.eval_count or self.count_tokens(content))
+        self._turns.append(_Turn((user, {"role": "assistant", "content": content}), tokens))
+
+    def _drop_turns(self) -> list[dict[str, Any]] | None:
+        """
+        Remove the oldest turns once the history exceeds its budget
+
+        The history is cut down to `compact_to` of the budget rather than just below
+        it, because every compaction changes the messages after the prefix and the
+        server has to evaluate them again; compacting in larger steps keeps that rare.
+
+        Returns:
+            The messages to summarize (the previous summary and the removed turns), or
+            None if the history is within its budget
+        """
+        if self.history_tokens <= self.max_history_tokens:
+            return None
+        target = self.max_history_tokens * self.compact_to
+        dropped = [self._summary] if self._summary is not None else []
+        tokens = self.history_tokens
+        while self._turns and tokens > target:
+            turn = self._turns.pop(0)
+            tokens -= turn.tokens
+            dropped.extend(turn.messages)
+        self._summary = None
+        self._summary_tokens = 0
+        self.usage.compactions += 1
+        logger.debug("Compacted session history to %d turns", len(self._turns))
+        return dropped
+
+    def _set_summary(self, summary: str) -> None:
+        self._summary = {"role": "system", "content": summary}
+        self._summary_tokens = self.count_tokens(summary)
+
+
+class ChatSession(_Session):
+    """
+    Multi-turn or repeated extraction sharing a stable message prefix
+
+    Ollama keeps the evaluated prompt of a model in its KV cache and only evaluates
+    the part of the next prompt that differs. The session sends the same prefix
+    (system prompt, few-shot examples) unchanged with every request, including
+    retries, so only the messages after it are evaluated again.
+
+    `ask` continues the conversation: the question and the answer are added to the
+    history. Once the history exceeds `max_history_tokens`, the oldest turns are
+    removed, or replaced by a summary if `summarize` is given. `extract` sends
+    the prefix and a single message without touching the history, for running
+    the same template over many inputs.
+
+    Keep `max_history_tokens` plus the prefix well below the context size
+    (`num_ctx`) of the model; when Ollama truncates a prompt it cuts the start,
+    which is the prefix.
+
+    Args:
+        client: The client to send the requests with
+        model: The model to use
+        prefix: Messages sent first in every request
+        options: Options of every request. Changing options such as `num_ctx`
+            reloads the model, which drops its cache
+        keep_alive: How long Ollama keeps the model, and so its cache, loaded
+        max_history_tokens: Budget of the history after the prefix
+        compact_to: Fraction of the budget the history is cut down to when it is
+            exceeded
+        count_tokens: Token count of a text, used for the user messages and for
+            answers without `eval_count`. Defaults to an estimate of four
+            characters per token
+        summarize: Optional function turning the messages removed from the history
+            (including an earlier summary) into a summary text. The summary is kept
+            as system message after the prefix
+    """
+    def __init__(
+        self,
+        client: OllamaInstructor,
+        model: str,
+        prefix: Sequence[Mapping[str, Any] | Message] = (),
+        *,
+        options: Mapping[str, Any] | Options | None = None,
+        keep_alive: float | str | None = None,
+        max_history_tokens: int = 4096,
+        compact_to: float = 0.5,
+        count_tokens: Callable[[str], int] = estimate_tokens,
+        summarize: Summarizer | None = None,
+    ) -> None:
+        super().__init__(model, prefix, options, keep_alive, max_history_tokens, compact_to, count_tokens, summarize)
+        self.client = client
+
+    def ask(
+        self,
+        content: str,
+        format: Type[T],
+        *,
+        retries: int = 3,
+        stamina_timeout: float | timedelta | None = None
+    ) -> ParsedChatResponse[T]:
+        """Send `content` as next user message after the history and add the answer to it"""
+        user = {"role": "user", "content": content}
+        result = self._send(self._messages(user, with_history=True), format, retries, stamina_timeout)
+        self._record(user, result)
+        dropped = self._drop_turns()
+        if dropped and self.summarize is not None:
+            self._set_summary(self.summarize(dropped))
+        return result
+
+    def extract(
+        self,
+        content: str,
+        format: Type[T],
+        *,
+        retries: int = 3,
+        stamina_timeout: float | timedelta | None = None
+    ) -> ParsedChatResponse[T]:
+        """Send the prefix and `content` as user message, leaving the history as it is"""
+        result = self._send(
+            self._messages({"role": "user", "content": content}, with_history=False), format, retries, stamina_timeout
+        )
+        self.usage.add(result.response)
+        return result
+
+    def _send(
+        self,
+        messages: list[dict[str, Any]],
+        format: Type[T],
+        retries: int,
+        stamina_timeout: float | timedelta | None
+    ) -> ParsedChatResponse[T]:
+        return self.client.chat_parsed(
+            format=format,
+            model=self.model,
+            messages=messages,
+            options=self.options,
+            keep_alive=self.keep_alive,
+            retries=retries,
+            stamina_timeout=stamina_timeout
+        )
+
+
+class AsyncChatSession(_Session):
+    """
+    Like ChatSession, for OllamaInstructorAsync. `summarize` may be a coroutine
+    function. Do not run several `ask` of the same session at once; the history
+    is only consistent when the turns run one after another.
+    """
+    def __init__(
+        self,
+        client: OllamaInstructorAsync,
+        model: str,
+        prefix: Sequence[Mapping[str, Any] | Message] = (),
+        *,
+        options: Mapping[str, Any] | Options | None = None,
+        keep_alive: float | str | None = None,
+        max_history_tokens: int = 4096,
+        compact_to: float = 0.5,
+        count_tokens: Callable[[str], int] = estimate_tokens,
+        summarize: Callable[[list[dict[str, Any]]], str | Awaitable[str]] | None = None,
+    ) -> None:
+        super().__init__(model, prefix, options, keep_alive, max_history_tokens, compact_to, count_tokens, summarize)
+        self.client = client
+
+    async def ask(
+        self,
+        content: str,
+        format: Type[T],
+        *,
+        retries: int = 3,
+        stamina_timeout: float | timedelta | None = None
+    ) -> ParsedChatResponse[T]:
+        user = {"role": "user", "content": content}
+        result = await self._send(self._messages(user, with_history=True), format, retries, stamina_timeout)
+        self._record(user, result)
+        dropped = self._drop_turns()
+        if dropped and self.summarize is not None:
+            summary = self.summarize(dropped)
+            if inspect.isawaitable(summary):
+                summary = await summary
+            self._set_summary(summary)
+        return result
+
+    async def extract(
+        self,
+        content: str,
+        format: Type[T],
+        *,
+        retries: int = 3,
+        stamina_timeout: float | timedelta | None = None
+    ) -> ParsedChatResponse[T]:
+        result = await self._send(
+            self._messages({"role": "user", "content": content}, with_history=False), format, retries, stamina_timeout
+        )
+        self.usage.add(result.response)
+        return result
+
+    async def _send(
+        self,
+        messages: list[dict[str, Any]],
+        format: Type[T],
+        retries: int,
+        stamina_timeout: float | timedelta | None
+    ) -> ParsedChatResponse[T]:
+        return await self.client.chat_parsed(
+            format=format,
+            model=self.model,
+            messages=messages,
+            options=self.options,
+            keep_alive=self.keep_alive,
+            retries=retries,
+            stamina_timeout=stamina_timeout
+        )
@@ -0,0 +1,210 @@
+import json
+import re
+import weakref
+from typing import Any, Sequence, Type
+
+from pydantic import AliasChoices, AliasPath, BaseModel, ConfigDict, ValidationError, create_model
+
+from ._format import CompiledFormat, FormatRegistry
+
+_REF_PATTERN = re.compile(r'"\$ref": "#/\$defs/([^"]+)"')
+
+_part_classes: "weakref.WeakSet[type]" = weakref.WeakSet()
+_part_models: "weakref.WeakKeyDictionary[type, dict[tuple[tuple[str, ...], ...], tuple[Type[BaseModel], ...]]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def split_fields(compiled: CompiledFormat, groups: int | Sequence[Sequence[str]]) -> tuple[tuple[str, ...], ...]:
+    """
+    Split the top-level fields of a format model into groups that are extracted separately
+
+    Args:
+        compiled: The compiled format of the model
+        groups: The number of groups, or the field names of every group. A number
+            balances the groups by the size of the JSON schema of their fields, a
+            rough measure of the output they produce. Within a group the fields keep
+            the order of the model
+
+    Raises:
+        ValueError: If explicit groups miss or repeat a field, or name unknown ones
+    """
+    model = compiled.model
+    names = list(model.model_fields)
+    if isinstance(groups, int):
+        if groups < 1:
+            raise ValueError("groups must be at least 1")
+        properties = compiled.schema.get("properties", {})
+        defs = compiled.schema.get("$defs", {})
+        # Fields left out of the schema produce no output and weigh nothing
+        sizes = {
+            name: _schema_size(properties[keys[0]], defs) if keys[0] in properties else 0
+            for name, keys in field_keys(model).items()
+        }
+        bins: list[list[str]] = [[] for _ in range(min(groups, len(names)))]
+        totals = [0] * len(bins)
+        for name in sorted(names, key=sizes.__getitem__, reverse=True):
+            smallest = totals.index(min(totals))
+            bins[smallest].append(name)
+            totals[smallest] += sizes[name]
+        order = {name: position for position, name in enumerate(names)}
+        return tuple(tuple(sorted(group, key=order.__getitem__)) for group in bins)
+
+    result = tuple(tuple(group) for group in groups if group)
+    listed = [name for group in result for name in group]
+    unknown = set(listed) - set(names)
+    if unknown:
+        raise ValueError(f"unknown fields {sorted(unknown)} in groups of {model.__name__}")
+    if len(listed) != len(set(listed)):
+        raise ValueError("a field must not be in more than one group")
+    missing = [name for name in names if name not in listed]
+    if missing:
+        raise ValueError(f"fields {missing} of {model.__name__} are in no group")
+    return result
+
+
+def field_keys(model: Type[BaseModel]) -> dict[str, tuple[str, ...]]:
+    """
+    The keys each field of `model` is read from in a JSON object, by field name
+
+    The first key is the property of the field in the JSON schema, chosen the way
+    pydantic does in validation mode: the validation alias if the model validates
+    by alias, and the first single-key choice of an `AliasChoices`. The other
+    choices and the field name, if the model validates by name, follow as they
+    may appear in the content and in the locations of validation errors.
+    """
+    by_alias = model.model_config.get("validate_by_alias", True)
+    by_name = model.model_config.get("validate_by_name") or model.model_config.get("populate_by_name")
+    result: dict[str, tuple[str, ...]] = {}
+    for name, field in model.model_fields.items():
+        alias = field.validation_alias if by_alias else None
+        if isinstance(alias, str):
+            keys = [alias]
+        elif isinstance(alias, (AliasChoices, AliasPath)):
+            paths = alias.convert_to_aliases()
+            if isinstance(alias, AliasPath):
+                paths = [paths]
+            keys = [path[0] for path in paths if len(path) == 1 and isinstance(path[0], str)] or [name]
+        else:
+            keys = [name]
+        if by_name or alias is None:
+            keys.append(name)
+        result[name] = tuple(dict.fromkeys(keys))
+    return result
+
+
+def _schema_size(schema: dict[str, Any], defs: dict[str, Any]) -> int:
+    serialized = json.dumps(schema)
+    # Nested models are referenced, count their definitions as well
+    refs = _REF_PATTERN.findall(serialized)
+    return len(serialized) + sum(len(json.dumps(defs.get(ref, ""))) for ref in set(refs))
+
+
+def part_models(model: Type[BaseModel], groups: tuple[tuple[str, ...], ...]) -> tuple[Type[BaseModel], ...]:
+    """
+    Models with the fields of each group, created once per model and groups
+
+    The fields keep their types, constraints, aliases and descriptions, and the
+    models share the configuration of `model`, e.g. `strict`. Validators of `model`
+    are not copied; they run when the parts are assembled.
+    """
+    parts = _part_models.setdefault(model, {})
+    cached = parts.get(groups)
+    if cached is not None:
+        return cached
+    # Same validation rules as the full model, the title comes from the part's name
+    config = ConfigDict(**{key: value for key, value in model.model_config.items() if key != "title"})
+    created = tuple(
+        create_model(
+            f"{model.__name__}Part{index}",
+            __config__=config,
+            **{name: (model.model_fields[name].annotation, model.model_fields[name]) for name in group},
+        )
+        for index, group in enumerate(groups, start=1)
+    )
+    _part_classes.update(created)
+    parts[groups] = created
+    return created
+
+
+def requested_fields(compiled: CompiledFormat) -> tuple[str, ...] | None:
+    """Keys of the object `compiled` asks for if it is a part of a larger model, else None"""
+    if compiled.model not in _part_classes:
+        return None
+    return tuple(compiled.schema.get("properties", {}))
+
+
+def merge_parts(contents: Sequence[str | None]) -> dict[str, Any]:
+    """Merge the JSON objects returned for the groups into one"""
+    merged: dict[str, Any] = {}
+    for content in contents:
+        merged.update(json.loads(content or "{}"))
+    return merged
+
+
+class RetryTarget:
+    """
+    What the next attempt of a request with targeted retries asks for
+
+    After an attempt failed validation, the top-level values that were valid are
+    kept and the next attempt requests only the fields with errors, using a model
+    holding just those. Its content is merged with the kept values before it is
+    validated against the full model again. Errors without a field, such as
+    invalid JSON or a failing model validator, make the next attempt request the
+    whole model.
+
+    Args:
+        compiled: The compiled format of the full model
+        registry: Registry the formats of the reduced models are compiled with
+    """
+    def __init__(self, compiled: CompiledFormat, registry: FormatRegistry) -> None:
+        self.compiled = compiled
+        self.registry = registry
+        self.format = compiled
+        self.kept: dict[str, Any] | None = None
+
+    @property
+    def fields(self) -> tuple[str, ...] | None:
+        """Names of the fields requested next, None for the whole model"""
+        if self.kept is None:
+            return None
+        return tuple(self.format.model.model_fields)
+
+    def merge(self, content: str | None) -> str | None:
+        """The content of an attempt merged with the kept values"""
+        if self.kept is None or content is None:
+            return content
+        try:
+            part = json.loads(content)
+        except ValueError:
+            return content
+        if not isinstance(part, dict):
+            return content
+        return json.dumps({**self.kept, **part}, ensure_ascii=False)
+
+    def narrow(self, content: str | None, error: ValidationError) -> None:
+        """Target the next attempt at the fields of `error`"""
+        try:
+            values = json.loads(content or "")
+        except ValueError:
+            values = None
+        if not isinstance(values, dict):
+            # Not an object at all, ask for the same fields again
+            return
+        model = self.compiled.model
+        names_by_key = {key: name for name, keys in field_keys(model).items() for key in keys}
+        failing: set[str] = set()
+        for item in error.errors(include_url=False, include_context=False, include_input=False):
+            key = item["loc"][0] if item["loc"] else None
+            if key not in names_by_key:
+                self._reset()
+                return
+            failing.add(key)
+        self.kept = {key: value for key, value in values.items() if key not in failing}
+        failing_names = {names_by_key[key] for key in failing}
+        fields = tuple(name for name in model.model_fields if name in failing_names)
+        self.format = self.registry.get(part_models(model, (fields,))[0])
+
+    def _reset(self) -> None:
+        self.kept = None
+        self.format = self.compiled
@@ -0,0 +1,48 @@
+class StreamBuffer:
+    """
+    Append-only buffer for the content of a streamed response
+
+    Chunks are collected in a list and only joined when the text is requested,
+    so accumulating a stream of n characters costs O(n) instead of the O(n^2)
+    of repeated string concatenation. The joined text is kept, so asking for it
+    again without new chunks in between is free.
+
+    Pass an instance as `buffer` to `chat_stream` to read the accumulated content
+    of the current attempt at any time. The buffer is cleared when a retry starts.
+    """
+    __slots__ = ("_parts", "_length")
+
+    def __init__(self) -> None:
+        self._parts: list[str] = []
+        self._length = 0
+
+    def append(self, text: str) -> None:
+        if text:
+            self._parts.append(text)
+            self._length += len(text)
+
+    def getvalue(self) -> str:
+        """Return the accumulated text"""
+        parts = self._parts
+        if not parts:
+            return ""
+        if len(parts) > 1:
+            parts[:] = ["".join(parts)]
+        return parts[0]
+
+    @property
+    def text(self) -> str:
+        return self.getvalue()
+
+    def clear(self) -> None:
+        self._parts.clear()
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __str__(self) -> str:
+        return self.getvalue()
+
+    def __repr__(self) -> str:
+        return f"StreamBuffer(length={self._length}, parts={len(self._parts)})"
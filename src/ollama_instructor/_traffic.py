@@ -0,0 +1,522 @@
+import asyncio
+import collections
+import json
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterable, Iterator
+
+import httpx
+
+logger = logging.getLogger("ollama_instructor.traffic")
+
+# A recording is this header followed by frames: the length of the compressed
+# record as 4-byte big-endian integer and the zlib-compressed JSON of the record
+_MAGIC = b"OITRAFFIC1\n"
+_FRAME = struct.Struct(">I")
+
+
+class ReplayMismatchError(LookupError):
+    """A replayed client sent a request that is not (or no longer) in the recording"""
+
+
+@dataclass(frozen=True, slots=True)
+class TrafficRecord:
+    """
+    One recorded HTTP exchange with the Ollama server
+
+    Offsets are seconds since the request was sent.
+
+    Attributes:
+        started: Wall clock time the request was sent
+        method: HTTP method
+        path: URL path, e.g. /api/chat. The host is not recorded, so a recording
+            replays against any host
+        request: The JSON body of the request, None if it had none
+        status: HTTP status of the response, None if no response arrived
+        headers: Headers of the response
+        response_at: Offset at which the response headers arrived, or the error was
+            raised if no response arrived
+        chunks: Offset and raw bytes of every chunk of the response body, as read
+            from the connection. A non-streaming response usually has one chunk
+        error: Name of the httpx error the exchange failed with, if any
+        message: Message of that error
+    """
+    started: float
+    method: str
+    path: str
+    request: Any
+    status: int | None
+    headers: tuple[tuple[str, str], ...] = ()
+    response_at: float = 0.0
+    chunks: tuple[tuple[float, bytes], ...] = ()
+    error: str | None = None
+    message: str | None = None
+
+    @property
+    def model(self) -> str | None:
+        return self.request.get("model") if isinstance(self.request, dict) else None
+
+    @property
+    def duration(self) -> float:
+        """Seconds from the request until the last chunk"""
+        return self.chunks[-1][0] if self.chunks else self.response_at
+
+    @property
+    def content(self) -> bytes:
+        """The response body"""
+        return b"".join(part for _, part in self.chunks)
+
+    def key(self) -> tuple[str, str, str]:
+        """What a replayed request is matched by: method, path and body"""
+        return self.method, self.path, _canonical(self.request)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "started": self.started,
+            "method": self.method,
+            "path": self.path,
+            "request": self.request,
+            "status": self.status,
+            "headers": [list(header) for header in self.headers],
+            "response_at": self.response_at,
+            # surrogateescape keeps chunks that split a UTF-8 character intact, the
+            # file is encoded and decoded with the same handler
+            "chunks": [[offset, part.decode("utf-8", "surrogateescape")] for offset, part in self.chunks],
+            "error": self.error,
+            "message": self.message,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "TrafficRecord":
+        return cls(
+            started=data["started"],
+            method=data["method"],
+            path=data["path"],
+            request=data["request"],
+            status=data["status"],
+            headers=tuple((name, value) for name, value in data["headers"]),
+            response_at=data["response_at"],
+            chunks=tuple((offset, part.encode("utf-8", "surrogateescape")) for offset, part in data["chunks"]),
+            error=data["error"],
+            message=data["message"],
+        )
+
+
+def _canonical(body: Any) -> str:
+    return json.dumps(body, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def _request_body(request: httpx.Request) -> Any:
+    content = request.read()
+    if not content:
+        return None
+    try:
+        return json.loads(content)
+    except ValueError:
+        return content.decode("utf-8", "replace")
+
+
+def read_traffic(path: str | os.PathLike) -> Iterator[TrafficRecord]:
+    """
+    Read the records of a recording lazily, in the order they completed
+
+    A record cut off by a crash of the recording process ends the iteration with
+    a warning instead of an error.
+
+    Raises:
+        ValueError: If the file is not a traffic recording
+    """
+    with open(path, "rb") as file:
+        header = file.read(len(_MAGIC))
+        if not header:
+            return
+        if header != _MAGIC:
+            raise ValueError(f"{path} is not a traffic recording")
+        while True:
+            data = _read_frame(file)
+            if data is None:
+                return
+            yield TrafficRecord.from_dict(json.loads(zlib.decompress(data).decode("utf-8", "surrogateescape")))
+
+
+def _read_frame(file) -> bytes | None:
+    head = file.read(_FRAME.size)
+    if not head:
+        return None
+    if len(head) == _FRAME.size:
+        (size,) = _FRAME.unpack(head)
+        data = file.read(size)
+        if len(data) == size:
+            return data
+    logger.warning("Recording ends with an incomplete record, ignoring it")
+    return None
+
+
+def _valid_length(path: Path) -> int:
+    """Length of the complete frames of an existing recording"""
+    length = path.stat().st_size
+    with path.open("rb") as file:
+        if file.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError(f"{path} is not a traffic recording")
+        end = file.tell()
+        while True:
+            head = file.read(_FRAME.size)
+            if len(head) < _FRAME.size:
+                return end
+            (size,) = _FRAME.unpack(head)
+            if end + _FRAME.size + size > length:
+                return end
+            end = file.seek(size, os.SEEK_CUR)
+
+
+class TrafficRecorder:
+    """
+    Records the HTTP traffic of clients to an append-only, compressed file
+
+    Wrap the transport of a client with `transport()` (`async_transport()` for
+    the async client). Every exchange is written as one zlib-compressed frame
+    once its response is closed, including the arrival time of every streamed
+    chunk and transport errors, so latency, retries and broken streams can be
+    reproduced with TrafficReplay. Recordings hold the full prompts and
+    outputs; treat them like the data they contain.
+
+    Recording to an existing file appends to it. A record cut off by a crash is
+    removed first. The recorder can be shared by several clients and threads.
+
+    Args:
+        path: The file to record to
+        level: zlib compression level, 1 (fastest) to 9 (smallest)
+    """
+    def __init__(self, path: str | os.PathLike, level: int = 6) -> None:
+        self.path = Path(path)
+        self.level = level
+        self.records = 0
+        self._lock = threading.Lock()
+        if self.path.exists() and self.path.stat().st_size > 0:
+            end = _valid_length(self.path)
+            with self.path.open("r+b") as file:
+                file.truncate(end)
+        self._file = self.path.open("ab")
+        if self._file.tell() == 0:
+            self._file.write(_MAGIC)
+            self._file.flush()
+
+    def transport(self, transport: httpx.BaseTransport | None = None) -> httpx.BaseTransport:
+        """
+        Recording transport for OllamaInstructor, forwarding to `transport`
+
+        Args:
+            transport: The transport doing the requests, e.g. `pool.transport` of a
+                ConnectionPool or HostPool. Defaults to a new httpx.HTTPTransport
+        """
+        return _RecordingTransport(self, transport if transport is not None else httpx.HTTPTransport())
+
+    def async_transport(self, transport: httpx.AsyncBaseTransport | None = None) -> httpx.AsyncBaseTransport:
+        """Recording transport for OllamaInstructorAsync, forwarding to `transport`"""
+        return _AsyncRecordingTransport(self, transport if transport is not None else httpx.AsyncHTTPTransport())
+
+    def write(self, record: TrafficRecord) -> None:
+        data = zlib.compress(json.dumps(record.to_dict(), ensure_ascii=False).encode("utf-8", "surrogateescape"), self.level)
+        with self._lock:
+            if self._file.closed:
+                logger.warning("Recorder is closed, dropping record of %s", record.path)
+                return
+            self._file.write(_FRAME.pack(len(data)) + data)
+            # Flushed per record, so a crash loses at most the exchanges in flight
+            self._file.flush()
+            self.records += 1
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self) -> "TrafficRecorder":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class _Exchange:
+    """Collects one exchange while it runs and writes it once it is done"""
+    def __init__(self, recorder: TrafficRecorder, request: httpx.Request) -> None:
+        self.recorder = recorder
+        self.started = time.time()
+        self.clock = time.perf_counter()
+        self.method = request.method
+        self.path = request.url.path
+        self.request = _request_body(request)
+        self.status: int | None = None
+        self.headers: tuple[tuple[str, str], ...] = ()
+        self.response_at = 0.0
+        self.chunks: list[tuple[float, bytes]] = []
+        self.error: BaseException | None = None
+        self.done = False
+
+    def offset(self) -> float:
+        return time.perf_counter() - self.clock
+
+    def respond(self, response: httpx.Response) -> None:
+        self.response_at = self.offset()
+        self.status = response.status_code
+        self.headers = tuple(response.headers.multi_items())
+
+    def chunk(self, part: bytes) -> None:
+        self.chunks.append((self.offset(), part))
+
+    def fail(self, error: BaseException) -> None:
+        if self.status is None:
+            self.response_at = self.offset()
+        self.error = error
+        self.finish()
+
+    def finish(self) -> None:
+        if self.done:
+            return
+        self.done = True
+        self.recorder.write(TrafficRecord(
+            started=self.started,
+            method=self.method,
+            path=self.path,
+            request=self.request,
+            status=self.status,
+            headers=self.headers,
+            response_at=self.response_at,
+            chunks=tuple(self.chunks),
+            error=type(self.error).__name__ if self.error is not None else None,
+            message=str(self.error) if self.error is not None else None,
+        ))
+
+
+class _RecordingStream(httpx.SyncByteStream):
+    def __init__(self, stream: httpx.SyncByteStream, exchange: _Exchange) -> None:
+        self._stream = stream
+        self._exchange = exchange
+
+    def __iter__(self) -> Iterator[bytes]:
+        try:
+            for part in self._stream:
+                self._exchange.chunk(part)
+                yield part
+        except httpx.TransportError as e:
+            self._exchange.fail(e)
+            raise
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            self._exchange.finish()
+
+
+class _AsyncRecordingStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, exchange: _Exchange) -> None:
+        self._stream = stream
+        self._exchange = exchange
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        try:
+            async for part in self._stream:
+                self._exchange.chunk(part)
+                yield part
+        except httpx.TransportError as e:
+            self._exchange.fail(e)
+            raise
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._exchange.finish()
+
+
+class _RecordingTransport(httpx.BaseTransport):
+    def __init__(self, recorder: TrafficRecorder, transport: httpx.BaseTransport) -> None:
+        self._recorder = recorder
+        self._transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        exchange = _Exchange(self._recorder, request)
+        try:
+            response = self._transport.handle_request(request)
+        except httpx.TransportError as e:
+            exchange.fail(e)
+            raise
+        exchange.respond(response)
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=_RecordingStream(response.stream, exchange),
+            extensions=response.extensions,
+        )
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class _AsyncRecordingTransport(httpx.AsyncBaseTransport):
+    def __init__(self, recorder: TrafficRecorder, transport: httpx.AsyncBaseTransport) -> None:
+        self._recorder = recorder
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        exchange = _Exchange(self._recorder, request)
+        try:
+            response = await self._transport.handle_async_request(request)
+        except httpx.TransportError as e:
+            exchange.fail(e)
+            raise
+        exchange.respond(response)
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=_AsyncRecordingStream(response.stream, exchange),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def _replayed_error(record: TrafficRecord, request: httpx.Request) -> httpx.TransportError:
+    error_type = getattr(httpx, record.error or "", None)
+    if not (isinstance(error_type, type) and issubclass(error_type, httpx.TransportError)):
+        error_type = httpx.TransportError
+    return error_type(record.message or "", request=request)
+
+
+class TrafficReplay:
+    """
+    Serves recorded responses in place of an Ollama server
+
+    Pass `transport` (`async_transport` for the async client) to a client and
+    run the code that made the recording. Every request is answered with the
+    recorded response of an identical request (method, path and JSON body);
+    identical requests, such as retries, get their responses in the order they
+    were recorded. Transport errors and streams that broke off are replayed as
+    they happened.
+
+    Args:
+        records: The recording, as path or records
+        speed: Replay the recorded timings this many times faster: 1.0 waits as
+            long as the server did for the headers and every chunk, None answers
+            as fast as possible, for profiling the overhead of the client itself
+
+    Raises:
+        ReplayMismatchError: From the client, when it sends a request that has no
+            recorded response left
+    """
+    def __init__(self, records: str | os.PathLike | Iterable[TrafficRecord], speed: float | None = 1.0) -> None:
+        if speed is not None and speed <= 0:
+            raise ValueError("speed must be positive or None")
+        if isinstance(records, (str, os.PathLike)):
+            records = read_traffic(records)
+        self.speed = speed
+        self._lock = threading.Lock()
+        self._queues: dict[tuple[str, str, str], collections.deque[TrafficRecord]] = collections.defaultdict(
+            collections.deque
+        )
+        for record in records:
+            self._queues[record.key()].append(record)
+
+    @property
+    def remaining(self) -> int:
+        """Number of recorded responses not served yet"""
+        with self._lock:
+            return sum(len(queue) for queue in self._queues.values())
+
+    @property
+    def transport(self) -> httpx.BaseTransport:
+        return _ReplayTransport(self)
+
+    @property
+    def async_transport(self) -> httpx.AsyncBaseTransport:
+        return _AsyncReplayTransport(self)
+
+    def next_record(self, request: httpx.Request) -> TrafficRecord:
+        key = (request.method, request.url.path, _canonical(_request_body(request)))
+        with self._lock:
+            queue = self._queues.get(key)
+            if not queue:
+                raise ReplayMismatchError(f"no recorded response left for {request.method} {request.url.path}")
+            return queue.popleft()
+
+    def delay(self, clock: float, offset: float) -> float:
+        """Seconds to wait until `offset` of an exchange that started at `clock`"""
+        if self.speed is None:
+            return 0.0
+        return clock + offset / self.speed - time.perf_counter()
+
+
+class _ReplayStream(httpx.SyncByteStream):
+    def __init__(self, replay: TrafficReplay, record: TrafficRecord, request: httpx.Request, clock: float) -> None:
+        self._replay = replay
+        self._record = record
+        self._request = request
+        self._clock = clock
+
+    def __iter__(self) -> Iterator[bytes]:
+        for offset, part in self._record.chunks:
+            delay = self._replay.delay(self._clock, offset)
+            if delay > 0:
+                time.sleep(delay)
+            yield part
+        if self._record.error is not None:
+            raise _replayed_error(self._record, self._request)
+
+
+class _AsyncReplayStream(httpx.AsyncByteStream):
+    def __init__(self, replay: TrafficReplay, record: TrafficRecord, request: httpx.Request, clock: float) -> None:
+        self._replay = replay
+        self._record = record
+        self._request = request
+        self._clock = clock
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        for offset, part in self._record.chunks:
+            delay = self._replay.delay(self._clock, offset)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield part
+        if self._record.error is not None:
+            raise _replayed_error(self._record, self._request)
+
+
+class _ReplayTransport(httpx.BaseTransport):
+    def __init__(self, replay: TrafficReplay) -> None:
+        self._replay = replay
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        clock = time.perf_counter()
+        record = self._replay.next_record(request)
+        delay = self._replay.delay(clock, record.response_at)
+        if delay > 0:
+            time.sleep(delay)
+        if record.status is None:
+            raise _replayed_error(record, request)
+        return httpx.Response(
+            record.status, headers=list(record.headers), stream=_ReplayStream(self._replay, record, request, clock)
+        )
+
+
+class _AsyncReplayTransport(httpx.AsyncBaseTransport):
+    def __init__(self, replay: TrafficReplay) -> None:
+        self._replay = replay
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        clock = time.perf_counter()
+        record = self._replay.next_record(request)
+        delay = self._replay.delay(clock, record.response_at)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if record.status is None:
+            raise _replayed_error(record, request)
+        return httpx.Response(
+            record.status, headers=list(record.headers), stream=_AsyncReplayStream(self._replay, record, request, clock)
+        )
@@ -0,0 +1,162 @@
+from dataclasses import dataclass
+from typing import Generic, TypeVar
+
+from ollama import ChatResponse, Message
+from pydantic import BaseModel, ConfigDict, ValidationError
+
+T = TypeVar("T", bound=BaseModel)
+
+
+@dataclass(frozen=True, slots=True)
+class ParsedChatResponse(Generic[T]):
+    """
+    Validated result of a chat completion together with the raw response
+
+    Attributes:
+        parsed: The instance of the format model validated from the response content
+        response: The ChatResponse as returned by Ollama. If the content was repaired,
+            its content is the repaired JSON
+        repairs: Names of the local repair steps applied to the content, empty if the
+            content was valid as returned
+        validation_duration: Seconds spent validating the content of the successful
+            attempt, including local repairs
+        attempts: Number of attempts the call took, 0 if it was answered from the cache
+    """
+    parsed: T
+    response: ChatResponse
+    repairs: tuple[str, ...] = ()
+    validation_duration: float = 0.0
+    attempts: int = 1
+
+    @property
+    def content(self) -> str | None:
+        return self.response.message.content
+
+    @property
+    def prompt_eval_count(self) -> int | None:
+        return self.response.prompt_eval_count
+
+    @property
+    def eval_count(self) -> int | None:
+        return self.response.eval_count
+
+    @property
+    def total_duration(self) -> int | None:
+        """Total duration of the request in nanoseconds"""
+        return self.response.total_duration
+
+    @property
+    def load_duration(self) -> int | None:
+        """Time spent loading the model in nanoseconds"""
+        return self.response.load_duration
+
+    @property
+    def prompt_eval_duration(self) -> int | None:
+        """Time spent evaluating the prompt in nanoseconds"""
+        return self.response.prompt_eval_duration
+
+    @property
+    def eval_duration(self) -> int | None:
+        """Time spent generating the response in nanoseconds"""
+        return self.response.eval_duration
+
+
+@dataclass(frozen=True, slots=True)
+class PartialChatResponse(Generic[T]):
+    """
+    Chunk of a stream together with the partially validated content
+
+    Attributes:
+        partial: Instance of the partial variant of the format model holding all
+            values completed so far, None until the first value is complete
+        chunk: The ChatResponse chunk as returned by Ollama
+        attempt: Number of the attempt this chunk belongs to, starting at 1. A higher
+            number than before means a retry started and earlier partials are void
+        parsed: The validated instance of the format model, only set on the final chunk
+    """
+    partial: BaseModel | None
+    chunk: ChatResponse
+    attempt: int
+    parsed: T | None = None
+
+    @property
+    def done(self) -> bool:
+        return bool(self.chunk.done)
+
+
+@dataclass(frozen=True, slots=True)
+class SplitChatResponse(Generic[T]):
+    """
+    Validated result of a chat completion extracted in field groups
+
+    Attributes:
+        parsed: The instance of the format model assembled from the groups
+        parts: The validated response of every group, in the order of `groups`
+        groups: Field names of every group
+    """
+    parsed: T
+    parts: tuple[ParsedChatResponse, ...]
+    groups: tuple[tuple[str, ...], ...]
+
+    @property
+    def prompt_eval_count(self) -> int:
+        return sum(part.prompt_eval_count or 0 for part in self.parts)
+
+    @property
+    def eval_count(self) -> int:
+        return sum(part.eval_count or 0 for part in self.parts)
+
+
+@dataclass(frozen=True, slots=True)
+class BatchResult(Generic[T]):
+    """
+    Outcome of a single item of a batch
+
+    Attributes:
+        index: Position of the item in the input of the batch
+        response: The validated response, None if the item failed
+        error: The exception raised for the item, None if it succeeded
+    """
+    index: int
+    response: ParsedChatResponse[T] | None = None
+    error: BaseException | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def unwrap(self) -> ParsedChatResponse[T]:
+        """Return the response or raise the error of the item"""
+        if self.error is not None:
+            raise self.error
+        return self.response
+
+
+class StreamReset(ChatResponse):
+    """
+    Yielded by `chat_stream` when an attempt whose chunks were already yielded failed
+    validation and the next attempt starts
+
+    Discard the content received so far; the chunks of attempt `attempt + 1` follow.
+    Its message content is empty, so it is a valid ChatResponse for code that is not
+    aware of retries.
+
+    Attributes:
+        attempt: Number of the failed attempt, starting at 1
+        error: The ValidationError raised for the content of the failed attempt
+    """
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    attempt: int
+    error: ValidationError
+
+    @classmethod
+    def after(cls, chunk: ChatResponse | None, attempt: int, error: ValidationError) -> "StreamReset":
+        return cls(
+            model=chunk.model if chunk is not None else None,
+            created_at=chunk.created_at if chunk is not None else None,
+            message=Message(role="assistant", content=""),
+            done=False,
+            attempt=attempt,
+            error=error,
+        )
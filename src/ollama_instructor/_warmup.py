@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Iterable
+
+from ollama import AsyncClient, Client, ProcessResponse
+
+logger = logging.getLogger("ollama_instructor.warmup")
+
+
+def _normalize(model: str) -> str:
+    return model if ":" in model else f"{model}:latest"
+
+
+def due_models(models: Iterable[str], running: ProcessResponse, margin: float) -> list[str]:
+    """Models that are not loaded or whose keep-alive expires within `margin` seconds"""
+    expires = {_normalize(model.model or model.name or ""): model.expires_at for model in running.models}
+    now = datetime.now(timezone.utc)
+    due = []
+    for model in models:
+        name = _normalize(model)
+        if name not in expires:
+            due.append(model)
+            continue
+        expires_at = expires[name]
+        if expires_at is not None and (expires_at - now).total_seconds() < margin:
+            due.append(model)
+    return due
+
+
+class ModelKeeper:
+    """
+    Keeps a hot set of models loaded while there is no traffic for them
+
+    Every `interval` seconds the loaded models are listed (`/api/ps`). Models that
+    are not loaded or whose keep-alive would expire before the next check are
+    loaded again with `keep_alive`. Models in use are refreshed by their requests
+    and cost nothing but the check. Create it with `OllamaInstructor.keep_warm`.
+
+    Args:
+        client: The client to send the requests with
+        models: Names of the models to keep loaded
+        keep_alive: How long Ollama keeps a refreshed model loaded
+        interval: Seconds between two checks
+    """
+    def __init__(self, client: Client, models: Iterable[str], keep_alive: float | str = "30m", interval: float = 60.0) -> None:
+        self.client = client
+        self.models = list(models)
+        self.keep_alive = keep_alive
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def refresh(self) -> list[str]:
+        """Run a single check and return the models that were loaded again"""
+        due = due_models(self.models, self.client.ps(), margin=2 * self.interval)
+        for model in due:
+            self.client.chat(model=model, messages=[], keep_alive=self.keep_alive)
+            logger.debug("Refreshed keep-alive of %s", model)
+        return due
+
+    def start(self) -> "ModelKeeper":
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ollama-instructor-keeper", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning("Keep-alive refresh failed: %r", e)
+            if self._stop.wait(self.interval):
+                return
+
+    def __enter__(self) -> "ModelKeeper":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+class AsyncModelKeeper:
+    """
+    Like ModelKeeper, running as task of the event loop. Create it with
+    `OllamaInstructorAsync.keep_warm`.
+    """
+    def __init__(
+        self, client: AsyncClient, models: Iterable[str], keep_alive: float | str = "30m", interval: float = 60.0
+    ) -> None:
+        self.client = client
+        self.models = list(models)
+        self.keep_alive = keep_alive
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    async def refresh(self) -> list[str]:
+        """Run a single check and return the models that were loaded again"""
+        due = due_models(self.models, await self.client.ps(), margin=2 * self.interval)
+        for model in due:
+            await self.client.chat(model=model, messages=[], keep_alive=self.keep_alive)
+            logger.debug("Refreshed keep-alive of %s", model)
+        return due
+
+    def start(self) -> "AsyncModelKeeper":
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning("Keep-alive refresh failed: %r", e)
+            await asyncio.sleep(self.interval)
+
+    async def __aenter__(self) -> "AsyncModelKeeper":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
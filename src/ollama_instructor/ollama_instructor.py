@@ -1,12 +1,33 @@
 from ollama import Client, AsyncClient, Message, Options, ChatResponse
 from pydantic import BaseModel, ValidationError
-from typing import Type, Mapping, Any, Sequence, Literal
-import stamina
+from typing import Type, Mapping, Any, Sequence, Literal, Iterable, AsyncContextManager
+import asyncio
+import dataclasses
+import json
 import sys
 import logging
+import time
+from concurrent.futures import Executor
+from contextlib import nullcontext
 from datetime import timedelta
 
-from ._logging import LoggingMixin
+from ._batch import abatch, batch
+from ._cache import ResponseCache, areplay_chunks, make_cache_key, replay_chunks, with_content
+from ._coalesce import SingleFlight, StreamFanout, coalesce_key
+from ._connection import ConnectionConfig, ConnectionPool, client_kwargs
+from ._format import CompiledFormat, FormatRegistry, format_registry as _default_format_registry
+from ._hosts import route_scope
+from ._logging import LoggingMixin, RequestLogger, new_request_id
+from ._repair import JSONRepairer, Repair
+from ._split import RetryTarget, merge_parts, part_models, requested_fields, split_fields
+from ._scheduler import Scheduler, deadline_after, priority_scope
+from ._policy import RetryPolicy
+from ._retry import AttemptFailure, AttemptRequest, BlindRetry, RetryStrategy
+from ._metrics import AttemptRecorder, Instrumentation, NoopRecorder, record_attempt
+from ._partial import PartialValidator
+from ._stream import StreamBuffer
+from ._warmup import AsyncModelKeeper, ModelKeeper
+from ._types import BatchResult, ParsedChatResponse, PartialChatResponse, SplitChatResponse, StreamReset, T
 
 # copied from ollama-python library. See `_types.py` of ollama python package
 if sys.version_info < (3, 9):
@@ -14,6 +35,8 @@ if sys.version_info < (3, 9):
 else:
     from collections.abc import Iterator, AsyncIterator
 
+_NO_SCHEDULER = nullcontext()
+
 
 class OllamaInstructor(Client, LoggingMixin):
     """
@@ -25,13 +48,46 @@ class OllamaInstructor(Client, LoggingMixin):
 
     Methods:
         chat_stream: Stream responses from the LLM with schema validation
+        chat_stream_partial: Stream responses with incremental validation of the partial content
         chat_completion: Get a single response from the LLM with schema validation
+        chat_parsed: Like chat_completion, but returns the validated model alongside the response
+        chat_completion_batch: Run many chat completions in a thread pool
+        warmup: Load models into memory before the first request
+        keep_warm: Keep a hot set of models loaded in the background
 
      Args:
         *args: Arguments to pass to the Ollama Client
         enable_logging: Whether to enable logging
         log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
-        log_format: Logging format string
+        log_format: Logging format string. Records of requests carry `request_id`, `model`
+            and `attempt`, e.g. `%(asctime)s [%(request_id)s #%(attempt)s] %(message)s`
+        log_structured: Log one JSON object per record instead of using `log_format`
+        log_info_sample_rate: Fraction of requests whose INFO records are logged, to
+            reduce the log volume under heavy load
+        format_registry: Registry caching compiled format schemas. Defaults to the
+            registry shared by all clients
+        cache: Optional response cache (MemoryCache, SQLiteCache). Validated responses
+            are stored and identical requests (model, messages, format, options) are
+            answered from it. Only useful with deterministic options such as
+            temperature 0 and a fixed seed
+        retry_strategy: How a request is changed for the next attempt after its content
+            failed validation. Defaults to BlindRetry, which resends the identical request
+        retry_policy: When and how fast attempts are retried: deadline of a call, backoff
+            of validation failures and transport errors and an optional RetryBudget.
+            Defaults to retrying validation failures right away and transport errors
+            not at all
+        repair: Optional JSONRepairer that tries to fix near-valid content locally
+            before a retry is spent on it
+        instrumentation: Optional hook receiving an AttemptEvent per attempt (durations,
+            token counts, outcome). Without it no measurements are taken
+        targeted_retry: After the content of a completion failed validation, keep its
+            valid top-level fields and let the next attempt generate only the fields
+            with errors, then merge. Errors not tied to a field retry the whole object
+        connection: Connection pool limits, keep-alive expiry, timeouts per phase and
+            HTTP/2 of the underlying httpx client
+        pool: A ConnectionPool shared with other clients, instead of an own pool, or a
+            HostPool spreading the requests over several Ollama hosts. Its
+            ConnectionConfig applies; `connection` and `transport` must not be passed
         **kwargs: Keyword arguments to pass to the Ollama Client
     """
     def __init__(
@@ -40,13 +96,36 @@ class OllamaInstructor(Client, LoggingMixin):
         enable_logging: bool = False,
         log_level: Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"] = "INFO",
         log_format: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        log_structured: bool = False,
+        log_info_sample_rate: float = 1.0,
+        format_registry: FormatRegistry | None = None,
+        cache: ResponseCache | None = None,
+        retry_strategy: RetryStrategy | None = None,
+        retry_policy: RetryPolicy | None = None,
+        repair: JSONRepairer | None = None,
+        instrumentation: Instrumentation | None = None,
+        targeted_retry: bool = False,
+        connection: ConnectionConfig | None = None,
+        pool: ConnectionPool | None = None,
         **kwargs
     ):
-        super().__init__(*args, **kwargs)
+        super().__init__(*args, **client_kwargs(kwargs, connection, pool, asynchronous=False))
+        self.format_registry = format_registry if format_registry is not None else _default_format_registry
+        self.cache = cache
+        self.retry_strategy = retry_strategy if retry_strategy is not None else BlindRetry()
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.repair = repair
+        self.instrumentation = instrumentation
+        self.targeted_retry = targeted_retry
         self.logger = logging.getLogger(f"ollama_instructor.{self.__class__.__name__}")
 
         if enable_logging:
-            self.setup_logging(level=log_level, format=log_format)
+            self.setup_logging(
+                level=log_level,
+                format=log_format,
+                structured=log_structured,
+                info_sample_rate=log_info_sample_rate
+            )
 
         self.logger.debug("Initialized OllamaInstructor")
 
@@ -59,44 +138,222 @@ class OllamaInstructor(Client, LoggingMixin):
         keep_alive: float | str | None = None,
         *,
         retries: int = 3,
-        stamina_timeout: float | timedelta | None = None
+        stamina_timeout: float | timedelta | None = None,
+        buffer: StreamBuffer | None = None,
+        release: Literal["immediate", "validated"] = "immediate",
+        max_held_chars: int = 1_000_000
     ) -> Iterator[ChatResponse]:
-        self.logger.info(f"Starting chat stream with model: {model}")
-        self.logger.debug(f"Using format schema: {format.model_json_schema()}")
-        @stamina.retry(on=(ValidationError), attempts=retries, timeout=stamina_timeout)
-        def _chat_stream(
-            self,
-            format: Type[BaseModel],
-            model: str,
-            messages: Sequence[Mapping[str, Any] | Message] | None = None,
-            options: Mapping[str, Any] | Options | None = None,
-            keep_alive: float | str | None = None
-        ) -> Iterator[ChatResponse]:
-            response_iterator = self.chat(
-                model=model,
-                messages=messages,
-                format=format.model_json_schema(),
-                stream=True,
-                options=options,
-                keep_alive=keep_alive
-            )
-            self.logger.debug("Successfully initiated chat stream")
-            expand_content: str = ''
-            for chunk_data in response_iterator:
-                if chunk_data.message.content is not None:
-                    expand_content += chunk_data.message.content
-                    print(expand_content)
-                    if chunk_data.done:
-                        self.logger.info("Stream complete, validating final content")
-                        format.model_validate_json(expand_content)
-                        self.logger.debug("Content validation successful")
-                    #chunk_data.message.content = expand_content
-                    yield chunk_data
-                else:
-                    self.logger.error("Validation failed")
-                    raise ValidationError
-
-        return _chat_stream(self, format, model, messages, options, keep_alive)
+        """
+        Stream the response of the LLM and validate the complete content against `format`
+
+        When the content of an attempt fails validation, the stream is retried. How the
+        chunks of failed attempts reach the consumer depends on `release`:
+
+        - "immediate": chunks are yielded as they arrive. Before the chunks of a retry,
+          a StreamReset is yielded; discard the content received until then
+        - "validated": the chunks of an attempt are held back until its content passed
+          validation, so only the chunks of the successful attempt are yielded. An
+          attempt exceeding `max_held_chars` releases its chunks early and continues
+          like "immediate"
+
+        A failed attempt is closed right away, which stops the generation on the server.
+
+        The client's `repair` only applies to content that is still held back: the
+        repaired content is yielded instead of the held chunks. Content whose chunks
+        were already yielded is treated as a validation failure and retried.
+
+        Args:
+            buffer: Optional StreamBuffer that accumulates the content of the current
+                attempt. Read `buffer.text` to get the text streamed so far; it is only
+                joined when requested. The buffer is cleared when a retry starts.
+            release: "immediate" or "validated", see above
+            max_held_chars: Maximum content length held back with release="validated"
+        """
+        if release not in ("immediate", "validated"):
+            raise ValueError(f"unknown release {release!r}")
+        log = RequestLogger(self.logger, new_request_id(), model)
+        log.info("Starting chat stream")
+        compiled = self.format_registry.get(format)
+        log.debug("Using format schema: %s", compiled.schema)
+        cache_key = self._cache_key(compiled, model, messages, options)
+
+        def _chat_stream() -> Iterator[ChatResponse]:
+            content_buffer = buffer if buffer is not None else StreamBuffer()
+            cached = self.cache.get_response(cache_key) if cache_key is not None else None
+            if cached is not None:
+                log.debug("Response cache hit, replaying stream")
+                with self._record("stream", model, 0) as record:
+                    record.cache_hit()
+                    content_buffer.clear()
+                    for chunk_data in replay_chunks(cached):
+                        record.chunk()
+                        content_buffer.append(chunk_data.message.content or "")
+                        if chunk_data.done:
+                            record.set_response(chunk_data)
+                        yield chunk_data
+                return
+
+            original = AttemptRequest(messages=messages, options=options)
+            request = original
+            retrying = self.retry_policy.retrying(retries, stamina_timeout, transport=False)
+            with route_scope() as route:
+                for attempt in retrying:
+                    with attempt, self._record("stream", model, attempt.num) as record:
+                        attempt_log = log.for_attempt(attempt.num)
+                        content_buffer.clear()
+                        response_iterator = self.chat(
+                            model=model,
+                            messages=request.messages,
+                            format=compiled.schema,
+                            stream=True,
+                            options=request.options,
+                            keep_alive=keep_alive
+                        )
+                        attempt_log.debug("Successfully initiated chat stream")
+                        held: list[ChatResponse] | None = [] if release == "validated" else None
+                        released = False
+                        repaired = False
+                        chunk_data = None
+                        try:
+                            for chunk_data in response_iterator:
+                                record.chunk()
+                                if chunk_data.message.content is None:
+                                    attempt_log.error("Response chunk without content")
+                                    raise compiled.no_content_error()
+                                content_buffer.append(chunk_data.message.content)
+                                if chunk_data.done:
+                                    attempt_log.info("Stream complete, validating final content")
+                                    record.set_response(chunk_data)
+                                    content = content_buffer.getvalue()
+                                    with record.validation():
+                                        try:
+                                            compiled.validate_json(content)
+                                        except ValidationError as e:
+                                            # Chunks already yielded cannot be taken back, only held content is repaired
+                                            repair = self._repair(compiled, content, e) if held is not None else None
+                                            if repair is None:
+                                                raise
+                                            record.repaired()
+                                            content = repair.content
+                                            repaired = True
+                                    attempt_log.debug("Content validation successful")
+                                    if cache_key is not None:
+                                        self.cache.set_response(cache_key, with_content(chunk_data, content))
+                                if held is None:
+                                    released = True
+                                    yield chunk_data
+                                    continue
+                                held.append(chunk_data)
+                                if chunk_data.done:
+                                    yield from replay_chunks(with_content(chunk_data, content)) if repaired else held
+                                elif len(content_buffer) > max_held_chars:
+                                    attempt_log.warning("Releasing held chunks after %d characters", len(content_buffer))
+                                    released = True
+                                    yield from held
+                                    held = None
+                        except ValidationError as e:
+                            attempt_log.error("Validation failed with %d errors", e.error_count())
+                            route.avoid_last()
+                            request = self.retry_strategy.next_request(
+                                original, AttemptFailure(attempt=attempt.num, error=e, content=content_buffer.getvalue())
+                            )
+                            if released and retrying.will_retry(e):
+                                yield StreamReset.after(chunk_data, attempt.num, e)
+                            raise
+                        finally:
+                            response_iterator.close()
+
+        return _chat_stream()
+
+    def chat_stream_partial(
+        self,
+        format: Type[T],
+        model: str,
+        messages: Sequence[Mapping[str, Any] | Message] | None = None,
+        options: Mapping[str, Any] | Options | None = None,
+        keep_alive: float | str | None = None,
+        *,
+        retries: int = 3,
+        stamina_timeout: float | timedelta | None = None
+    ) -> Iterator[PartialChatResponse[T]]:
+        """
+        Stream the response of the LLM and validate it incrementally while it arrives
+
+        Every chunk is yielded together with an instance of the partial variant of
+        `format` (all fields optional) holding the values completed so far. As soon
+        as the content can no longer become valid (invalid JSON, a value of the wrong
+        type, an unknown key for models forbidding extra fields) the stream is closed,
+        which stops the generation on the server, and the next attempt starts right away.
+        Chunks of a new attempt carry a higher `attempt` number.
+        """
+        log = RequestLogger(self.logger, new_request_id(), model)
+        log.info("Starting partial chat stream")
+        compiled = self.format_registry.get(format)
+        log.debug("Using format schema: %s", compiled.schema)
+        def _chat_stream_partial() -> Iterator[PartialChatResponse[T]]:
+            original = AttemptRequest(messages=messages, options=options)
+            request = original
+            with route_scope() as route:
+                for attempt in self.retry_policy.retrying(retries, stamina_timeout, transport=False):
+                    with attempt, self._record("stream_partial", model, attempt.num) as record:
+                        attempt_log = log.for_attempt(attempt.num)
+                        response_iterator = self.chat(
+                            model=model,
+                            messages=request.messages,
+                            format=compiled.schema,
+                            stream=True,
+                            options=request.options,
+                            keep_alive=keep_alive
+                        )
+                        attempt_log.debug("Successfully initiated partial chat stream")
+                        content_buffer = StreamBuffer()
+                        validator = PartialValidator(compiled)
+                        try:
+                            for chunk_data in response_iterator:
+                                record.chunk()
+                                if chunk_data.message.content is None:
+                                    attempt_log.error("Response chunk without content")
+                                    raise compiled.no_content_error()
+                                content_buffer.append(chunk_data.message.content)
+                                try:
+                                    with record.validation():
+                                        partial = validator.feed(chunk_data.message.content)
+                                except ValidationError:
+                                    attempt_log.warning(
+                                        "Aborting stream after %d characters, content can no longer become valid",
+                                        len(content_buffer)
+                                    )
+                                    raise
+                                parsed = None
+                                if chunk_data.done:
+                                    attempt_log.info("Stream complete, validating final content")
+                                    record.set_response(chunk_data)
+                                    with record.validation():
+                                        try:
+                                            parsed = compiled.validate_json(content_buffer.getvalue())
+                                        except ValidationError as e:
+                                            repair = self._repair(compiled, content_buffer.getvalue(), e)
+                                            if repair is None:
+                                                raise
+                                            record.repaired()
+                                            parsed = repair.parsed
+                                    attempt_log.debug("Content validation successful")
+                                yield PartialChatResponse(
+                                    partial=partial,
+                                    chunk=chunk_data,
+                                    attempt=attempt.num,
+                                    parsed=parsed
+                                )
+                        except ValidationError as e:
+                            route.avoid_last()
+                            request = self.retry_strategy.next_request(
+                                original, AttemptFailure(attempt=attempt.num, error=e, content=content_buffer.getvalue())
+                            )
+                            raise
+                        finally:
+                            response_iterator.close()
+
+        return _chat_stream_partial()
 
     def chat_completion(
         self,
@@ -109,34 +366,267 @@ class OllamaInstructor(Client, LoggingMixin):
         retries: int = 3,
         stamina_timeout: float | timedelta | None = None
     ) -> ChatResponse | None:
-        self.logger.info(f"Starting chat completion with model: {model}")
-        @stamina.retry(on=(ValidationError), attempts=retries, timeout=stamina_timeout)
-        def _chat_completion(
-            self,
-            format: Type[BaseModel],
-            model: str,
-            messages: Sequence[Mapping[str, Any] | Message] | None = None,
-            options: Mapping[str, Any] | Options | None = None,
-            keep_alive: float | str | None = None
-        ) -> ChatResponse:
-            response = self.chat(
-                model=model,
-                messages=messages,
-                format=format.model_json_schema(),
-                stream=False,
-                options=options,
-                keep_alive=keep_alive
-            )
-            self.logger.debug("Successfully initiated chat completion")
-            if response.message.content is not None:
-                format.model_validate_json(response.message.content)
-                self.logger.debug("Content validation successful")
-                return response
-            else:
-                self.logger.error("Validation failed")
-                raise ValidationError
+        parsed_response = self.chat_parsed(
+            format=format,
+            model=model,
+            messages=messages,
+            options=options,
+            keep_alive=keep_alive,
+            retries=retries,
+            stamina_timeout=stamina_timeout
+        )
+        return parsed_response.response
+
+    def chat_parsed(
+        self,
+        format: Type[T],
+        model: str,
+        messages: Sequence[Mapping[str, Any] | Message] | None = None,
+        options: Mapping[str, Any] | Options | None = None,
+        keep_alive: float | str | None = None,
+        *,
+        retries: int = 3,
+        stamina_timeout: float | timedelta | None = None
+    ) -> ParsedChatResponse[T]:
+        """
+        Like `chat_completion`, but also returns the validated instance of `format`
+
+        The response content is validated exactly once. Use `parsed` of the result
+        instead of calling `model_validate_json` on the content again.
+        """
+        compiled = self.format_registry.get(format)
+        return self._chat_parsed(compiled, model, messages, options, keep_alive, retries, stamina_timeout)
 
-        return _chat_completion(self, format, model, messages, options, keep_alive)
+    def chat_completion_batch(
+        self,
+        format: Type[T],
+        model: str,
+        messages_list: Sequence[Sequence[Mapping[str, Any] | Message]],
+        options: Mapping[str, Any] | Options | None = None,
+        keep_alive: float | str | None = None,
+        *,
+        max_workers: int = 4,
+        timeout: float | None = None,
+        executor: Executor | None = None,
+        retries: int = 3,
+        stamina_timeout: float | timedelta | None = None
+    ) -> list[BatchResult[T]]:
+        """
+        Run a chat completion for every message list in a thread pool
+
+        At most `max_workers` requests are in flight at any time; all of them share
+        the connection pool of this client. A failing item does not cancel the batch;
+        its exception is stored in its BatchResult.
+
+        Args:
+            max_workers: Number of requests in flight. Size it to the parallel slots
+                of the Ollama server (`OLLAMA_NUM_PARALLEL`)
+            timeout: Seconds a single item may take, retries included. Items exceeding
+                it are reported with a TimeoutError
+            executor: Executor to run the requests in. By default a ThreadPoolExecutor
+                with `max_workers` threads is created for the call
+
+        Returns:
+            One BatchResult per message list, in input order
+        """
+        results: list[BatchResult[T]] = [None] * len(messages_list)  # type: ignore[list-item]
+        for result in self.chat_completion_batch_iter(
+            format=format,
+            model=model,
+            messages_list=messages_list,
+            options=options,
+            keep_alive=keep_alive,
+            max_workers=max_workers,
+            timeout=timeout,
+            executor=executor,
+            retries=retries,
+            stamina_timeout=stamina_timeout
+        ):
+            results[result.index] = result
+        return results
+
+    def chat_completion_batch_iter(
+        self,
+        format: Type[T],
+        model: str,
+        messages_list: Iterable[Sequence[Mapping[str, Any] | Message]],
+        options: Mapping[str, Any] | Options | None = None,
+        keep_alive: float | str | None = None,
+        *,
+        max_workers: int = 4,
+        timeout: float | None = None,
+        executor: Executor | None = None,
+        retries: int = 3,
+        stamina_timeout: float | timedelta | None = None
+    ) -> Iterator[BatchResult[T]]:
+        """
+        Like `chat_completion_batch`, but yields the results in completion order
+
+        `messages_list` is consumed lazily, so it may be a generator over a large queue.
+        """
+        self.logger.info("Starting chat completion batch with model %s", model)
+        compiled = self.format_registry.get(format)
+
+        def run(messages: Sequence[Mapping[str, Any] | Message]) -> ParsedChatResponse[T]:
+            return self._chat_parsed(compiled, model, messages, options, keep_alive, retries, stamina_timeout)
+
+        return batch(run, messages_list, max_workers, timeout=timeout, executor=executor)
+
+    def warmup(
+        self,
+        models: str | Iterable[str],
+        keep_alive: float | str | None = None,
+        formats: Iterable[Type[BaseModel]] = ()
+    ) -> dict[str, float]:
+        """
+        Load models into memory so the first request does not pay the load time
+
+        Args:
+            models: Name or names of the models to load
+            keep_alive: How long Ollama keeps the models loaded, e.g. "30m" or -1 for
+                forever. The server default (5 minutes) if None
+            formats: Format models whose JSON schemas are compiled ahead as well
+
+        Returns:
+            The seconds each model took to load, as reported by Ollama. Models that
+            were loaded already take about 0
+        """
+        for format in formats:
+            self.format_registry.get(format)
+        durations = {}
+        for model in [models] if isinstance(models, str) else models:
+            response = self.chat(model=model, messages=[], keep_alive=keep_alive)
+            durations[model] = (response.load_duration or 0) / 1e9
+            self.logger.info("Loaded model %s in %.2fs", model, durations[model])
+        return durations
+
+    def keep_warm(
+        self,
+        models: Iterable[str],
+        keep_alive: float | str = "30m",
+        interval: float = 60.0
+    ) -> ModelKeeper:
+        """
+        Keep `models` loaded from a background thread while they are idle
+
+        Every `interval` seconds, models that are unloaded or about to expire are
+        loaded again with `keep_alive`. Call `stop()` on the returned keeper, or use
+        it as context manager, to end it.
+        """
+        return ModelKeeper(self, models, keep_alive=keep_alive, interval=interval).start()
+
+    def _chat_parsed(
+        self,
+        compiled: CompiledFormat[T],
+        model: str,
+        messages: Sequence[Mapping[str, Any] | Message] | None,
+        options: Mapping[str, Any] | Options | None,
+        keep_alive: float | str | None,
+        retries: int,
+        stamina_timeout: float | timedelta | None
+    ) -> ParsedChatResponse[T]:
+        log = RequestLogger(self.logger, new_request_id(), model)
+        log.info("Starting chat completion")
+        cache_key = self._cache_key(compiled, model, messages, options)
+        if cache_key is not None:
+            cached = self.cache.get_response(cache_key)
+            if cached is not None:
+                log.debug("Response cache hit")
+                with self._record("completion", model, 0) as record:
+                    record.cache_hit()
+                    record.set_response(cached)
+                    started = time.perf_counter()
+                    parsed = compiled.validate_json(cached.message.content)
+                    return ParsedChatResponse(
+                        parsed=parsed, response=cached, validation_duration=time.perf_counter() - started, attempts=0
+                    )
+
+        original = AttemptRequest(messages=messages, options=options)
+        request = original
+        target = RetryTarget(compiled, self.format_registry) if self.targeted_retry else None
+        with route_scope() as route:
+            for attempt in self.retry_policy.retrying(retries, stamina_timeout):
+                with attempt, self._record("completion", model, attempt.num) as record:
+                    attempt_log = log.for_attempt(attempt.num)
+                    response = self.chat(
+                        model=model,
+                        messages=request.messages,
+                        format=target.format.schema if target is not None else compiled.schema,
+                        stream=False,
+                        options=request.options,
+                        keep_alive=keep_alive
+                    )
+                    attempt_log.debug("Successfully initiated chat completion")
+                    record.set_response(response)
+                    repairs: tuple[str, ...] = ()
+                    started = time.perf_counter()
+                    content = response.message.content
+                    if target is not None:
+                        content = target.merge(content)
+                    try:
+                        with record.validation():
+                            if content is None:
+                                raise compiled.no_content_error()
+                            parsed = compiled.validate_json(content)
+                    except ValidationError as e:
+                        repair = self._repair(compiled, content, e)
+                        if repair is None:
+                            attempt_log.error("Validation failed with %d errors", e.error_count())
+                            route.avoid_last()
+                            if target is not None:
+                                target.narrow(content, e)
+                                if target.fields is not None:
+                                    attempt_log.info("Retrying only the fields %s", ", ".join(target.fields))
+                            request = self.retry_strategy.next_request(original, AttemptFailure(
+                                attempt=attempt.num,
+                                error=e,
+                                content=content,
+                                fields=requested_fields(target.format if target is not None else compiled)
+                            ))
+                            raise
+                        record.repaired()
+                        parsed, repairs = repair.parsed, repair.steps
+                        response = with_content(response, repair.content)
+                    else:
+                        if content is not response.message.content:
+                            response = with_content(response, content)
+                    validation_duration = time.perf_counter() - started
+                    attempt_log.debug("Content validation successful")
+
+        result = ParsedChatResponse(
+            parsed=parsed,
+            response=response,
+            repairs=repairs,
+            validation_duration=validation_duration,
+            attempts=attempt.num
+        )
+        if cache_key is not None:
+            self.cache.set_response(cache_key, result.response)
+        return result
+
+    def _record(self, kind: str, model: str, attempt: int) -> AttemptRecorder | NoopRecorder:
+        return record_attempt(self.instrumentation, kind, model, attempt)
+
+    def _repair(self, compiled: CompiledFormat[T], content: str | None, error: ValidationError) -> Repair[T] | None:
+        if self.repair is None:
+            return None
+        return self.repair.repair(compiled, content, error)
+
+    def _cache_key(
+        self,
+        compiled: CompiledFormat,
+        model: str,
+        messages: Sequence[Mapping[str, Any] | Message] | None,
+        options: Mapping[str, Any] | Options | None
+    ) -> str | None:
+        if self.cache is None:
+            return None
+        return make_cache_key(model, messages, compiled.schema_json, options)
+
+
+def _copy_parsed(result: ParsedChatResponse[T]) -> ParsedChatResponse[T]:
+    """The result for a coalesced caller, with its own copy of the parsed model"""
+    return dataclasses.replace(result, parsed=result.parsed.model_copy(deep=True))
 
 
 class OllamaInstructorAsync(AsyncClient, LoggingMixin):
@@ -149,13 +639,55 @@ class OllamaInstructorAsync(AsyncClient, LoggingMixin):
 
     Methods:
         chat_stream: Stream responses from the LLM with schema validation
+        chat_stream_partial: Stream responses with incremental validation of the partial content
         chat_completion: Get a single response from the LLM with schema validation
+        chat_parsed: Like chat_completion, but returns the validated model alongside the response
+        chat_parsed_split: Extract the fields of a large model in concurrent groups
+        chat_completion_batch: Run many chat completions with bounded concurrency
+        warmup: Load models into memory before the first request
+        keep_warm: Keep a hot set of models loaded in the background
 
     Args:
         *args: Arguments to pass to the Ollama AsyncClient
         enable_logging: Whether to enable logging
         log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
-        log_format: Logging format string
+        log_format: Logging format string. Records of requests carry `request_id`, `model`
+            and `attempt`, e.g. `%(asctime)s [%(request_id)s #%(attempt)s] %(message)s`
+        log_structured: Log one JSON object per record instead of using `log_format`
+        log_info_sample_rate: Fraction of requests whose INFO records are logged, to
+            reduce the log volume under heavy load
+        format_registry: Registry caching compiled format schemas. Defaults to the
+            registry shared by all clients
+        cache: Optional response cache (MemoryCache, SQLiteCache). Validated responses
+            are stored and identical requests (model, messages, format, options) are
+            answered from it. Only useful with deterministic options such as
+            temperature 0 and a fixed seed
+        retry_strategy: How a request is changed for the next attempt after its content
+            failed validation. Defaults to BlindRetry, which resends the identical request
+        retry_policy: When and how fast attempts are retried: deadline of a call, backoff
+            of validation failures and transport errors and an optional RetryBudget.
+            Defaults to retrying validation failures right away and transport errors
+            not at all
+        repair: Optional JSONRepairer that tries to fix near-valid content locally
+            before a retry is spent on it
+        instrumentation: Optional hook receiving an AttemptEvent per attempt (durations,
+            token counts, outcome). Without it no measurements are taken
+        targeted_retry: After the content of a completion failed validation, keep its
+            valid top-level fields and let the next attempt generate only the fields
+            with errors, then merge. Errors not tied to a field retry the whole object
+        connection: Connection pool limits, keep-alive expiry, timeouts per phase and
+            HTTP/2 of the underlying httpx client
+        pool: A ConnectionPool shared with other clients, instead of an own pool, or a
+            HostPool spreading the requests over several Ollama hosts. Its
+            ConnectionConfig applies; `connection` and `transport` must not be passed
+        coalesce: Collapse concurrent requests with identical model, messages, format,
+            options, keep-alive, retries and timeout into one generation. Callers
+            that joined get their own copy of the parsed model. Streams without a
+            `buffer` share one upstream stream if `release` and `max_held_chars`
+            match as well
+        scheduler: Optional Scheduler limiting the requests sent per model at once and
+            queueing the rest by priority. Requests of the batch methods are "bulk",
+            all others "interactive" unless sent within a `priority_scope`
         **kwargs: Keyword arguments to pass to the Ollama AsyncClient
     """
     def __init__(
@@ -164,13 +696,41 @@ class OllamaInstructorAsync(AsyncClient, LoggingMixin):
         enable_logging: bool = False,
         log_level: Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"] = "INFO",
         log_format: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        log_structured: bool = False,
+        log_info_sample_rate: float = 1.0,
+        format_registry: FormatRegistry | None = None,
+        cache: ResponseCache | None = None,
+        retry_strategy: RetryStrategy | None = None,
+        retry_policy: RetryPolicy | None = None,
+        repair: JSONRepairer | None = None,
+        instrumentation: Instrumentation | None = None,
+        targeted_retry: bool = False,
+        connection: ConnectionConfig | None = None,
+        pool: ConnectionPool | None = None,
+        coalesce: bool = False,
+        scheduler: Scheduler | None = None,
         **kwargs
     ):
-        super().__init__(*args, **kwargs)
+        super().__init__(*args, **client_kwargs(kwargs, connection, pool, asynchronous=True))
+        self.format_registry = format_registry if format_registry is not None else _default_format_registry
+        self.cache = cache
+        self.retry_strategy = retry_strategy if retry_strategy is not None else BlindRetry()
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.repair = repair
+        self.instrumentation = instrumentation
+        self.targeted_retry = targeted_retry
+        self._single_flight: SingleFlight[ParsedChatResponse] | None = SingleFlight() if coalesce else None
+        self._stream_fanout: StreamFanout[ChatResponse] | None = StreamFanout() if coalesce else None
+        self.scheduler = scheduler
         self.logger = logging.getLogger(f"ollama_instructor.{self.__class__.__name__}")
 
         if enable_logging:
-            self.setup_logging(level=log_level, format=log_format)
+            self.setup_logging(
+                level=log_level,
+                format=log_format,
+                structured=log_structured,
+                info_sample_rate=log_info_sample_rate
+            )
 
         self.logger.debug("Initialized OllamaInstructorAsync")
 
@@ -183,43 +743,238 @@ class OllamaInstructorAsync(AsyncClient, LoggingMixin):
         keep_alive: float | str | None = None,
         *,
         retries: int = 3,
-        stamina_timeout: float | timedelta | None = None
+        stamina_timeout: float | timedelta | None = None,
+        buffer: StreamBuffer | None = None,
+        release: Literal["immediate", "validated"] = "immediate",
+        max_held_chars: int = 1_000_000
     ) -> AsyncIterator[ChatResponse]:
-        self.logger.info(f"Starting async chat stream with model: {model}")
-        self.logger.debug(f"Using format schema: {format.model_json_schema()}")
-        @stamina.retry(on=(ValidationError), attempts=retries, timeout=stamina_timeout)
-        async def _chat_stream(
-            self,
-            format: Type[BaseModel],
-            model: str,
-            messages: Sequence[Mapping[str, Any] | Message] | None = None,
-            options: Mapping[str, Any] | Options | None = None,
-            keep_alive: float | str | None = None
-        ) -> AsyncIterator[ChatResponse]:
-            response_iterator = await self.chat(
-                model=model,
-                messages=messages,
-                format=format.model_json_schema(),
-                stream=True,
-                options=options,
-                keep_alive=keep_alive
+        """
+        Stream the response of the LLM and validate the complete content against `format`
+
+        When the content of an attempt fails validation, the stream is retried. How the
+        chunks of failed attempts reach the consumer depends on `release`:
+
+        - "immediate": chunks are yielded as they arrive. Before the chunks of a retry,
+          a StreamReset is yielded; discard the content received until then
+        - "validated": the chunks of an attempt are held back until its content passed
+          validation, so only the chunks of the successful attempt are yielded. An
+          attempt exceeding `max_held_chars` releases its chunks early and continues
+          like "immediate"
+
+        A failed attempt is closed right away, which stops the generation on the server.
+
+        The client's `repair` only applies to content that is still held back: the
+        repaired content is yielded instead of the held chunks. Content whose chunks
+        were already yielded is treated as a validation failure and retried.
+
+        Args:
+            buffer: Optional StreamBuffer that accumulates the content of the current
+                attempt. Read `buffer.text` to get the text streamed so far; it is only
+                joined when requested. The buffer is cleared when a retry starts.
+            release: "immediate" or "validated", see above
+            max_held_chars: Maximum content length held back with release="validated"
+        """
+        if release not in ("immediate", "validated"):
+            raise ValueError(f"unknown release {release!r}")
+        log = RequestLogger(self.logger, new_request_id(), model)
+        log.info("Starting async chat stream")
+        compiled = self.format_registry.get(format)
+        log.debug("Using format schema: %s", compiled.schema)
+        cache_key = self._cache_key(compiled, model, messages, options)
+
+        async def _chat_stream() -> AsyncIterator[ChatResponse]:
+            content_buffer = buffer if buffer is not None else StreamBuffer()
+            cached = self.cache.get_response(cache_key) if cache_key is not None else None
+            if cached is not None:
+                log.debug("Response cache hit, replaying stream")
+                with self._record("stream", model, 0) as record:
+                    record.cache_hit()
+                    content_buffer.clear()
+                    async for chunk_data in areplay_chunks(cached):
+                        record.chunk()
+                        content_buffer.append(chunk_data.message.content or "")
+                        if chunk_data.done:
+                            record.set_response(chunk_data)
+                        yield chunk_data
+                return
+
+            original = AttemptRequest(messages=messages, options=options)
+            request = original
+            deadline = deadline_after(self.retry_policy.timeout(stamina_timeout))
+            retrying = self.retry_policy.retrying(retries, stamina_timeout, transport=False)
+            with route_scope() as route:
+                async for attempt in retrying:
+                    with attempt, self._record("stream", model, attempt.num) as record:
+                        attempt_log = log.for_attempt(attempt.num)
+                        content_buffer.clear()
+                        async with self._admit(model, deadline):
+                            response_iterator = await self.chat(
+                                model=model,
+                                messages=request.messages,
+                                format=compiled.schema,
+                                stream=True,
+                                options=request.options,
+                                keep_alive=keep_alive
+                            )
+                            attempt_log.debug("Successfully initiated async chat stream")
+                            held: list[ChatResponse] | None = [] if release == "validated" else None
+                            released = False
+                            repaired = False
+                            chunk_data = None
+                            try:
+                                async for chunk_data in response_iterator:
+                                    record.chunk()
+                                    if chunk_data.message.content is None:
+                                        attempt_log.error("Response chunk without content")
+                                        raise compiled.no_content_error()
+                                    content_buffer.append(chunk_data.message.content)
+                                    if chunk_data.done:
+                                        attempt_log.info("Stream complete, validating final content")
+                                        record.set_response(chunk_data)
+                                        content = content_buffer.getvalue()
+                                        with record.validation():
+                                            try:
+                                                compiled.validate_json(content)
+                                            except ValidationError as e:
+                                                # Chunks already yielded cannot be taken back, only held content is repaired
+                                                repair = self._repair(compiled, content, e) if held is not None else None
+                                                if repair is None:
+                                                    raise
+                                                record.repaired()
+                                                content = repair.content
+                                                repaired = True
+                                        attempt_log.debug("Content validation successful")
+                                        if cache_key is not None:
+                                            self.cache.set_response(cache_key, with_content(chunk_data, content))
+                                    if held is None:
+                                        released = True
+                                        yield chunk_data
+                                        continue
+                                    held.append(chunk_data)
+                                    if chunk_data.done:
+                                        if repaired:
+                                            held = list(replay_chunks(with_content(chunk_data, content)))
+                                        for held_chunk in held:
+                                            yield held_chunk
+                                    elif len(content_buffer) > max_held_chars:
+                                        attempt_log.warning("Releasing held chunks after %d characters", len(content_buffer))
+                                        released = True
+                                        for held_chunk in held:
+                                            yield held_chunk
+                                        held = None
+                            except ValidationError as e:
+                                attempt_log.error("Validation failed with %d errors", e.error_count())
+                                route.avoid_last()
+                                request = self.retry_strategy.next_request(
+                                    original, AttemptFailure(attempt=attempt.num, error=e, content=content_buffer.getvalue())
+                                )
+                                if released and retrying.will_retry(e):
+                                    yield StreamReset.after(chunk_data, attempt.num, e)
+                                raise
+                            finally:
+                                await response_iterator.aclose()
+
+        if self._stream_fanout is not None and buffer is None:
+            return self._stream_fanout.subscribe(
+                coalesce_key(
+                    make_cache_key(model, messages, compiled.schema_json, options),
+                    keep_alive, retries, stamina_timeout, release, max_held_chars
+                ),
+                _chat_stream
             )
-            self.logger.debug("Successfully initiated async chat stream")
-            expand_content: str = ''
-            async for chunk_data in response_iterator:
-                if chunk_data.message.content is not None:
-                    expand_content += chunk_data.message.content
-                    if chunk_data.done:
-                        self.logger.info("Stream complete, validating final content")
-                        format.model_validate_json(expand_content)
-                        self.logger.debug("Content validation successful")
-                    #chunk_data.message.content = expand_content
-                    yield chunk_data
-                else:
-                    self.logger.error("Validation failed")
-                    raise ValidationError
-
-        return _chat_stream(self, format, model, messages, options, keep_alive)
+        return _chat_stream()
+
+    async def chat_stream_partial(
+        self,
+        format: Type[T],
+        model: str,
+        messages: Sequence[Mapping[str, Any] | Message] | None = None,
+        options: Mapping[str, Any] | Options | None = None,
+        keep_alive: float | str | None = None,
+        *,
+        retries: int = 3,
+        stamina_timeout: float | timedelta | None = None
+    ) -> AsyncIterator[PartialChatResponse[T]]:
+        """
+        Stream the response of the LLM and validate it incrementally while it arrives
+
+        Every chunk is yielded together with an instance of the partial variant of
+        `format` (all fields optional) holding the values completed so far. As soon
+        as the content can no longer become valid (invalid JSON, a value of the wrong
+        type, an unknown key for models forbidding extra fields) the stream is closed,
+        which stops the generation on the server, and the next attempt starts right away.
+        Chunks of a new attempt carry a higher `attempt` number.
+        """
+        log = RequestLogger(self.logger, new_request_id(), model)
+        log.info("Starting async partial chat stream")
+        compiled = self.format_registry.get(format)
+        log.debug("Using format schema: %s", compiled.schema)
+        async def _chat_stream_partial() -> AsyncIterator[PartialChatResponse[T]]:
+            original = AttemptRequest(messages=messages, options=options)
+            request = original
+            deadline = deadline_after(self.retry_policy.timeout(stamina_timeout))
+            with route_scope() as route:
+                async for attempt in self.retry_policy.retrying(retries, stamina_timeout, transport=False):
+                    with attempt, self._record("stream_partial", model, attempt.num) as record:
+                        attempt_log = log.for_attempt(attempt.num)
+                        async with self._admit(model, deadline):
+                            response_iterator = await self.chat(
+                                model=model,
+                                messages=request.messages,
+                                format=compiled.schema,
+                                stream=True,
+                                options=request.options,
+                                keep_alive=keep_alive
+                            )
+                            attempt_log.debug("Successfully initiated async partial chat stream")
+                            content_buffer = StreamBuffer()
+                            validator = PartialValidator(compiled)
+                            try:
+                                async for chunk_data in response_iterator:
+                                    record.chunk()
+                                    if chunk_data.message.content is None:
+                                        attempt_log.error("Response chunk without content")
+                                        raise compiled.no_content_error()
+                                    content_buffer.append(chunk_data.message.content)
+                                    try:
+                                        with record.validation():
+                                            partial = validator.feed(chunk_data.message.content)
+                                    except ValidationError:
+                                        attempt_log.warning(
+                                            "Aborting stream after %d characters, content can no longer become valid",
+                                            len(content_buffer)
+                                        )
+                                        raise
+                                    parsed = None
+                                    if chunk_data.done:
+                                        attempt_log.info("Stream complete, validating final content")
+                                        record.set_response(chunk_data)
+                                        with record.validation():
+                                            try:
+                                                parsed = compiled.validate_json(content_buffer.getvalue())
+                                            except ValidationError as e:
+                                                repair = self._repair(compiled, content_buffer.getvalue(), e)
+                                                if repair is None:
+                                                    raise
+                                                record.repaired()
+                                                parsed = repair.parsed
+                                        attempt_log.debug("Content validation successful")
+                                    yield PartialChatResponse(
+                                        partial=partial,
+                                        chunk=chunk_data,
+                                        attempt=attempt.num,
+                                        parsed=parsed
+                                    )
+                            except ValidationError as e:
+                                route.avoid_last()
+                                request = self.retry_strategy.next_request(
+                                    original, AttemptFailure(attempt=attempt.num, error=e, content=content_buffer.getvalue())
+                                )
+                                raise
+                            finally:
+                                await response_iterator.aclose()
+
+        return _chat_stream_partial()
 
     async def chat_completion(
         self,
@@ -232,31 +987,317 @@ class OllamaInstructorAsync(AsyncClient, LoggingMixin):
         retries: int = 3,
         stamina_timeout: float | timedelta | None = None
     ) -> ChatResponse:
-        self.logger.info(f"Starting chat completion with model: {model}")
-        @stamina.retry(on=(ValidationError), attempts=retries, timeout=stamina_timeout)
-        async def _chat_completion(
-            self,
-            format: Type[BaseModel],
-            model: str,
-            messages: Sequence[Mapping[str, Any] | Message] | None = None,
-            options: Mapping[str, Any] | Options | None = None,
-            keep_alive: float | str | None = None
-        ) -> ChatResponse:
-            response = await self.chat(
-                model=model,
-                messages=messages,
-                format=format.model_json_schema(),
-                stream=False,
-                options=options,
-                keep_alive=keep_alive
-            )
-            self.logger.debug("Successfully initiated chat completion")
-            if response.message.content is not None:
-                format.model_validate_json(response.message.content)
-                self.logger.debug("Content validation successful")
-                return response
-            else:
-                self.logger.error("Validation failed")
-                raise ValidationError
-
-        return await _chat_completion(self, format, model, messages, options, keep_alive)
+        parsed_response = await self.chat_parsed(
+            format=format,
+            model=model,
+            messages=messages,
+            options=options,
+            keep_alive=keep_alive,
+            retries=retries,
+            stamina_timeout=stamina_timeout
+        )
+        return parsed_response.response
+
+    async def chat_parsed(
+        self,
+        format: Type[T],
+        model: str,
+        messages: Sequence[Mapping[str, Any] | Message] | None = None,
+        options: Mapping[str, Any] | Options | None = None,
+        keep_alive: float | str | None = None,
+        *,
+        retries: int = 3,
+        stamina_timeout: float | timedelta | None = None
+    ) -> ParsedChatResponse[T]:
+        """
+        Like `chat_completion`, but also returns the validated instance of `format`
+
+        The response content is validated exactly once. Use `parsed` of the result
+        instead of calling `model_validate_json` on the content again.
+        """
+        compiled = self.format_registry.get(format)
+        return await self._chat_parsed(compiled, model, messages, options, keep_alive, retries, stamina_timeout)
+
+    async def chat_parsed_split(
+        self,
+        format: Type[T],
+        model: str,
+        messages: Sequence[Mapping[str, Any] | Message] | None = None,
+        options: Mapping[str, Any] | Options | None = None,
+        keep_alive: float | str | None = None,
+        *,
+        groups: int | Sequence[Sequence[str]] = 2,
+        retries: int = 3,
+        stamina_timeout: float | timedelta | None = None
+    ) -> SplitChatResponse[T]:
+        """
+        Like `chat_parsed`, but extract the top-level fields of `format` in groups
+
+        Every group is requested concurrently with a schema holding only its fields,
+        so several short generations replace one long one. A group whose content
+        fails validation is retried on its own, up to `retries` attempts, while the
+        others keep their results. The contents of the groups are then validated
+        together against `format`, which runs its validators; as the groups do
+        not see each other, a failing cross-field validator raises ValidationError
+        without retry.
+
+        Args:
+            groups: Number of groups, balanced by the schema size of their fields,
+                or the field names of every group, e.g. `[["name", "address"], ["items"]]`
+        """
+        compiled = self.format_registry.get(format)
+        field_groups = split_fields(compiled, groups)
+        self.logger.debug("Extracting %s in %d groups", format.__name__, len(field_groups))
+        tasks = [
+            asyncio.ensure_future(self._chat_parsed(
+                self.format_registry.get(part), model, messages, options, keep_alive, retries, stamina_timeout
+            ))
+            for part in part_models(format, field_groups)
+        ]
+        try:
+            parts = await asyncio.gather(*tasks)
+        finally:
+            # A failed group makes the others useless
+            for task in tasks:
+                task.cancel()
+        # The parts are JSON, validate in JSON mode so strict models accept e.g. dates as strings
+        parsed = compiled.validate_json(json.dumps(merge_parts([part.content for part in parts]), ensure_ascii=False))
+        return SplitChatResponse(parsed=parsed, parts=tuple(parts), groups=field_groups)
+
+    async def chat_completion_batch(
+        self,
+        format: Type[T],
+        model: str,
+        messages_list: Sequence[Sequence[Mapping[str, Any] | Message]],
+        options: Mapping[str, Any] | Options | None = None,
+        keep_alive: float | str | None = None,
+        *,
+        max_concurrency: int = 4,
+        retries: int = 3,
+        stamina_timeout: float | timedelta | None = None
+    ) -> list[BatchResult[T]]:
+        """
+        Run a chat completion for every message list with bounded concurrency
+
+        At most `max_concurrency` requests are in flight at any time. Size it to the
+        parallel slots of the Ollama server (`OLLAMA_NUM_PARALLEL`). A failing item
+        does not cancel the batch; its exception is stored in its BatchResult.
+
+        Returns:
+            One BatchResult per message list, in input order
+        """
+        results: list[BatchResult[T]] = [None] * len(messages_list)  # type: ignore[list-item]
+        async for result in await self.chat_completion_batch_iter(
+            format=format,
+            model=model,
+            messages_list=messages_list,
+            options=options,
+            keep_alive=keep_alive,
+            max_concurrency=max_concurrency,
+            retries=retries,
+            stamina_timeout=stamina_timeout
+        ):
+            results[result.index] = result
+        return results
+
+    async def chat_completion_batch_iter(
+        self,
+        format: Type[T],
+        model: str,
+        messages_list: Iterable[Sequence[Mapping[str, Any] | Message]],
+        options: Mapping[str, Any] | Options | None = None,
+        keep_alive: float | str | None = None,
+        *,
+        max_concurrency: int = 4,
+        retries: int = 3,
+        stamina_timeout: float | timedelta | None = None
+    ) -> AsyncIterator[BatchResult[T]]:
+        """
+        Like `chat_completion_batch`, but yields the results in completion order
+
+        `messages_list` is consumed lazily, so it may be a generator over a large queue.
+        """
+        self.logger.info("Starting chat completion batch with model %s", model)
+        compiled = self.format_registry.get(format)
+
+        async def run(messages: Sequence[Mapping[str, Any] | Message]) -> ParsedChatResponse[T]:
+            with priority_scope("bulk"):
+                return await self._chat_parsed(compiled, model, messages, options, keep_alive, retries, stamina_timeout)
+
+        return abatch(run, messages_list, max_concurrency)
+
+    async def warmup(
+        self,
+        models: str | Iterable[str],
+        keep_alive: float | str | None = None,
+        formats: Iterable[Type[BaseModel]] = ()
+    ) -> dict[str, float]:
+        """
+        Load models into memory so the first request does not pay the load time
+
+        Args:
+            models: Name or names of the models to load
+            keep_alive: How long Ollama keeps the models loaded, e.g. "30m" or -1 for
+                forever. The server default (5 minutes) if None
+            formats: Format models whose JSON schemas are compiled ahead as well
+
+        Returns:
+            The seconds each model took to load, as reported by Ollama. Models that
+            were loaded already take about 0
+        """
+        for format in formats:
+            self.format_registry.get(format)
+        durations = {}
+        for model in [models] if isinstance(models, str) else models:
+            response = await self.chat(model=model, messages=[], keep_alive=keep_alive)
+            durations[model] = (response.load_duration or 0) / 1e9
+            self.logger.info("Loaded model %s in %.2fs", model, durations[model])
+        return durations
+
+    async def keep_warm(
+        self,
+        models: Iterable[str],
+        keep_alive: float | str = "30m",
+        interval: float = 60.0
+    ) -> AsyncModelKeeper:
+        """
+        Keep `models` loaded from a background task while they are idle
+
+        Every `interval` seconds, models that are unloaded or about to expire are
+        loaded again with `keep_alive`. Await `stop()` on the returned keeper, or use
+        it as async context manager, to end it.
+        """
+        return AsyncModelKeeper(self, models, keep_alive=keep_alive, interval=interval).start()
+
+    async def _chat_parsed(
+        self,
+        compiled: CompiledFormat[T],
+        model: str,
+        messages: Sequence[Mapping[str, Any] | Message] | None,
+        options: Mapping[str, Any] | Options | None,
+        keep_alive: float | str | None,
+        retries: int,
+        stamina_timeout: float | timedelta | None
+    ) -> ParsedChatResponse[T]:
+        if self._single_flight is None:
+            return await self._run_chat_parsed(compiled, model, messages, options, keep_alive, retries, stamina_timeout)
+        return await self._single_flight.do(
+            coalesce_key(make_cache_key(model, messages, compiled.schema_json, options), keep_alive, retries, stamina_timeout),
+            lambda: self._run_chat_parsed(compiled, model, messages, options, keep_alive, retries, stamina_timeout),
+            copy=_copy_parsed
+        )
+
+    async def _run_chat_parsed(
+        self,
+        compiled: CompiledFormat[T],
+        model: str,
+        messages: Sequence[Mapping[str, Any] | Message] | None,
+        options: Mapping[str, Any] | Options | None,
+        keep_alive: float | str | None,
+        retries: int,
+        stamina_timeout: float | timedelta | None
+    ) -> ParsedChatResponse[T]:
+        log = RequestLogger(self.logger, new_request_id(), model)
+        log.info("Starting chat completion")
+        cache_key = self._cache_key(compiled, model, messages, options)
+        if cache_key is not None:
+            cached = self.cache.get_response(cache_key)
+            if cached is not None:
+                log.debug("Response cache hit")
+                with self._record("completion", model, 0) as record:
+                    record.cache_hit()
+                    record.set_response(cached)
+                    started = time.perf_counter()
+                    parsed = compiled.validate_json(cached.message.content)
+                    return ParsedChatResponse(
+                        parsed=parsed, response=cached, validation_duration=time.perf_counter() - started, attempts=0
+                    )
+
+        original = AttemptRequest(messages=messages, options=options)
+        request = original
+        deadline = deadline_after(self.retry_policy.timeout(stamina_timeout))
+        target = RetryTarget(compiled, self.format_registry) if self.targeted_retry else None
+        with route_scope() as route:
+            async for attempt in self.retry_policy.retrying(retries, stamina_timeout):
+                with attempt, self._record("completion", model, attempt.num) as record:
+                    attempt_log = log.for_attempt(attempt.num)
+                    async with self._admit(model, deadline):
+                        response = await self.chat(
+                            model=model,
+                            messages=request.messages,
+                            format=target.format.schema if target is not None else compiled.schema,
+                            stream=False,
+                            options=request.options,
+                            keep_alive=keep_alive
+                        )
+                    attempt_log.debug("Successfully initiated chat completion")
+                    record.set_response(response)
+                    repairs: tuple[str, ...] = ()
+                    started = time.perf_counter()
+                    content = response.message.content
+                    if target is not None:
+                        content = target.merge(content)
+                    try:
+                        with record.validation():
+                            if content is None:
+                                raise compiled.no_content_error()
+                            parsed = compiled.validate_json(content)
+                    except ValidationError as e:
+                        repair = self._repair(compiled, content, e)
+                        if repair is None:
+                            attempt_log.error("Validation failed with %d errors", e.error_count())
+                            route.avoid_last()
+                            if target is not None:
+                                target.narrow(content, e)
+                                if target.fields is not None:
+                                    attempt_log.info("Retrying only the fields %s", ", ".join(target.fields))
+                            request = self.retry_strategy.next_request(original, AttemptFailure(
+                                attempt=attempt.num,
+                                error=e,
+                                content=content,
+                                fields=requested_fields(target.format if target is not None else compiled)
+                            ))
+                            raise
+                        record.repaired()
+                        parsed, repairs = repair.parsed, repair.steps
+                        response = with_content(response, repair.content)
+                    else:
+                        if content is not response.message.content:
+                            response = with_content(response, content)
+                    validation_duration = time.perf_counter() - started
+                    attempt_log.debug("Content validation successful")
+
+        result = ParsedChatResponse(
+            parsed=parsed,
+            response=response,
+            repairs=repairs,
+            validation_duration=validation_duration,
+            attempts=attempt.num
+        )
+        if cache_key is not None:
+            self.cache.set_response(cache_key, result.response)
+        return result
+
+    def _admit(self, model: str, deadline: float | None) -> AsyncContextManager[None]:
+        if self.scheduler is None:
+            return _NO_SCHEDULER
+        return self.scheduler.slot(model, deadline=deadline)
+
+    def _record(self, kind: str, model: str, attempt: int) -> AttemptRecorder | NoopRecorder:
+        return record_attempt(self.instrumentation, kind, model, attempt)
+
+    def _repair(self, compiled: CompiledFormat[T], content: str | None, error: ValidationError) -> Repair[T] | None:
+        if self.repair is None:
+            return None
+        return self.repair.repair(compiled, content, error)
+
+    def _cache_key(
+        self,
+        compiled: CompiledFormat,
+        model: str,
+        messages: Sequence[Mapping[str, Any] | Message] | None,
+        options: Mapping[str, Any] | Options | None
+    ) -> str | None:
+        if self.cache is None:
+            return None
+        return make_cache_key(model, messages, compiled.schema_json, options)
@@ -1,6 +1,64 @@
+import json
+
+import httpx
+import pytest
+
 
 def pytest_configure(config):
     """Configure pytest with custom markers."""
     config.addinivalue_line(
         "markers", "integration: marks tests as integration tests requiring Ollama server"
     )
+
+
+class FakeOllama:
+    """
+    Stand-in for the Ollama chat endpoint, usable as httpx transport.
+
+    Every request to /api/chat consumes the next entry of `outputs`. Streaming
+    requests get the content split into chunks of `chunk_size` characters.
+    """
+    def __init__(self, outputs: list[str], chunk_size: int = 8):
+        self.outputs = list(outputs)
+        self.chunk_size = chunk_size
+        self.requests: list[dict] = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content) if request.content else {}
+        self.requests.append(body)
+        content = self.outputs.pop(0)
+        final = {
+            'model': body.get('model', ''),
+            'created_at': '2025-01-01T00:00:00Z',
+            'message': {'role': 'assistant', 'content': ''},
+            'done': True,
+            'done_reason': 'stop',
+            'prompt_eval_count': 10,
+            'prompt_eval_duration': 1_000_000,
+            'eval_count': 20,
+            'eval_duration': 2_000_000,
+            'total_duration': 3_000_000,
+        }
+        if not body.get('stream'):
+            final['message']['content'] = content
+            return httpx.Response(200, json=final)
+        lines = []
+        for i in range(0, len(content), self.chunk_size):
+            lines.append(json.dumps({
+                'model': body.get('model', ''),
+                'created_at': '2025-01-01T00:00:00Z',
+                'message': {'role': 'assistant', 'content': content[i:i + self.chunk_size]},
+                'done': False,
+            }))
+        lines.append(json.dumps(final))
+        return httpx.Response(200, content='\n'.join(lines).encode())
+
+    @property
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handler)
+
+
+@pytest.fixture
+def fake_ollama():
+    """Factory fixture creating a FakeOllama serving the given outputs."""
+    return FakeOllama
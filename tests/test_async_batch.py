@@ -0,0 +1,85 @@
+import asyncio
+
+import httpx
+import pytest
+from pydantic import BaseModel, ValidationError
+from src.ollama_instructor import OllamaInstructorAsync, BatchResult
+
+class FriendInfo(BaseModel):
+    name: str
+    age: int
+    is_available: bool
+
+def friend(i: int) -> str:
+    return f'{{"name": "Friend {i}", "age": {20 + i}, "is_available": true}}'
+
+
+@pytest.fixture
+def concurrency_tracking_transport(fake_ollama):
+    """Transport answering with delay while tracking the requests in flight."""
+    def make(outputs):
+        fake = fake_ollama(outputs)
+        state = {'in_flight': 0, 'max_in_flight': 0}
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            state['in_flight'] += 1
+            state['max_in_flight'] = max(state['max_in_flight'], state['in_flight'])
+            await asyncio.sleep(0.01)
+            state['in_flight'] -= 1
+            return fake.handler(request)
+
+        return httpx.MockTransport(handler), state
+    return make
+
+
+@pytest.mark.asyncio
+class TestChatCompletionBatch:
+    async def test_results_in_input_order(self, concurrency_tracking_transport):
+        transport, state = concurrency_tracking_transport([friend(i) for i in range(10)])
+        client = OllamaInstructorAsync(transport=transport)
+
+        results = await client.chat_completion_batch(
+            format=FriendInfo,
+            model='llama3.2:latest',
+            messages_list=[[{'role': 'user', 'content': f'friend {i}'}] for i in range(10)],
+            max_concurrency=3
+        )
+
+        assert [r.index for r in results] == list(range(10))
+        assert all(isinstance(r, BatchResult) and r.ok for r in results)
+        assert state['max_in_flight'] == 3
+
+    async def test_failures_do_not_cancel_batch(self, fake_ollama):
+        outputs = [friend(0), '{"name": "broken"}', friend(2)]
+        client = OllamaInstructorAsync(transport=fake_ollama(outputs).transport)
+
+        results = await client.chat_completion_batch(
+            format=FriendInfo,
+            model='llama3.2:latest',
+            messages_list=[[{'role': 'user', 'content': 'friend'}]] * 3,
+            max_concurrency=1,
+            retries=1
+        )
+
+        assert [r.ok for r in results] == [True, False, True]
+        assert isinstance(results[1].error, ValidationError)
+        with pytest.raises(ValidationError):
+            results[1].unwrap()
+        assert results[2].unwrap().parsed.age == 22
+
+    async def test_iter_yields_in_completion_order(self, fake_ollama):
+        client = OllamaInstructorAsync(transport=fake_ollama([friend(i) for i in range(5)]).transport)
+
+        def messages():
+            for i in range(5):
+                yield [{'role': 'user', 'content': f'friend {i}'}]
+
+        stream = await client.chat_completion_batch_iter(
+            format=FriendInfo,
+            model='llama3.2:latest',
+            messages_list=messages(),
+            max_concurrency=2
+        )
+        indices = sorted([result.index async for result in stream])
+
+        assert indices == list(range(5))
@@ -0,0 +1,78 @@
+import json
+import threading
+import time
+
+import httpx
+from pydantic import BaseModel
+from src.ollama_instructor import OllamaInstructor
+
+class FriendInfo(BaseModel):
+    name: str
+    age: int
+    is_available: bool
+
+def friend(i: int) -> str:
+    return f'{{"name": "Friend {i}", "age": {20 + i}, "is_available": true}}'
+
+
+class TestChatCompletionBatch:
+    def test_results_in_input_order(self, fake_ollama):
+        fake = fake_ollama([])
+        lock = threading.Lock()
+        state = {'in_flight': 0, 'max_in_flight': 0}
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            with lock:
+                state['in_flight'] += 1
+                state['max_in_flight'] = max(state['max_in_flight'], state['in_flight'])
+                prompt = json.loads(request.read())['messages'][0]['content']
+                fake.outputs.append(friend(int(prompt.removeprefix('friend '))))
+                response = fake.handler(request)
+            time.sleep(0.02)
+            with lock:
+                state['in_flight'] -= 1
+            return response
+
+        client = OllamaInstructor(transport=httpx.MockTransport(handler))
+        results = client.chat_completion_batch(
+            format=FriendInfo,
+            model='llama3.2:latest',
+            messages_list=[[{'role': 'user', 'content': f'friend {i}'}] for i in range(8)],
+            max_workers=3
+        )
+
+        assert [r.response.parsed.age for r in results] == [20 + i for i in range(8)]
+        assert state['max_in_flight'] == 3
+
+    def test_per_item_timeout(self, fake_ollama):
+        fake = fake_ollama([friend(0), friend(1)])
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if b'slow' in request.read():
+                time.sleep(0.5)
+            return fake.handler(request)
+
+        client = OllamaInstructor(transport=httpx.MockTransport(handler))
+        results = client.chat_completion_batch(
+            format=FriendInfo,
+            model='llama3.2:latest',
+            messages_list=[[{'role': 'user', 'content': 'slow'}], [{'role': 'user', 'content': 'fast'}]],
+            max_workers=2,
+            timeout=0.1
+        )
+
+        assert isinstance(results[0].error, TimeoutError)
+        assert results[1].ok
+
+    def test_failures_do_not_cancel_batch(self, fake_ollama):
+        client = OllamaInstructor(transport=fake_ollama([friend(0), '{}', friend(2)]).transport)
+
+        results = client.chat_completion_batch(
+            format=FriendInfo,
+            model='llama3.2:latest',
+            messages_list=[[{'role': 'user', 'content': 'friend'}]] * 3,
+            max_workers=1,
+            retries=1
+        )
+
+        assert [r.ok for r in results] == [True, False, True]
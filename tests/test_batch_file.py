@@ -0,0 +1,142 @@
+import json
+
+import pytest
+from pydantic import BaseModel
+from src.ollama_instructor import OllamaInstructor, OllamaInstructorAsync, abatch_file, batch_file
+from src.ollama_instructor import __main__ as cli
+
+class FriendInfo(BaseModel):
+    name: str
+    age: int
+    is_available: bool
+
+VALID = '{"name": "Ollama", "age": 22, "is_available": false}'
+
+
+def write_records(path, count):
+    lines = [json.dumps({'id': f'r{i}', 'messages': [{'role': 'user', 'content': f'record {i}'}]}) for i in range(count)]
+    path.write_text('\n'.join(lines) + '\n')
+
+
+def read_jsonl(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_batch_file_writes_outputs_and_failures(tmp_path, fake_ollama):
+    source = tmp_path / 'records.jsonl'
+    source.write_text(
+        '[{"role": "user", "content": "a"}]\n'
+        '\n'
+        'not json\n'
+        '{"id": 7, "messages": [{"role": "user", "content": "b"}]}\n'
+    )
+    fake = fake_ollama([VALID, '{}', '{}'])
+    client = OllamaInstructor(transport=fake.transport)
+
+    stats = batch_file(
+        client, FriendInfo, 'llama3.2:latest', source, tmp_path / 'out.jsonl', tmp_path / 'failed.jsonl',
+        max_workers=1, retries=2
+    )
+
+    assert read_jsonl(tmp_path / 'out.jsonl') == [
+        {'index': 0, 'id': None, 'output': {'name': 'Ollama', 'age': 22, 'is_available': False}}
+    ]
+    failures = read_jsonl(tmp_path / 'failed.jsonl')
+    assert [(failure['index'], failure['id'], failure['error']) for failure in failures] == [
+        (2, None, 'JSONDecodeError'), (3, 7, 'ValidationError')
+    ]
+    assert (stats.succeeded, stats.failed, stats.skipped) == (1, 2, 0)
+
+
+def test_batch_file_resumes_from_checkpoint(tmp_path, fake_ollama):
+    source = tmp_path / 'records.jsonl'
+    write_records(source, 6)
+    output = tmp_path / 'out.jsonl'
+    output.write_text('{"index": 0}\n{"index": 1}\n{"index": 3}')
+    checkpoint = tmp_path / 'out.checkpoint'
+    checkpoint.write_text(json.dumps({'offset': 2, 'done': [3]}))
+    fake = fake_ollama([VALID] * 3)
+
+    stats = batch_file(
+        OllamaInstructor(transport=fake.transport), FriendInfo, 'llama3.2:latest', source, output,
+        checkpoint=checkpoint, max_workers=2
+    )
+
+    assert sorted(request['messages'][0]['content'] for request in fake.requests) == ['record 2', 'record 4', 'record 5']
+    # the cut off last line of the interrupted run is terminated before appending
+    assert sorted(record['index'] for record in read_jsonl(output)) == [0, 1, 2, 3, 4, 5]
+    assert json.loads(checkpoint.read_text()) == {'offset': 6, 'done': []}
+    assert stats.skipped == 3
+
+
+@pytest.mark.asyncio
+async def test_abatch_file_checkpoints_out_of_order_results(tmp_path, fake_ollama):
+    source = tmp_path / 'records.jsonl'
+    write_records(source, 20)
+    checkpoint = tmp_path / 'out.checkpoint'
+    reports = []
+    client = OllamaInstructorAsync(transport=fake_ollama([VALID] * 20).transport)
+
+    stats = await abatch_file(
+        client, FriendInfo, 'llama3.2:latest', source, tmp_path / 'out.jsonl',
+        checkpoint=checkpoint, max_concurrency=5, progress=reports.append, interval=0
+    )
+
+    assert stats.succeeded == 20
+    assert sorted(record['id'] for record in read_jsonl(tmp_path / 'out.jsonl')) == sorted(f'r{i}' for i in range(20))
+    assert json.loads(checkpoint.read_text()) == {'offset': 20, 'done': []}
+    assert len(reports) == 20
+
+
+def test_cli_batch(tmp_path, fake_ollama, monkeypatch, capsys):
+    source = tmp_path / 'records.jsonl'
+    write_records(source, 3)
+    fake = fake_ollama([VALID] * 3)
+    monkeypatch.setattr(cli, 'OllamaInstructorAsync', lambda host: OllamaInstructorAsync(transport=fake.transport))
+
+    code = cli.main([
+        'batch', str(source), '--format', f'{__name__}:FriendInfo', '--model', 'llama3.2:latest',
+        '--output', str(tmp_path / 'out.jsonl'), '--options', '{"temperature": 0}'
+    ])
+
+    assert code == 0
+    assert len(read_jsonl(tmp_path / 'out.jsonl')) == 3
+    assert json.loads((tmp_path / 'out.jsonl.checkpoint').read_text())['offset'] == 3
+    assert fake.requests[0]['options'] == {'temperature': 0}
+    assert '3 records (0 failed, 0 skipped)' in capsys.readouterr().err
+
+
+def test_cli_rejects_unknown_format(tmp_path):
+    with pytest.raises(SystemExit):
+        cli.main(['batch', 'in.jsonl', '--format', 'nowhere:Model', '--model', 'm', '--output', str(tmp_path / 'o')])
+
+
+def test_cli_rejects_invalid_options(tmp_path):
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main([
+            'batch', 'in.jsonl', '--format', f'{__name__}:FriendInfo', '--model', 'm',
+            '--output', str(tmp_path / 'o'), '--options', '{not json'
+        ])
+    assert exit_info.value.code == 2
+
+
+def test_cli_runtime_errors_are_not_usage_errors(tmp_path, monkeypatch, capsys):
+    closed = []
+
+    class Client(OllamaInstructorAsync):
+        async def close(self):
+            closed.append(True)
+            await super().close()
+
+    monkeypatch.setattr(cli, 'OllamaInstructorAsync', lambda host: Client())
+
+    code = cli.main([
+        'batch', str(tmp_path / 'missing.jsonl'), '--format', f'{__name__}:FriendInfo', '--model', 'm',
+        '--output', str(tmp_path / 'out.jsonl'), '--quiet'
+    ])
+
+    assert code == 1
+    err = capsys.readouterr().err
+    assert 'missing.jsonl' in err
+    assert 'usage:' not in err
+    assert closed == [True]
@@ -0,0 +1,46 @@
+import pytest
+from pydantic import BaseModel, ValidationError
+from src.ollama_instructor import OllamaInstructor, OllamaInstructorAsync, ParsedChatResponse
+from ollama import ChatResponse
+
+class FriendInfo(BaseModel):
+    name: str
+    age: int
+    is_available: bool
+
+class FriendList(BaseModel):
+    friends: list[FriendInfo]
+
+VALID = '{"friends": [{"name": "Ollama", "age": 22, "is_available": false}]}'
+MESSAGES = [{'role': 'user', 'content': 'friends'}]
+
+
+class TestOllamaInstructorParsed:
+    def test_chat_parsed(self, fake_ollama):
+        client = OllamaInstructor(transport=fake_ollama([VALID]).transport)
+
+        result = client.chat_parsed(format=FriendList, model='llama3.2:latest', messages=MESSAGES)
+
+        assert isinstance(result, ParsedChatResponse)
+        assert isinstance(result.parsed, FriendList)
+        assert isinstance(result.response, ChatResponse)
+        assert result.parsed.friends[0].name == 'Ollama'
+        assert result.eval_count == 20
+        assert result.prompt_eval_duration == 1_000_000
+        assert result.validation_duration > 0
+
+    def test_chat_parsed_exhausts_retries(self, fake_ollama):
+        client = OllamaInstructor(transport=fake_ollama(['{}', '{}']).transport)
+
+        with pytest.raises(ValidationError):
+            client.chat_parsed(format=FriendList, model='llama3.2:latest', messages=MESSAGES, retries=2)
+
+
+@pytest.mark.asyncio
+async def test_async_chat_parsed(fake_ollama):
+    client = OllamaInstructorAsync(transport=fake_ollama([VALID]).transport)
+
+    result = await client.chat_parsed(format=FriendList, model='llama3.2:latest', messages=MESSAGES)
+
+    assert result.parsed == FriendList.model_validate_json(VALID)
+    assert result.content == VALID
@@ -0,0 +1,182 @@
+import asyncio
+import json
+
+import httpx
+from pydantic import BaseModel, ValidationError
+from src.ollama_instructor import OllamaInstructorAsync, StreamBuffer
+
+class FriendInfo(BaseModel):
+    name: str
+    age: int
+    is_available: bool
+
+VALID = '{"name": "Ollama", "age": 22, "is_available": false}'
+INVALID = '{"name": "Ollama", "age": "x", "is_available": false}'
+MESSAGES = [{'role': 'user', 'content': 'friend'}]
+
+
+class SlowOllama:
+    """Async stand-in answering every chat request with `content` after `delay` seconds"""
+    def __init__(self, content: str = VALID, delay: float = 0.05, chunk_size: int = 8):
+        self.content = content
+        self.delay = delay
+        self.chunk_size = chunk_size
+        self.requests: list[dict] = []
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        self.requests.append(body)
+        await asyncio.sleep(self.delay)
+        chunks = [self.content]
+        if body.get('stream'):
+            chunks = [self.content[i:i + self.chunk_size] for i in range(0, len(self.content), self.chunk_size)] + ['']
+        lines = [
+            json.dumps({
+                'model': body['model'],
+                'created_at': '2025-01-01T00:00:00Z',
+                'message': {'role': 'assistant', 'content': chunk},
+                'done': index == len(chunks) - 1,
+            })
+            for index, chunk in enumerate(chunks)
+        ]
+        return httpx.Response(200, content='\n'.join(lines).encode())
+
+
+def make_client(fake: SlowOllama) -> OllamaInstructorAsync:
+    return OllamaInstructorAsync(coalesce=True, transport=httpx.MockTransport(fake.handler))
+
+
+async def test_identical_requests_share_one_generation():
+    fake = SlowOllama()
+    client = make_client(fake)
+
+    results = await asyncio.gather(*(
+        client.chat_parsed(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES) for _ in range(5)
+    ))
+
+    assert len(fake.requests) == 1
+    assert all(result.parsed == results[0].parsed for result in results)
+    assert len({id(result.parsed) for result in results}) == 5
+    assert client._single_flight.coalesced == 4
+    assert len(client._single_flight) == 0
+
+
+async def test_different_requests_are_not_coalesced():
+    fake = SlowOllama()
+    client = make_client(fake)
+
+    await asyncio.gather(
+        client.chat_completion(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES),
+        client.chat_completion(format=FriendInfo, model='llama3.2:latest', messages=[{'role': 'user', 'content': 'other'}]),
+        client.chat_completion(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES, options={'temperature': 0}),
+    )
+
+    assert len(fake.requests) == 3
+
+
+async def test_sequential_requests_are_not_coalesced():
+    fake = SlowOllama(delay=0)
+    client = make_client(fake)
+
+    await client.chat_completion(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES)
+    await client.chat_completion(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES)
+
+    assert len(fake.requests) == 2
+
+
+async def test_cancelled_caller_does_not_cancel_others():
+    fake = SlowOllama(delay=0.1)
+    client = make_client(fake)
+
+    first = asyncio.create_task(client.chat_parsed(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES))
+    second = asyncio.create_task(client.chat_parsed(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES))
+    await asyncio.sleep(0.01)
+    first.cancel()
+
+    assert (await second).parsed.name == 'Ollama'
+    assert first.cancelled()
+
+
+async def test_errors_reach_every_caller():
+    client = make_client(SlowOllama(content=INVALID))
+
+    results = await asyncio.gather(*(
+        client.chat_completion(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES, retries=1)
+        for _ in range(2)
+    ), return_exceptions=True)
+
+    assert all(isinstance(result, ValidationError) for result in results)
+
+
+async def test_stream_fans_out_to_all_consumers():
+    fake = SlowOllama()
+    client = make_client(fake)
+
+    async def consume() -> list[str]:
+        stream = await client.chat_stream(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES)
+        return [chunk.message.content async for chunk in stream]
+
+    results = await asyncio.gather(*(consume() for _ in range(3)))
+
+    assert len(fake.requests) == 1
+    assert results[0] == results[1] == results[2]
+    assert ''.join(results[0]) == VALID
+
+
+async def test_streams_with_other_release_are_not_coalesced():
+    fake = SlowOllama()
+    client = make_client(fake)
+
+    async def consume(release: str) -> list:
+        stream = await client.chat_stream(
+            format=FriendInfo, model='llama3.2:latest', messages=MESSAGES, release=release
+        )
+        return [chunk async for chunk in stream]
+
+    await asyncio.gather(consume('immediate'), consume('validated'))
+
+    assert len(fake.requests) == 2
+    assert client._stream_fanout.coalesced == 0
+
+
+async def test_stream_with_buffer_is_not_coalesced():
+    fake = SlowOllama()
+    client = make_client(fake)
+
+    async def consume() -> str:
+        buffer = StreamBuffer()
+        async for _ in await client.chat_stream(
+            format=FriendInfo, model='llama3.2:latest', messages=MESSAGES, buffer=buffer
+        ):
+            pass
+        return buffer.text
+
+    assert await asyncio.gather(consume(), consume()) == [VALID, VALID]
+    assert len(fake.requests) == 2
+
+
+async def test_requests_with_other_retry_settings_are_not_coalesced():
+    fake = SlowOllama()
+    client = make_client(fake)
+
+    await asyncio.gather(
+        client.chat_parsed(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES),
+        client.chat_parsed(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES, retries=1),
+        client.chat_parsed(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES, stamina_timeout=5),
+        client.chat_parsed(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES, keep_alive='1m'),
+    )
+
+    assert len(fake.requests) == 4
+    assert client._single_flight.coalesced == 0
+
+
+async def test_coalesced_callers_do_not_share_parsed_models():
+    client = make_client(SlowOllama())
+
+    first, second = await asyncio.gather(
+        client.chat_parsed(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES),
+        client.chat_parsed(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES),
+    )
+    first.parsed.name = 'Changed'
+
+    assert second.parsed.name == 'Ollama'
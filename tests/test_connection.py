@@ -0,0 +1,68 @@
+import httpx
+import pytest
+from pydantic import BaseModel
+from src.ollama_instructor import ConnectionConfig, ConnectionPool, OllamaInstructor, OllamaInstructorAsync
+
+class FriendInfo(BaseModel):
+    name: str
+    age: int
+    is_available: bool
+
+VALID = '{"name": "Ollama", "age": 22, "is_available": false}'
+MESSAGES = [{'role': 'user', 'content': 'friend'}]
+
+
+def test_connection_config_sets_limits_and_timeouts():
+    config = ConnectionConfig(max_connections=8, max_keepalive_connections=4, connect_timeout=1.5, read_timeout=60)
+
+    client = OllamaInstructor(connection=config)
+
+    pool = client._client._transport._pool
+    assert pool._max_connections == 8
+    assert pool._max_keepalive_connections == 4
+    assert client._client.timeout == httpx.Timeout(connect=1.5, read=60, write=30.0, pool=None)
+
+
+def test_explicit_kwargs_take_precedence():
+    client = OllamaInstructor(connection=ConnectionConfig(connect_timeout=1.5), timeout=10)
+    assert client._client.timeout == httpx.Timeout(10)
+
+
+def test_http2_requires_h2(monkeypatch):
+    monkeypatch.setattr('importlib.util.find_spec', lambda name: None)
+    with pytest.raises(ImportError, match='ollama-instructor\\[http2\\]'):
+        OllamaInstructor(connection=ConnectionConfig(http2=True))
+
+
+class TestConnectionPool:
+    def test_clients_share_transport(self):
+        with ConnectionPool(ConnectionConfig(max_connections=4)) as pool:
+            first = OllamaInstructor(pool=pool)
+            second = OllamaInstructor(pool=pool)
+            assert first._client._transport._transport is second._client._transport._transport
+
+    def test_closing_client_keeps_pool_open(self, monkeypatch):
+        pool = ConnectionPool()
+        client = OllamaInstructor(pool=pool)
+        closed = []
+        monkeypatch.setattr(pool._transport, 'close', lambda: closed.append(True))
+
+        client.close()
+        assert closed == []
+        pool.close()
+        assert closed == [True]
+
+    def test_rejects_transport_and_connection(self, fake_ollama):
+        pool = ConnectionPool()
+        with pytest.raises(ValueError):
+            OllamaInstructor(pool=pool, transport=fake_ollama([]).transport)
+        with pytest.raises(ValueError):
+            OllamaInstructor(pool=pool, connection=ConnectionConfig())
+
+    async def test_async_clients_share_transport(self):
+        async with ConnectionPool() as pool:
+            first = OllamaInstructorAsync(pool=pool)
+            second = OllamaInstructorAsync(pool=pool)
+            assert first._client._transport._transport is second._client._transport._transport
+            await first.close()
+            assert pool._async_transport is not None
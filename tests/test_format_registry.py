@@ -0,0 +1,84 @@
+import gc
+
+import pytest
+from pydantic import BaseModel, create_model
+from src.ollama_instructor import OllamaInstructor, OllamaInstructorAsync, FormatRegistry
+
+class FriendInfo(BaseModel):
+    name: str
+    age: int
+    is_available: bool
+
+class FriendList(BaseModel):
+    friends: list[FriendInfo]
+
+VALID = '{"friends": [{"name": "Ollama", "age": 22, "is_available": false}]}'
+
+
+class TestFormatRegistry:
+    def test_compiles_once(self):
+        registry = FormatRegistry()
+        first = registry.get(FriendList)
+        second = registry.get(FriendList)
+
+        assert first is second
+        assert first.schema == FriendList.model_json_schema()
+        assert registry.cache_info().hits == 1
+        assert registry.cache_info().misses == 1
+
+    def test_validate_json(self):
+        compiled = FormatRegistry().get(FriendList)
+        friend_list = compiled.validate_json(VALID)
+        assert isinstance(friend_list, FriendList)
+        assert friend_list.friends[0].age == 22
+
+    def test_bounded(self):
+        registry = FormatRegistry(maxsize=1)
+        registry.get(FriendInfo)
+        registry.get(FriendList)
+        assert len(registry) == 1
+        assert FriendList in registry
+        assert FriendInfo not in registry
+
+    def test_entry_dropped_with_model(self):
+        registry = FormatRegistry()
+        model = create_model('Temporary', value=(int, ...))
+        registry.get(model)
+        assert len(registry) == 1
+        del model
+        gc.collect()
+        assert len(registry) == 0
+
+
+def test_retries_reuse_compiled_schema(fake_ollama):
+    registry = FormatRegistry()
+    fake = fake_ollama(['{"friends": 1}', VALID])
+    client = OllamaInstructor(format_registry=registry, transport=fake.transport)
+
+    response = client.chat_completion(
+        format=FriendList,
+        model='llama3.2:latest',
+        messages=[{'role': 'user', 'content': 'friends'}]
+    )
+
+    assert response.message.content == VALID
+    assert len(fake.requests) == 2
+    assert fake.requests[0]['format'] == FriendList.model_json_schema()
+    assert registry.cache_info().misses == 1
+
+
+@pytest.mark.asyncio
+async def test_async_stream_uses_registry(fake_ollama):
+    registry = FormatRegistry()
+    fake = fake_ollama([VALID])
+    client = OllamaInstructorAsync(format_registry=registry, transport=fake.transport)
+
+    stream = await client.chat_stream(
+        format=FriendList,
+        model='llama3.2:latest',
+        messages=[{'role': 'user', 'content': 'friends'}]
+    )
+    content = ''.join([chunk.message.content async for chunk in stream])
+
+    assert content == VALID
+    assert FriendList in registry
@@ -0,0 +1,210 @@
+import json
+import threading
+
+import httpx
+import pytest
+from pydantic import BaseModel
+from src.ollama_instructor import HostPool, NoHealthyHostError, OllamaInstructor, OllamaInstructorAsync
+
+class FriendInfo(BaseModel):
+    name: str
+    age: int
+    is_available: bool
+
+VALID = '{"name": "Ollama", "age": 22, "is_available": false}'
+INVALID = '{"name": "Ollama", "age": "x", "is_available": false}'
+MESSAGES = [{'role': 'user', 'content': 'friend'}]
+
+
+class FakeHosts:
+    """Answers chat requests per host; hosts listed in `down` refuse connections"""
+    def __init__(self, outputs: dict[str, list[str]] | None = None, down: set[str] = frozenset(), loaded: dict | None = None):
+        self.outputs = outputs or {}
+        self.down = set(down)
+        self.loaded = loaded or {}
+        self.hits: list[str] = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        if host in self.down:
+            raise httpx.ConnectError('connection refused', request=request)
+        if request.url.path == '/api/ps':
+            return httpx.Response(200, json={'models': [{'name': name} for name in self.loaded.get(host, [])]})
+        self.hits.append(host)
+        body = json.loads(request.content)
+        outputs = self.outputs.get(host)
+        content = outputs.pop(0) if outputs else VALID
+        chunks = [content, ''] if body.get('stream') else [content]
+        lines = [
+            json.dumps({
+                'model': body['model'],
+                'created_at': '2025-01-01T00:00:00Z',
+                'message': {'role': 'assistant', 'content': chunk},
+                'done': index == len(chunks) - 1,
+            })
+            for index, chunk in enumerate(chunks)
+        ]
+        return httpx.Response(200, content='\n'.join(lines).encode())
+
+
+def make_pool(fake: FakeHosts, hosts=('a', 'b'), **kwargs) -> HostPool:
+    pool = HostPool(list(hosts), **kwargs)
+    pool._transport = httpx.MockTransport(fake.handler)
+    pool._async_transport = httpx.MockTransport(fake.handler)
+    return pool
+
+
+def test_least_outstanding_spreads_requests():
+    fake = FakeHosts()
+    client = OllamaInstructor(pool=make_pool(fake))
+
+    for _ in range(4):
+        client.chat_completion(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES)
+
+    assert sorted(fake.hits) == ['a', 'a', 'b', 'b']
+
+
+def test_model_affinity_prefers_hosts_with_loaded_model():
+    fake = FakeHosts(loaded={'b': ['llama3.2:latest']})
+    pool = make_pool(fake, hosts=('a', 'b', 'c'), routing='model_affinity')
+    pool.check_health()
+    client = OllamaInstructor(pool=pool)
+
+    for _ in range(3):
+        client.chat_completion(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES)
+
+    assert fake.hits == ['b', 'b', 'b']
+
+
+def test_unreachable_host_is_skipped_and_ejected():
+    fake = FakeHosts(down={'a'})
+    pool = make_pool(fake, max_failures=2)
+    client = OllamaInstructor(pool=pool)
+
+    for _ in range(4):
+        client.chat_completion(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES)
+
+    assert fake.hits == ['b'] * 4
+    status = {host.host: host for host in pool.status()}
+    assert not status['http://a:11434'].healthy
+    assert status['http://b:11434'].models == {'llama3.2:latest'}
+
+
+def test_all_hosts_down():
+    client = OllamaInstructor(pool=make_pool(FakeHosts(down={'a', 'b'})))
+    with pytest.raises(NoHealthyHostError):
+        client.chat_completion(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES)
+
+
+def test_validation_retry_goes_to_other_host():
+    fake = FakeHosts(outputs={'a': [INVALID], 'b': [INVALID]})
+    client = OllamaInstructor(pool=make_pool(fake, routing='model_affinity'))
+
+    client.chat_completion(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES)
+
+    first, second = fake.hits[:2]
+    assert first != second
+
+
+def test_stream_retry_goes_to_other_host():
+    fake = FakeHosts(outputs={'a': [INVALID], 'b': [INVALID]})
+    client = OllamaInstructor(pool=make_pool(fake, routing='model_affinity'))
+
+    list(client.chat_stream(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES))
+
+    first, second = fake.hits[:2]
+    assert first != second
+
+
+async def test_async_partial_stream_retry_goes_to_other_host():
+    fake = FakeHosts(outputs={'a': [INVALID], 'b': [INVALID]})
+    client = OllamaInstructorAsync(pool=make_pool(fake, routing='model_affinity'))
+
+    [chunk async for chunk in await client.chat_stream_partial(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES)]
+
+    first, second = fake.hits[:2]
+    assert first != second
+
+
+def test_health_check_readmits_host():
+    fake = FakeHosts(down={'a'})
+    pool = make_pool(fake, max_failures=1)
+    pool.check_health()
+    assert [host.healthy for host in pool.status()] == [False, True]
+
+    fake.down.clear()
+    pool.check_health()
+    assert [host.healthy for host in pool.status()] == [True, True]
+
+
+async def test_async_client_routes_requests():
+    fake = FakeHosts(down={'b'})
+    client = OllamaInstructorAsync(pool=make_pool(fake))
+
+    for _ in range(3):
+        await client.chat_completion(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES)
+
+    assert fake.hits == ['a'] * 3
+
+
+def test_streams_release_host():
+    pool = make_pool(FakeHosts())
+    client = OllamaInstructor(pool=pool)
+
+    outstanding = [
+        sum(host.outstanding for host in pool.status())
+        for _ in client.chat_stream(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES)
+    ]
+
+    assert outstanding[0] == 1
+    assert sum(host.outstanding for host in pool.status()) == 0
+
+
+def test_host_base_path_is_kept():
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append((request.url.host, request.url.path))
+        if request.url.host == 'a':
+            raise httpx.ConnectError('connection refused', request=request)
+        return FakeHosts().handler(request)
+
+    pool = HostPool(['http://a/ollama', 'http://b:8080/llm/'])
+    pool._transport = httpx.MockTransport(handler)
+    client = OllamaInstructor(pool=pool)
+
+    client.chat_completion(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES)
+    pool.check_health()
+
+    prefixes = {'a': '/ollama/api/', 'b': '/llm/api/'}
+    assert all(path.startswith(prefixes[host]) for host, path in seen)
+    assert ('b', '/llm/api/chat') in seen
+    assert {('a', '/ollama/api/ps'), ('b', '/llm/api/ps')} <= set(seen)
+
+
+def test_health_loop_survives_unexpected_errors(monkeypatch):
+    calls = []
+    checked_twice = threading.Event()
+
+    def check_health(self):
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError('unexpected')
+        checked_twice.set()
+
+    monkeypatch.setattr(HostPool, 'check_health', check_health)
+    pool = HostPool(['a'], health_check_interval=0.01)
+    try:
+        assert checked_twice.wait(2)
+    finally:
+        pool.close()
+
+
+def test_malformed_health_answer_ejects_host():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={'models': ['not an object']})
+
+    pool = HostPool(['a'], max_failures=1)
+    pool._transport = httpx.MockTransport(handler)
+
+    assert [host.healthy for host in pool.check_health()] == [False]
@@ -0,0 +1,88 @@
+import json
+import logging
+
+import pytest
+from pydantic import BaseModel
+from src.ollama_instructor import InfoSampler, JSONFormatter, OllamaInstructor, OllamaInstructorAsync
+
+class FriendInfo(BaseModel):
+    name: str
+    age: int
+    is_available: bool
+
+VALID = '{"name": "Ollama", "age": 22, "is_available": false}'
+INVALID = '{"name": "Ollama", "age": "x", "is_available": false}'
+MESSAGES = [{'role': 'user', 'content': 'friend'}]
+
+
+def make_record(level: int, request_id: str | None = None) -> logging.LogRecord:
+    record = logging.LogRecord('ollama_instructor', level, __file__, 1, 'message %s', ('arg',), None)
+    if request_id is not None:
+        record.request_id = request_id
+    return record
+
+
+class TestRequestContext:
+    def test_completion_records_carry_request_id_and_attempt(self, fake_ollama, caplog):
+        client = OllamaInstructor(transport=fake_ollama([INVALID, VALID]).transport)
+
+        with caplog.at_level(logging.DEBUG, logger='ollama_instructor'):
+            client.chat_completion(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES)
+
+        records = [r for r in caplog.records if hasattr(r, 'request_id')]
+        assert len({r.request_id for r in records}) == 1
+        assert {r.model for r in records} == {'llama3.2:latest'}
+        failed = [r for r in records if r.levelno == logging.ERROR]
+        assert [r.attempt for r in failed] == [1]
+        assert failed[0].getMessage() == 'Validation failed with 1 errors'
+        assert records[-1].attempt == 2
+
+    async def test_async_stream_records_carry_attempt(self, fake_ollama, caplog):
+        client = OllamaInstructorAsync(transport=fake_ollama([VALID]).transport)
+
+        with caplog.at_level(logging.DEBUG, logger='ollama_instructor'):
+            async for _ in await client.chat_stream(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES):
+                pass
+
+        attempts = [getattr(r, 'attempt', None) for r in caplog.records]
+        assert 1 in attempts
+
+    def test_requests_get_distinct_ids(self, fake_ollama, caplog):
+        client = OllamaInstructor(transport=fake_ollama([VALID, VALID]).transport)
+
+        with caplog.at_level(logging.INFO, logger='ollama_instructor'):
+            client.chat_completion(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES)
+            client.chat_completion(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES)
+
+        assert len({r.request_id for r in caplog.records if hasattr(r, 'request_id')}) == 2
+
+
+class TestInfoSampler:
+    def test_other_levels_always_pass(self):
+        sampler = InfoSampler(0)
+        assert sampler.filter(make_record(logging.WARNING, 'a'))
+        assert sampler.filter(make_record(logging.DEBUG, 'a'))
+        assert not sampler.filter(make_record(logging.INFO, 'a'))
+
+    def test_samples_per_request(self):
+        sampler = InfoSampler(0.5)
+        ids = [f'request-{i}' for i in range(1000)]
+        kept = [request_id for request_id in ids if sampler.filter(make_record(logging.INFO, request_id))]
+        assert 350 < len(kept) < 650
+        assert all(sampler.filter(make_record(logging.INFO, request_id)) for request_id in kept)
+
+    def test_rejects_invalid_rate(self):
+        with pytest.raises(ValueError):
+            InfoSampler(1.5)
+
+
+def test_json_formatter_includes_context():
+    record = make_record(logging.INFO, 'abc-1')
+    record.attempt = 2
+
+    data = json.loads(JSONFormatter().format(record))
+
+    assert data['message'] == 'message arg'
+    assert data['request_id'] == 'abc-1'
+    assert data['attempt'] == 2
+    assert 'model' not in data
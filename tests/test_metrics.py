@@ -0,0 +1,101 @@
+import pytest
+from pydantic import BaseModel
+from src.ollama_instructor import (
+    OllamaInstructor,
+    OllamaInstructorAsync,
+    AttemptEvent,
+    CompositeInstrumentation,
+    Histogram,
+    Instrumentation,
+    MemoryCache,
+    MetricsAggregator,
+)
+
+class FriendInfo(BaseModel):
+    name: str
+    age: int
+    is_available: bool
+
+VALID = '{"name": "Ollama", "age": 22, "is_available": false}'
+MESSAGES = [{'role': 'user', 'content': 'friend'}]
+
+
+class EventCollector(Instrumentation):
+    def __init__(self):
+        self.events: list[AttemptEvent] = []
+
+    def on_attempt(self, event: AttemptEvent) -> None:
+        self.events.append(event)
+
+
+def test_histogram_percentiles():
+    histogram = Histogram(max_samples=100)
+    for value in range(1, 101):
+        histogram.observe(value)
+    assert histogram.percentile(50) == 50
+    assert histogram.percentile(99) == 99
+    assert histogram.summary()['max'] == 100
+    assert histogram.mean == 50.5
+
+
+class TestInstrumentation:
+    def test_completion_events(self, fake_ollama):
+        collector = EventCollector()
+        aggregator = MetricsAggregator()
+        client = OllamaInstructor(
+            instrumentation=CompositeInstrumentation(collector, aggregator),
+            cache=MemoryCache(),
+            transport=fake_ollama(['{"name": "Ollama", "age": "x"}', VALID]).transport
+        )
+
+        client.chat_completion(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES)
+        client.chat_completion(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES)
+
+        failed, succeeded, cached = collector.events
+        assert (failed.attempt, failed.outcome, failed.failure) == (1, 'validation_error', 'int_parsing at age')
+        assert (succeeded.attempt, succeeded.outcome) == (2, 'success')
+        assert succeeded.eval_count == 20
+        assert succeeded.tokens_per_second == pytest.approx(10_000)
+        assert succeeded.validation_duration > 0
+        assert cached.outcome == 'cache_hit'
+
+        snapshot = aggregator.snapshot()
+        assert snapshot['outcomes'] == {'validation_error': 1, 'success': 1, 'cache_hit': 1}
+        assert snapshot['histograms']['attempts']['max'] == 2
+
+    def test_stream_time_to_first_chunk(self, fake_ollama):
+        collector = EventCollector()
+        client = OllamaInstructor(instrumentation=collector, transport=fake_ollama([VALID]).transport)
+
+        list(client.chat_stream(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES))
+
+        event, = collector.events
+        assert event.kind == 'stream'
+        assert event.outcome == 'success'
+        assert 0 < event.time_to_first_chunk <= event.duration
+
+
+@pytest.mark.asyncio
+async def test_async_partial_stream_events(fake_ollama):
+    collector = EventCollector()
+    client = OllamaInstructorAsync(instrumentation=collector, transport=fake_ollama(['[', VALID]).transport)
+
+    stream = await client.chat_stream_partial(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES)
+    async for _ in stream:
+        pass
+
+    assert [(e.kind, e.attempt, e.outcome) for e in collector.events] == [
+        ('stream_partial', 1, 'validation_error'),
+        ('stream_partial', 2, 'success'),
+    ]
+
+
+def test_prometheus_adapter():
+    prometheus_client = pytest.importorskip('prometheus_client')
+    from src.ollama_instructor import PrometheusInstrumentation
+
+    registry = prometheus_client.CollectorRegistry()
+    instrumentation = PrometheusInstrumentation(registry=registry)
+    instrumentation.on_attempt(AttemptEvent(kind='completion', model='m', attempt=1, outcome='success', duration=0.5, eval_count=3))
+
+    assert registry.get_sample_value('ollama_instructor_attempts_total', {'kind': 'completion', 'model': 'm', 'outcome': 'success'}) == 1
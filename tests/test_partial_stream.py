@@ -0,0 +1,154 @@
+import json
+from typing import Literal
+
+import pytest
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+from src.ollama_instructor import (
+    OllamaInstructor,
+    OllamaInstructorAsync,
+    PartialJSONError,
+    PartialJSONParser,
+    compile_format,
+    partial_model,
+)
+from src.ollama_instructor._partial import PartialValidator
+
+class FriendInfo(BaseModel):
+    name: str = Field(min_length=1)
+    age: int
+    is_available: bool
+
+class FriendList(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+    friends: list[FriendInfo]
+    mood: Literal['happy', 'sad'] = 'happy'
+
+VALID = '{"friends": [{"name": "Ollama", "age": 22, "is_available": false}, {"name": "Alonso", "age": 23, "is_available": true}]}'
+MESSAGES = [{'role': 'user', 'content': 'friends'}]
+
+
+class TestPartialJSONParser:
+    def test_chunked_document(self):
+        parser = PartialJSONParser()
+        document = '{"a": [1, -2.5e3, "x\\"y\\u00e9"], "b": {"c": null, "d": true}}'
+        for i in range(0, len(document), 3):
+            parser.feed(document[i:i + 3])
+        assert parser.complete
+        assert parser.close() == {"a": [1, -2500.0, 'x"yé'], "b": {"c": None, "d": True}}
+
+    def test_incomplete_scalars_are_left_out(self):
+        parser = PartialJSONParser()
+        parser.feed('{"a": [1, 2], "b": "unfini')
+        assert parser.value == {"a": [1, 2]}
+        assert not parser.complete
+
+    @pytest.mark.parametrize('document', ['{"a" 1', '{"a": tru,', '{"a": 01,', '{} {', '{"a": 1]'])
+    def test_structural_errors(self, document):
+        with pytest.raises(PartialJSONError):
+            PartialJSONParser().feed(document)
+
+    def test_unexpected_end(self):
+        parser = PartialJSONParser()
+        parser.feed('{"a": 1')
+        with pytest.raises(PartialJSONError):
+            parser.close()
+
+
+    def test_milestones(self):
+        parser = PartialJSONParser()
+        parser.feed('{"a": [1, {"b": [2]}], "c": {"d": 3}}')
+        assert parser.milestones == [("a", 0), ("a", 1), ("a",), ("c", "d"), ("c",), ()]
+
+
+class TestPartialValidator:
+    def test_validates_each_item_on_its_own(self, monkeypatch):
+        friends = [{'name': f'Friend {i}', 'age': i, 'is_available': True} for i in range(200)]
+        document = json.dumps({'friends': friends})
+        validator = PartialValidator(compile_format(FriendList))
+        sizes = []
+        validate = PartialValidator._validate
+
+        def recording(self, value):
+            sizes.append(len(json.dumps(value)))
+            return validate(self, value)
+
+        monkeypatch.setattr(PartialValidator, '_validate', recording)
+        counts = []
+        for i in range(0, len(document), 16):
+            partial = validator.feed(document[i:i + 16])
+            if partial is not None:
+                counts.append(len(partial.friends))
+
+        assert counts == sorted(counts) and counts[-1] == 200
+        assert validator.partial.friends[123].name == 'Friend 123'
+        # Every item is validated alone; only the complete document is validated as a whole
+        assert max(sizes[:-1]) < 100
+        assert sizes[-1] == len(document)
+
+    def test_invalid_item_raises(self):
+        validator = PartialValidator(compile_format(FriendList))
+        validator.feed('{"friends": [{"name": "Ollama", "age": 22, "is_available": true}, ')
+        with pytest.raises(ValidationError):
+            validator.feed('{"name": "Alonso", "age": "old", "is_available": true}')
+
+    def test_position_dependent_items(self):
+        class Pair(BaseModel):
+            pair: tuple[str, int]
+
+        validator = PartialValidator(compile_format(Pair))
+        for char in '{"pair": ["a", 1]}':
+            validator.feed(char)
+        assert validator.partial.pair == ('a', 1)
+
+
+def test_partial_model_is_all_optional():
+    partial = partial_model(FriendList)
+    instance = partial.model_validate({'friends': [{'name': 'Ollama'}]})
+    assert instance.friends[0].name == 'Ollama'
+    assert instance.friends[0].age is None
+    assert partial_model(FriendList) is partial
+
+
+class TestOllamaInstructorPartial:
+    def test_partials_grow(self, fake_ollama):
+        client = OllamaInstructor(transport=fake_ollama([VALID], chunk_size=10).transport)
+
+        results = list(client.chat_stream_partial(format=FriendList, model='llama3.2:latest', messages=MESSAGES))
+
+        populated = [len(r.partial.friends) for r in results if r.partial is not None and r.partial.friends]
+        assert populated == sorted(populated)
+        assert results[-1].done
+        assert results[-1].parsed == FriendList.model_validate_json(VALID)
+        assert all(r.attempt == 1 for r in results)
+
+    def test_aborts_early_and_retries(self, fake_ollama):
+        invalid = '{"friends": [{"name": "Ollama", "age": "twenty-two", "is_available": false}' + ' ' * 500 + ']}'
+        fake = fake_ollama([invalid, VALID], chunk_size=10)
+        client = OllamaInstructor(transport=fake.transport)
+
+        results = list(client.chat_stream_partial(format=FriendList, model='llama3.2:latest', messages=MESSAGES))
+
+        first_attempt = [r for r in results if r.attempt == 1]
+        assert len(first_attempt) < 10
+        assert results[-1].attempt == 2
+        assert results[-1].parsed is not None
+        assert len(fake.requests) == 2
+
+    def test_unknown_key_aborts(self, fake_ollama):
+        invalid = '{"enemies": [], "friends": []}'
+        client = OllamaInstructor(transport=fake_ollama([invalid, VALID], chunk_size=4).transport)
+
+        results = list(client.chat_stream_partial(format=FriendList, model='llama3.2:latest', messages=MESSAGES))
+
+        assert results[-1].attempt == 2
+
+
+@pytest.mark.asyncio
+async def test_async_chat_stream_partial(fake_ollama):
+    client = OllamaInstructorAsync(transport=fake_ollama(['[1, 2]', VALID], chunk_size=4).transport)
+
+    stream = await client.chat_stream_partial(format=FriendList, model='llama3.2:latest', messages=MESSAGES)
+    results = [r async for r in stream]
+
+    assert results[-1].attempt == 2
+    assert results[-1].parsed.friends[1].name == 'Alonso'
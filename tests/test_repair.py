@@ -0,0 +1,111 @@
+from typing import Optional
+
+import pytest
+from pydantic import BaseModel, ConfigDict
+from src.ollama_instructor import (
+    OllamaInstructor,
+    OllamaInstructorAsync,
+    FormatRegistry,
+    JSONRepairer,
+    StreamReset,
+    extract_json_object,
+)
+
+class FriendInfo(BaseModel):
+    model_config = ConfigDict(strict=True)
+    name: str
+    age: int
+    nickname: Optional[str]
+
+VALID = '{"name": "Ollama", "age": 22, "nickname": null}'
+MESSAGES = [{'role': 'user', 'content': 'friend'}]
+
+
+def repair(content):
+    compiled = FormatRegistry().get(FriendInfo)
+    try:
+        compiled.validate_json(content)
+    except Exception as e:
+        return JSONRepairer().repair(compiled, content, e)
+
+
+def test_extract_json_object():
+    assert extract_json_object('Sure! {"a": "}"} Hope that helps {"b": 1}') == '{"a": "}"}'
+    assert extract_json_object('no json here') is None
+
+
+class TestJSONRepairer:
+    def test_trailing_text(self):
+        result = repair(VALID + '\nLet me know if you need anything else.')
+        assert result.steps == ('extract',)
+        assert result.content == VALID
+
+    def test_lax_coercion(self):
+        result = repair('{"name": "Ollama", "age": "22", "nickname": null}')
+        assert result.steps == ('lax',)
+        assert result.parsed.age == 22
+
+    def test_fill_missing_optional(self):
+        result = repair('{"name": "Ollama", "age": 22}')
+        assert result.steps == ('fill_missing',)
+        assert result.parsed.nickname is None
+
+    def test_fill_missing_reports_lax_coercion(self):
+        result = repair('{"name": "Ollama", "age": "22"}')
+        assert result.steps == ('lax', 'fill_missing')
+        assert result.parsed.age == 22
+
+    def test_unrepairable(self):
+        assert repair('{"name": "Ollama", "nickname": null}') is None
+        assert repair('not even close') is None
+
+
+def test_repair_saves_retry(fake_ollama):
+    fake = fake_ollama(['Here you go: {"name": "Ollama", "age": "22"}'])
+    repairer = JSONRepairer()
+    client = OllamaInstructor(repair=repairer, transport=fake.transport)
+
+    result = client.chat_parsed(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES)
+
+    assert len(fake.requests) == 1
+    assert result.repairs == ('extract', 'lax', 'fill_missing')
+    assert result.parsed == FriendInfo(name='Ollama', age=22, nickname=None)
+    assert repairer.stats().retries_saved == 1
+
+
+def test_stream_repair_delivers_repaired_content(fake_ollama):
+    fake = fake_ollama(['Sure: ' + VALID + ' Done.'])
+    client = OllamaInstructor(repair=JSONRepairer(), transport=fake.transport)
+
+    chunks = list(client.chat_stream(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES, release='validated'))
+
+    assert ''.join(chunk.message.content for chunk in chunks) == VALID
+    assert chunks[-1].done
+    assert len(fake.requests) == 1
+
+
+def test_released_stream_is_retried_instead_of_repaired(fake_ollama):
+    fake = fake_ollama([VALID + ' Done.', VALID])
+    client = OllamaInstructor(repair=JSONRepairer(), transport=fake.transport)
+
+    chunks = list(client.chat_stream(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES))
+
+    resets = [i for i, chunk in enumerate(chunks) if isinstance(chunk, StreamReset)]
+    assert len(resets) == 1
+    assert ''.join(chunk.message.content for chunk in chunks[resets[0] + 1:]) == VALID
+    assert len(fake.requests) == 2
+
+
+@pytest.mark.asyncio
+async def test_async_stream_repair(fake_ollama):
+    fake = fake_ollama([VALID + ' Done.'])
+    client = OllamaInstructorAsync(repair=JSONRepairer(), transport=fake.transport)
+
+    stream = await client.chat_stream(
+        format=FriendInfo, model='llama3.2:latest', messages=MESSAGES, release='validated'
+    )
+    chunks = [chunk async for chunk in stream]
+
+    assert ''.join(chunk.message.content for chunk in chunks) == VALID
+    assert chunks[-1].done
+    assert len(fake.requests) == 1
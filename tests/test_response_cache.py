@@ -0,0 +1,110 @@
+import time
+
+import pytest
+from ollama import Message
+from pydantic import BaseModel
+from src.ollama_instructor import (
+    OllamaInstructor,
+    OllamaInstructorAsync,
+    MemoryCache,
+    SQLiteCache,
+    make_cache_key,
+)
+
+class FriendInfo(BaseModel):
+    name: str
+    age: int
+    is_available: bool
+
+VALID = '{"name": "Ollama", "age": 22, "is_available": false}'
+MESSAGES = [{'role': 'user', 'content': 'friend'}]
+OPTIONS = {'temperature': 0, 'seed': 42}
+SCHEMA = b'{"type":"object"}'
+
+
+class TestCacheKey:
+    def test_normalized(self):
+        key = make_cache_key('llama3.2', MESSAGES, SCHEMA, OPTIONS)
+        assert key == make_cache_key('llama3.2', [Message(role='user', content='friend')], SCHEMA, {'seed': 42, 'temperature': 0, 'top_k': None})
+
+    @pytest.mark.parametrize('model, messages, schema, options', [
+        ('llama3.1', MESSAGES, SCHEMA, OPTIONS),
+        ('llama3.2', [{'role': 'user', 'content': 'friends'}], SCHEMA, OPTIONS),
+        ('llama3.2', MESSAGES, b'{"type":"array"}', OPTIONS),
+        ('llama3.2', MESSAGES, SCHEMA, {'temperature': 0, 'seed': 43}),
+    ])
+    def test_differs(self, model, messages, schema, options):
+        assert make_cache_key('llama3.2', MESSAGES, SCHEMA, OPTIONS) != make_cache_key(model, messages, schema, options)
+
+
+class TestBackends:
+    def test_memory_lru_and_ttl(self):
+        cache = MemoryCache(maxsize=2, ttl=0.05)
+        cache.set('a', b'1')
+        cache.set('b', b'2')
+        cache.get('a')
+        cache.set('c', b'3')
+        assert cache.get('b') is None
+        assert cache.get('a') == b'1'
+        time.sleep(0.06)
+        assert cache.get('a') is None
+
+    def test_sqlite_survives_reopen(self, tmp_path):
+        path = tmp_path / 'cache.db'
+        cache = SQLiteCache(path, maxsize=2)
+        for key in 'abc':
+            cache.set(key, key.encode())
+        assert len(cache) == 2
+        cache.close()
+
+        reopened = SQLiteCache(path)
+        assert reopened.get('c') == b'c'
+        assert reopened.get('a') is None
+
+
+class TestOllamaInstructorCache:
+    def test_completion_hit(self, fake_ollama, tmp_path):
+        fake = fake_ollama([VALID])
+        client = OllamaInstructor(cache=SQLiteCache(tmp_path / 'cache.db'), transport=fake.transport)
+
+        first = client.chat_parsed(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES, options=OPTIONS)
+        second = client.chat_parsed(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES, options=OPTIONS)
+
+        assert len(fake.requests) == 1
+        assert second.parsed == first.parsed
+        assert second.eval_count == first.eval_count
+
+    def test_invalid_responses_are_not_cached(self, fake_ollama):
+        cache = MemoryCache()
+        client = OllamaInstructor(cache=cache, transport=fake_ollama(['{}', VALID]).transport)
+
+        client.chat_completion(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES, retries=2)
+
+        assert len(cache) == 1
+
+    def test_stream_replays_completion(self, fake_ollama):
+        fake = fake_ollama([VALID])
+        client = OllamaInstructor(cache=MemoryCache(), transport=fake.transport)
+
+        client.chat_completion(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES)
+        chunks = list(client.chat_stream(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES))
+
+        assert len(fake.requests) == 1
+        assert ''.join(chunk.message.content for chunk in chunks) == VALID
+        assert chunks[-1].done and chunks[-1].eval_count == 20
+
+
+@pytest.mark.asyncio
+async def test_async_stream_is_cached(fake_ollama):
+    fake = fake_ollama([VALID])
+    client = OllamaInstructorAsync(cache=MemoryCache(), transport=fake.transport)
+
+    for _ in range(2):
+        stream = await client.chat_stream(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES)
+        content = ''.join([chunk.message.content async for chunk in stream])
+
+    assert content == VALID
+    assert len(fake.requests) == 1
+    response = await client.chat_completion(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES)
+    assert response.message.content == VALID
+    assert len(fake.requests) == 1
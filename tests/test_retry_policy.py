@@ -0,0 +1,133 @@
+import json
+import time
+
+import httpx
+import pytest
+from ollama import ResponseError
+from pydantic import BaseModel, ValidationError
+from src.ollama_instructor import OllamaInstructor, OllamaInstructorAsync, RetryBudget, RetryPolicy, is_transient
+
+class Person(BaseModel):
+    name: str
+    age: int
+
+VALID = json.dumps({'name': 'Ollama', 'age': 22})
+INVALID = json.dumps({'name': 'Ollama', 'age': 'old'})
+MESSAGES = [{'role': 'user', 'content': 'person'}]
+
+
+def failing_first(fake, statuses: list[int]) -> httpx.MockTransport:
+    """Transport answering with `statuses` before handing requests to `fake`"""
+    statuses = list(statuses)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if statuses:
+            return httpx.Response(statuses.pop(0), json={'error': 'overloaded'})
+        return fake.handler(request)
+
+    return httpx.MockTransport(handler)
+
+
+def test_validation_failures_retry_without_backoff(fake_ollama):
+    fake = fake_ollama([INVALID, INVALID, VALID])
+    client = OllamaInstructor(transport=fake.transport)
+
+    started = time.monotonic()
+    result = client.chat_parsed(format=Person, model='llama3.2:latest', messages=MESSAGES)
+
+    assert result.parsed.age == 22
+    assert result.attempts == 3
+    assert time.monotonic() - started < 0.5
+
+
+def test_transport_errors_are_not_retried_by_default(fake_ollama):
+    fake = fake_ollama([VALID])
+    client = OllamaInstructor(transport=failing_first(fake, [503]))
+
+    with pytest.raises(ResponseError):
+        client.chat_parsed(format=Person, model='llama3.2:latest', messages=MESSAGES)
+
+
+def test_transient_errors_retried_with_policy(fake_ollama):
+    fake = fake_ollama([VALID])
+    policy = RetryPolicy(retry_transport_errors=True, wait_initial=0.01, wait_jitter=0)
+    client = OllamaInstructor(transport=failing_first(fake, [503, 429]), retry_policy=policy)
+
+    result = client.chat_parsed(format=Person, model='llama3.2:latest', messages=MESSAGES)
+
+    assert result.parsed.name == 'Ollama'
+    assert result.attempts == 3
+
+
+def test_client_errors_are_never_retried(fake_ollama):
+    fake = fake_ollama([VALID])
+    policy = RetryPolicy(retry_transport_errors=True, wait_initial=0.01, wait_jitter=0)
+    client = OllamaInstructor(transport=failing_first(fake, [400]), retry_policy=policy)
+
+    with pytest.raises(ResponseError):
+        client.chat_parsed(format=Person, model='llama3.2:latest', messages=MESSAGES)
+    assert fake.requests == []
+
+
+def test_budget_stops_retries(fake_ollama):
+    fake = fake_ollama([INVALID, INVALID, VALID])
+    budget = RetryBudget(ratio=0, capacity=1)
+    client = OllamaInstructor(transport=fake.transport, retry_policy=RetryPolicy(budget=budget))
+
+    with pytest.raises(ValidationError):
+        client.chat_parsed(format=Person, model='llama3.2:latest', messages=MESSAGES, retries=5)
+    assert len(fake.requests) == 2
+    assert budget.tokens == 0
+    assert budget.denied == 1
+
+
+def test_budget_refills_with_calls():
+    budget = RetryBudget(ratio=0.5, capacity=2)
+    assert budget.withdraw() and budget.withdraw()
+    assert not budget.withdraw()
+    budget.deposit()
+    budget.deposit()
+    assert budget.withdraw()
+    for _ in range(10):
+        budget.deposit()
+    assert budget.tokens == 2
+
+
+def test_deadline_stops_retries(fake_ollama):
+    fake = fake_ollama([INVALID, INVALID, VALID])
+    policy = RetryPolicy(deadline=0.05, validation_backoff=0.1)
+    client = OllamaInstructor(transport=fake.transport, retry_policy=policy)
+
+    with pytest.raises(ValidationError):
+        client.chat_parsed(format=Person, model='llama3.2:latest', messages=MESSAGES, retries=5)
+    assert len(fake.requests) == 1
+
+
+def test_cache_hits_take_no_attempt(fake_ollama):
+    from src.ollama_instructor import MemoryCache
+    fake = fake_ollama([VALID])
+    client = OllamaInstructor(transport=fake.transport, cache=MemoryCache())
+
+    first = client.chat_parsed(format=Person, model='llama3.2:latest', messages=MESSAGES)
+    second = client.chat_parsed(format=Person, model='llama3.2:latest', messages=MESSAGES)
+
+    assert (first.attempts, second.attempts) == (1, 0)
+
+
+def test_is_transient():
+    assert is_transient(ResponseError('busy', 503))
+    assert is_transient(httpx.ConnectError('refused'))
+    assert not is_transient(ResponseError('bad request', 400))
+    assert not is_transient(ValueError())
+
+
+@pytest.mark.asyncio
+async def test_async_transient_errors_retried_with_policy(fake_ollama):
+    fake = fake_ollama([INVALID, VALID])
+    policy = RetryPolicy(retry_transport_errors=True, wait_initial=0.01, wait_jitter=0)
+    client = OllamaInstructorAsync(transport=failing_first(fake, [502]), retry_policy=policy)
+
+    result = await client.chat_parsed(format=Person, model='llama3.2:latest', messages=MESSAGES)
+
+    assert result.parsed.age == 22
+    assert result.attempts == 3
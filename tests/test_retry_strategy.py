@@ -0,0 +1,92 @@
+import pytest
+from ollama import Options
+from pydantic import BaseModel, ValidationError
+from src.ollama_instructor import (
+    OllamaInstructor,
+    OllamaInstructorAsync,
+    AttemptFailure,
+    AttemptRequest,
+    ErrorFeedbackRetry,
+    TemperatureBumpRetry,
+    summarize_validation_error,
+)
+
+class FriendInfo(BaseModel):
+    name: str
+    age: int
+    is_available: bool
+
+VALID = '{"name": "Ollama", "age": 22, "is_available": false}'
+INVALID = '{"name": "Ollama", "age": "twenty-two"}'
+MESSAGES = [{'role': 'user', 'content': 'friend'}]
+
+
+def validation_error() -> ValidationError:
+    try:
+        FriendInfo.model_validate_json(INVALID)
+    except ValidationError as e:
+        return e
+
+
+def test_summarize_validation_error():
+    summary = summarize_validation_error(validation_error())
+    assert summary.splitlines() == [
+        "- age: Input should be a valid integer, unable to parse string as an integer (got 'twenty-two')",
+        "- is_available: Field required",
+    ]
+    assert summarize_validation_error(validation_error(), max_errors=1).endswith('and 1 more errors')
+
+
+class TestStrategies:
+    def test_error_feedback_adds_correction_turn(self):
+        original = AttemptRequest(messages=MESSAGES, options=None)
+        failure = AttemptFailure(attempt=2, error=validation_error(), content=INVALID)
+
+        request = ErrorFeedbackRetry().next_request(original, failure)
+
+        assert request.messages[:1] == MESSAGES
+        assert request.messages[1] == {'role': 'assistant', 'content': INVALID}
+        assert 'is_available: Field required' in request.messages[2]['content']
+        assert 'complete' in request.messages[2]['content']
+
+    def test_error_feedback_asks_only_for_requested_fields(self):
+        original = AttemptRequest(messages=MESSAGES, options=None)
+        failure = AttemptFailure(attempt=1, error=validation_error(), content=INVALID, fields=('age', 'is_available'))
+
+        request = ErrorFeedbackRetry().next_request(original, failure)
+
+        assert 'complete' not in request.messages[2]['content']
+        assert request.messages[2]['content'].endswith('containing only the fields age, is_available.')
+
+    def test_temperature_bump(self):
+        original = AttemptRequest(messages=MESSAGES, options=Options(temperature=0.0, seed=1))
+
+        request = TemperatureBumpRetry(step=0.3).next_request(
+            original, AttemptFailure(attempt=2, error=validation_error(), content=INVALID)
+        )
+
+        assert request.options['temperature'] == pytest.approx(0.6)
+        assert 'seed' in request.options
+        assert original.options.temperature == 0.0
+
+
+def test_error_feedback_is_sent(fake_ollama):
+    fake = fake_ollama([INVALID, VALID])
+    client = OllamaInstructor(retry_strategy=ErrorFeedbackRetry(), transport=fake.transport)
+
+    result = client.chat_parsed(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES)
+
+    assert result.parsed.age == 22
+    assert len(fake.requests[0]['messages']) == 1
+    assert [m['role'] for m in fake.requests[1]['messages']] == ['user', 'assistant', 'user']
+    assert fake.requests[1]['messages'][1]['content'] == INVALID
+
+
+@pytest.mark.asyncio
+async def test_async_strategy_keeps_prompt_bounded(fake_ollama):
+    fake = fake_ollama([INVALID, INVALID, VALID])
+    client = OllamaInstructorAsync(retry_strategy=ErrorFeedbackRetry(), transport=fake.transport)
+
+    await client.chat_completion(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES)
+
+    assert [len(request['messages']) for request in fake.requests] == [1, 3, 3]
@@ -0,0 +1,163 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+from pydantic import BaseModel
+from src.ollama_instructor import (
+    DeadlineExceededError,
+    OllamaInstructorAsync,
+    QueueFullError,
+    Scheduler,
+    priority_scope,
+)
+
+class FriendInfo(BaseModel):
+    name: str
+    age: int
+    is_available: bool
+
+VALID = '{"name": "Ollama", "age": 22, "is_available": false}'
+
+
+class CountingOllama:
+    """Async stand-in recording the order of requests and the peak of requests in flight"""
+    def __init__(self, delay: float = 0.02):
+        self.delay = delay
+        self.running = 0
+        self.peak = 0
+        self.order: list[str] = []
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        self.order.append(body['messages'][0]['content'])
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(self.delay)
+        self.running -= 1
+        return httpx.Response(200, json={
+            'model': body['model'],
+            'created_at': '2025-01-01T00:00:00Z',
+            'message': {'role': 'assistant', 'content': VALID},
+            'done': True,
+        })
+
+
+async def hold(scheduler: Scheduler, model: str, seconds: float, **kwargs) -> None:
+    async with scheduler.slot(model, **kwargs):
+        await asyncio.sleep(seconds)
+
+
+async def test_limits_concurrency_per_model():
+    scheduler = Scheduler(max_concurrency=2, model_concurrency={'big': 1})
+    running = {'small': 0, 'big': 0}
+    peak = {'small': 0, 'big': 0}
+
+    async def run(model: str) -> None:
+        async with scheduler.slot(model):
+            running[model] += 1
+            peak[model] = max(peak[model], running[model])
+            await asyncio.sleep(0.01)
+            running[model] -= 1
+
+    await asyncio.gather(*(run(model) for model in ['small', 'big'] * 5))
+
+    assert peak == {'small': 2, 'big': 1}
+    assert all(status.running == 0 and status.queued == 0 for status in scheduler.status())
+
+
+async def test_interactive_requests_skip_ahead_of_bulk():
+    scheduler = Scheduler(max_concurrency=1)
+    order = []
+
+    async def run(name: str, priority: str) -> None:
+        async with scheduler.slot('m', priority=priority):
+            order.append(name)
+
+    blocker = asyncio.create_task(hold(scheduler, 'm', 0.02))
+    await asyncio.sleep(0)
+    tasks = [asyncio.create_task(run(f'bulk-{i}', 'bulk')) for i in range(3)]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(run('interactive', 'interactive')))
+    await asyncio.gather(blocker, *tasks)
+
+    assert order == ['interactive', 'bulk-0', 'bulk-1', 'bulk-2']
+
+
+async def test_full_queue_sheds_bulk_before_interactive():
+    scheduler = Scheduler(max_concurrency=1, max_queue=1)
+    blocker = asyncio.create_task(hold(scheduler, 'm', 0.02))
+    await asyncio.sleep(0)
+    bulk = asyncio.create_task(hold(scheduler, 'm', 0, priority='bulk'))
+    await asyncio.sleep(0)
+    interactive = asyncio.create_task(hold(scheduler, 'm', 0, priority='interactive'))
+    await asyncio.sleep(0)
+
+    with pytest.raises(QueueFullError):
+        await hold(scheduler, 'm', 0, priority='interactive')
+    await asyncio.gather(blocker, interactive)
+    with pytest.raises(QueueFullError):
+        await bulk
+    assert scheduler.status()[0].shed == 2
+
+
+async def test_expired_requests_are_not_sent():
+    scheduler = Scheduler(max_concurrency=1)
+    blocker = asyncio.create_task(hold(scheduler, 'm', 0.05))
+    await asyncio.sleep(0)
+
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceededError):
+        await hold(scheduler, 'm', 0, deadline=time.monotonic() + 0.01)
+    assert time.monotonic() - start < 0.04
+    await blocker
+
+    status = scheduler.status()[0]
+    assert (status.running, status.queued, status.expired) == (0, 0, 1)
+
+
+async def test_cancelled_waiter_leaves_queue():
+    scheduler = Scheduler(max_concurrency=1)
+    blocker = asyncio.create_task(hold(scheduler, 'm', 0.02))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(hold(scheduler, 'm', 0))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    await blocker
+
+    assert scheduler.status()[0].queued == 0
+    await hold(scheduler, 'm', 0)
+    assert scheduler.status()[0].running == 0
+
+
+async def test_client_batch_yields_to_interactive_requests():
+    fake = CountingOllama()
+    client = OllamaInstructorAsync(scheduler=Scheduler(max_concurrency=1), transport=httpx.MockTransport(fake.handler))
+
+    batch = asyncio.create_task(client.chat_completion_batch(
+        format=FriendInfo,
+        model='llama3.2:latest',
+        messages_list=[[{'role': 'user', 'content': f'bulk-{i}'}] for i in range(4)],
+        max_concurrency=4,
+    ))
+    await asyncio.sleep(0.005)
+    await client.chat_parsed(format=FriendInfo, model='llama3.2:latest', messages=[{'role': 'user', 'content': 'interactive'}])
+    results = await batch
+
+    assert fake.peak == 1
+    assert fake.order[1] == 'interactive'
+    assert all(result.ok for result in results)
+
+
+async def test_priority_scope_applies_to_streams():
+    fake = CountingOllama()
+    scheduler = Scheduler(max_concurrency=1)
+    client = OllamaInstructorAsync(scheduler=scheduler, transport=httpx.MockTransport(fake.handler))
+
+    with priority_scope('bulk'):
+        stream = await client.chat_stream(format=FriendInfo, model='llama3.2:latest', messages=[{'role': 'user', 'content': 'a'}])
+        chunks = [chunk async for chunk in stream]
+
+    assert chunks[-1].done
+    assert scheduler.status()[0].running == 0
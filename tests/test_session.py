@@ -0,0 +1,103 @@
+import pytest
+from pydantic import BaseModel
+from src.ollama_instructor import AsyncChatSession, ChatSession, ErrorFeedbackRetry, OllamaInstructor, OllamaInstructorAsync
+
+class Answer(BaseModel):
+    answer: str
+
+PREFIX = [
+    {'role': 'system', 'content': 'Extract the answer.'},
+    {'role': 'user', 'content': 'Example question'},
+    {'role': 'assistant', 'content': '{"answer": "example"}'},
+]
+
+
+def answer(text):
+    return '{"answer": "%s"}' % text
+
+
+def test_prefix_is_sent_identically_on_every_request_and_retry(fake_ollama):
+    fake = fake_ollama([answer('a'), '{}', answer('b'), answer('c')])
+    prefix = [dict(message) for message in PREFIX]
+    session = ChatSession(OllamaInstructor(transport=fake.transport, retry_strategy=ErrorFeedbackRetry()), 'llama3.2:latest', prefix)
+    prefix[0]['content'] = 'changed by the caller'
+
+    session.ask('first', Answer)
+    session.ask('second', Answer)
+    result = session.extract('third', Answer)
+
+    assert result.parsed == Answer(answer='c')
+    assert all(request['messages'][:3] == PREFIX for request in fake.requests)
+    assert [message['content'] for message in fake.requests[2]['messages'][3:]][:3] == ['first', answer('a'), 'second']
+    assert [message['content'] for message in fake.requests[3]['messages'][3:]] == ['third']
+    assert [message['content'] for message in session.history] == ['first', answer('a'), 'second', answer('b')]
+
+
+def test_usage_is_tracked(fake_ollama):
+    session = ChatSession(OllamaInstructor(transport=fake_ollama([answer('a'), answer('b')]).transport), 'llama3.2:latest', PREFIX)
+
+    session.ask('first', Answer)
+    session.extract('other', Answer)
+
+    assert session.usage.requests == 2
+    assert session.usage.prompt_tokens == 20
+    assert session.usage.completion_tokens == 40
+    assert session.usage.prompt_eval_duration == pytest.approx(0.002)
+
+
+def test_history_is_trimmed_to_low_water_mark(fake_ollama):
+    fake = fake_ollama([answer(str(i)) for i in range(6)])
+    # every turn counts 1 token for the question and 20 (eval_count) for the answer
+    session = ChatSession(
+        OllamaInstructor(transport=fake.transport), 'llama3.2:latest', PREFIX,
+        max_history_tokens=60, compact_to=0.5, count_tokens=lambda text: 1
+    )
+
+    for i in range(3):
+        session.ask(f'q{i}', Answer)
+    assert session.history_tokens == 63 - 42
+    assert session.usage.compactions == 1
+    assert [message['content'] for message in session.history] == ['q2', answer('2')]
+
+    session.ask('q3', Answer)
+    assert session.usage.compactions == 1
+
+
+def test_dropped_turns_are_summarized(fake_ollama):
+    fake = fake_ollama([answer(str(i)) for i in range(4)])
+    summaries = []
+
+    def summarize(messages):
+        summaries.append([message['content'] for message in messages])
+        return f'summary of {len(messages)} messages'
+
+    session = ChatSession(
+        OllamaInstructor(transport=fake.transport), 'llama3.2:latest', PREFIX,
+        max_history_tokens=45, count_tokens=lambda text: 1, summarize=summarize
+    )
+    for i in range(4):
+        session.ask(f'q{i}', Answer)
+
+    assert summaries == [['q0', answer('0'), 'q1', answer('1')]]
+    assert fake.requests[3]['messages'][3] == {'role': 'system', 'content': 'summary of 4 messages'}
+    assert fake.requests[3]['messages'][:3] == PREFIX
+
+
+@pytest.mark.asyncio
+async def test_async_session_with_async_summarizer(fake_ollama):
+    fake = fake_ollama([answer('a'), answer('b'), answer('c')])
+
+    async def summarize(messages):
+        return 'summary'
+
+    session = AsyncChatSession(
+        OllamaInstructorAsync(transport=fake.transport), 'llama3.2:latest', PREFIX,
+        max_history_tokens=30, count_tokens=lambda text: 1, summarize=summarize
+    )
+    await session.ask('first', Answer)
+    await session.ask('second', Answer)
+    result = await session.ask('third', Answer)
+
+    assert result.parsed == Answer(answer='c')
+    assert fake.requests[2]['messages'][3]['content'] == 'summary'
+    assert session.usage.compactions == 1
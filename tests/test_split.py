@@ -0,0 +1,149 @@
+import asyncio
+import json
+from datetime import datetime
+
+import httpx
+import pytest
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, model_validator
+from src.ollama_instructor import ErrorFeedbackRetry, OllamaInstructorAsync, SplitChatResponse
+
+class Friend(BaseModel):
+    name: str
+    age: int
+
+class Profile(BaseModel):
+    title: str
+    friends: list[Friend]
+    notes: str = ''
+    count: int
+
+    @model_validator(mode='after')
+    def count_matches(self):
+        if self.count != len(self.friends):
+            raise ValueError('count must match the number of friends')
+        return self
+
+class Contact(BaseModel):
+    name: str = Field(validation_alias='full_name', serialization_alias='fullName')
+    biography: str = Field(serialization_alias='bio', description='A long description of the life of the person')
+    age: int
+
+class Meeting(BaseModel):
+    model_config = ConfigDict(strict=True)
+
+    topic: str
+    starts: datetime
+    seats: int
+
+VALUES = {'title': 'Team', 'friends': [{'name': 'Ollama', 'age': 22}], 'notes': 'none', 'count': 1}
+MESSAGES = [{'role': 'user', 'content': 'profile'}]
+
+
+class FieldOllama:
+    """Answers every request with the values of the fields its format asks for"""
+    def __init__(self, values: dict, invalid_once: set[str] = frozenset()):
+        self.values = values
+        self.invalid_once = set(invalid_once)
+        self.requests: list[tuple[str, ...]] = []
+        self.messages: list[list[dict]] = []
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        fields = tuple(body['format']['properties'])
+        self.requests.append(fields)
+        self.messages.append(body['messages'])
+        await asyncio.sleep(0.01)
+        content = {name: self.values[name] for name in fields}
+        if self.invalid_once & set(fields):
+            self.invalid_once -= set(fields)
+            content = {}
+        return httpx.Response(200, json={
+            'model': body['model'],
+            'created_at': '2025-01-01T00:00:00Z',
+            'message': {'role': 'assistant', 'content': json.dumps(content)},
+            'done': True,
+            'eval_count': len(fields),
+        })
+
+
+def make_client(fake: FieldOllama) -> OllamaInstructorAsync:
+    return OllamaInstructorAsync(transport=httpx.MockTransport(fake.handler))
+
+
+async def test_groups_are_extracted_concurrently_and_assembled():
+    fake = FieldOllama(VALUES)
+
+    result = await make_client(fake).chat_parsed_split(format=Profile, model='llama3.2:latest', messages=MESSAGES, groups=2)
+
+    assert isinstance(result, SplitChatResponse)
+    assert result.parsed == Profile.model_validate(VALUES)
+    assert result.groups == (('friends',), ('title', 'notes', 'count'))
+    assert sorted(fake.requests) == sorted(result.groups)
+    assert result.eval_count == 4
+
+
+async def test_groups_are_balanced_for_aliased_fields():
+    fake = FieldOllama({'full_name': 'Ollama', 'biography': 'A model', 'age': 22})
+
+    result = await make_client(fake).chat_parsed_split(format=Contact, model='llama3.2:latest', messages=MESSAGES, groups=2)
+
+    assert result.groups == (('biography',), ('name', 'age'))
+    assert result.parsed == Contact(full_name='Ollama', biography='A model', age=22)
+
+
+async def test_strict_models_are_assembled_from_json():
+    fake = FieldOllama({'topic': 'Review', 'starts': '2025-01-01T10:00:00', 'seats': 4})
+
+    result = await make_client(fake).chat_parsed_split(format=Meeting, model='llama3.2:latest', messages=MESSAGES, groups=2)
+
+    assert result.parsed.starts == datetime(2025, 1, 1, 10)
+
+
+async def test_groups_validate_like_the_model():
+    fake = FieldOllama({'topic': 'Review', 'starts': '2025-01-01T10:00:00', 'seats': '4'})
+
+    with pytest.raises(ValidationError, match='seats'):
+        await make_client(fake).chat_parsed_split(
+            format=Meeting, model='llama3.2:latest', messages=MESSAGES, groups=[['topic', 'starts'], ['seats']], retries=2
+        )
+    assert fake.requests.count(('seats',)) == 2
+
+
+async def test_only_failing_group_is_retried():
+    fake = FieldOllama(VALUES, invalid_once={'title'})
+
+    result = await make_client(fake).chat_parsed_split(
+        format=Profile, model='llama3.2:latest', messages=MESSAGES, groups=[['title', 'count'], ['friends', 'notes']]
+    )
+
+    assert result.parsed.title == 'Team'
+    assert fake.requests.count(('title', 'count')) == 2
+    assert fake.requests.count(('friends', 'notes')) == 1
+
+
+async def test_error_feedback_asks_only_for_the_group():
+    fake = FieldOllama(VALUES, invalid_once={'title'})
+    client = OllamaInstructorAsync(transport=httpx.MockTransport(fake.handler), retry_strategy=ErrorFeedbackRetry())
+
+    await client.chat_parsed_split(
+        format=Profile, model='llama3.2:latest', messages=MESSAGES, groups=[['title', 'count'], ['friends', 'notes']]
+    )
+
+    [retry] = [messages for messages in fake.messages if len(messages) > 1]
+    assert 'complete' not in retry[-1]['content']
+    assert retry[-1]['content'].endswith('containing only the fields title, count.')
+
+
+async def test_validators_of_the_model_run_on_assembly():
+    fake = FieldOllama({**VALUES, 'count': 5})
+
+    with pytest.raises(ValidationError, match='count must match'):
+        await make_client(fake).chat_parsed_split(format=Profile, model='llama3.2:latest', messages=MESSAGES)
+
+
+@pytest.mark.parametrize('groups', [[['title']], [['title', 'friends', 'notes', 'count', 'count']], [['nope']]])
+async def test_invalid_groups_are_rejected(groups):
+    with pytest.raises(ValueError):
+        await make_client(FieldOllama(VALUES)).chat_parsed_split(
+            format=Profile, model='llama3.2:latest', messages=MESSAGES, groups=groups
+        )
@@ -0,0 +1,57 @@
+import pytest
+from pydantic import BaseModel
+from src.ollama_instructor import OllamaInstructor, OllamaInstructorAsync, StreamBuffer
+
+class FriendInfo(BaseModel):
+    name: str
+    age: int
+    is_available: bool
+
+class FriendList(BaseModel):
+    friends: list[FriendInfo]
+
+VALID = '{"friends": [{"name": "Ollama", "age": 22, "is_available": false}]}'
+MESSAGES = [{'role': 'user', 'content': 'friends'}]
+
+
+class TestStreamBuffer:
+    def test_join_is_lazy_and_cached(self):
+        buffer = StreamBuffer()
+        for part in ('{"a"', ': ', '1}'):
+            buffer.append(part)
+
+        assert len(buffer) == 8
+        assert buffer.text == '{"a": 1}'
+        assert repr(buffer) == 'StreamBuffer(length=8, parts=1)'
+        buffer.append('')
+        assert buffer.text == '{"a": 1}'
+
+    def test_clear(self):
+        buffer = StreamBuffer()
+        buffer.append('abc')
+        buffer.clear()
+        assert buffer.text == ''
+        assert len(buffer) == 0
+
+
+def test_chat_stream_fills_buffer_without_printing(fake_ollama, capsys):
+    client = OllamaInstructor(transport=fake_ollama([VALID], chunk_size=4).transport)
+    buffer = StreamBuffer()
+
+    chunks = list(client.chat_stream(format=FriendList, model='llama3.2:latest', messages=MESSAGES, buffer=buffer))
+
+    assert chunks[-1].done
+    assert buffer.text == VALID
+    assert capsys.readouterr().out == ''
+
+
+@pytest.mark.asyncio
+async def test_async_chat_stream_fills_buffer(fake_ollama):
+    client = OllamaInstructorAsync(transport=fake_ollama([VALID], chunk_size=4).transport)
+    buffer = StreamBuffer()
+
+    stream = await client.chat_stream(format=FriendList, model='llama3.2:latest', messages=MESSAGES, buffer=buffer)
+    async for _ in stream:
+        pass
+
+    assert buffer.text == VALID
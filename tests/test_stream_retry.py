@@ -0,0 +1,141 @@
+import pytest
+from pydantic import BaseModel, ValidationError
+from src.ollama_instructor import (
+    ErrorFeedbackRetry,
+    OllamaInstructor,
+    OllamaInstructorAsync,
+    RetryBudget,
+    RetryPolicy,
+    StreamBuffer,
+    StreamReset,
+)
+
+class FriendInfo(BaseModel):
+    name: str
+    age: int
+    is_available: bool
+
+VALID = '{"name": "Ollama", "age": 22, "is_available": false}'
+INVALID = '{"name": "Ollama", "age": "x", "is_available": false}'
+MESSAGES = [{'role': 'user', 'content': 'friend'}]
+
+
+def contents_after_reset(chunks) -> str:
+    resets = [i for i, chunk in enumerate(chunks) if isinstance(chunk, StreamReset)]
+    start = resets[-1] + 1 if resets else 0
+    return ''.join(chunk.message.content for chunk in chunks[start:])
+
+
+class TestImmediateRelease:
+    def test_reset_before_retry(self, fake_ollama):
+        fake = fake_ollama([INVALID, VALID])
+        client = OllamaInstructor(transport=fake.transport)
+
+        chunks = list(client.chat_stream(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES))
+
+        reset, = [chunk for chunk in chunks if isinstance(chunk, StreamReset)]
+        assert reset.attempt == 1
+        assert reset.error.errors()[0]['loc'] == ('age',)
+        assert reset.message.content == ''
+        assert contents_after_reset(chunks) == VALID
+        assert chunks[-1].done
+        assert len(fake.requests) == 2
+
+    def test_no_reset_before_final_failure(self, fake_ollama):
+        client = OllamaInstructor(transport=fake_ollama([INVALID, INVALID]).transport)
+        chunks = []
+
+        with pytest.raises(ValidationError):
+            for chunk in client.chat_stream(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES, retries=2):
+                chunks.append(chunk)
+
+        assert sum(isinstance(chunk, StreamReset) for chunk in chunks) == 1
+
+    def test_no_reset_when_policy_stops_retrying(self, fake_ollama):
+        fake = fake_ollama([INVALID, VALID])
+        policy = RetryPolicy(budget=RetryBudget(ratio=0, capacity=1))
+        policy.budget.withdraw()
+        client = OllamaInstructor(transport=fake.transport, retry_policy=policy)
+        chunks = []
+
+        with pytest.raises(ValidationError):
+            for chunk in client.chat_stream(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES):
+                chunks.append(chunk)
+
+        assert not any(isinstance(chunk, StreamReset) for chunk in chunks)
+        assert len(fake.requests) == 1
+        assert policy.budget.denied == 1
+
+    def test_retry_strategy_and_buffer(self, fake_ollama):
+        fake = fake_ollama([INVALID, VALID])
+        client = OllamaInstructor(retry_strategy=ErrorFeedbackRetry(), transport=fake.transport)
+        buffer = StreamBuffer()
+
+        list(client.chat_stream(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES, buffer=buffer))
+
+        assert buffer.text == VALID
+        assert fake.requests[1]['messages'][1] == {'role': 'assistant', 'content': INVALID}
+
+
+class TestValidatedRelease:
+    def test_only_successful_attempt_is_yielded(self, fake_ollama):
+        client = OllamaInstructor(transport=fake_ollama([INVALID, VALID]).transport)
+
+        chunks = list(client.chat_stream(
+            format=FriendInfo, model='llama3.2:latest', messages=MESSAGES, release='validated'
+        ))
+
+        assert not any(isinstance(chunk, StreamReset) for chunk in chunks)
+        assert ''.join(chunk.message.content for chunk in chunks) == VALID
+
+    def test_releases_early_above_limit(self, fake_ollama):
+        client = OllamaInstructor(transport=fake_ollama([INVALID, VALID]).transport)
+
+        chunks = list(client.chat_stream(
+            format=FriendInfo, model='llama3.2:latest', messages=MESSAGES, release='validated', max_held_chars=16
+        ))
+
+        assert sum(isinstance(chunk, StreamReset) for chunk in chunks) == 1
+        assert contents_after_reset(chunks) == VALID
+
+    def test_rejects_unknown_mode(self, fake_ollama):
+        client = OllamaInstructor(transport=fake_ollama([]).transport)
+        with pytest.raises(ValueError):
+            client.chat_stream(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES, release='never')
+
+
+async def test_async_reset_before_retry(fake_ollama):
+    fake = fake_ollama([INVALID, VALID])
+    client = OllamaInstructorAsync(transport=fake.transport)
+
+    stream = await client.chat_stream(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES)
+    chunks = [chunk async for chunk in stream]
+
+    assert sum(isinstance(chunk, StreamReset) for chunk in chunks) == 1
+    assert contents_after_reset(chunks) == VALID
+    assert len(fake.requests) == 2
+
+
+async def test_async_validated_release(fake_ollama):
+    client = OllamaInstructorAsync(transport=fake_ollama([INVALID, VALID]).transport)
+
+    stream = await client.chat_stream(
+        format=FriendInfo, model='llama3.2:latest', messages=MESSAGES, release='validated'
+    )
+
+    assert ''.join([chunk.message.content async for chunk in stream]) == VALID
+
+
+async def test_async_no_reset_when_policy_stops_retrying(fake_ollama):
+    fake = fake_ollama([INVALID, VALID])
+    policy = RetryPolicy(budget=RetryBudget(ratio=0, capacity=1))
+    policy.budget.withdraw()
+    client = OllamaInstructorAsync(transport=fake.transport, retry_policy=policy)
+    chunks = []
+
+    with pytest.raises(ValidationError):
+        async for chunk in await client.chat_stream(format=FriendInfo, model='llama3.2:latest', messages=MESSAGES):
+            chunks.append(chunk)
+
+    assert not any(isinstance(chunk, StreamReset) for chunk in chunks)
+    assert len(fake.requests) == 1
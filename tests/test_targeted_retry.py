@@ -0,0 +1,108 @@
+import json
+
+import pytest
+from pydantic import AliasChoices, BaseModel, Field, model_validator
+from src.ollama_instructor import ErrorFeedbackRetry, OllamaInstructor, OllamaInstructorAsync
+
+class Friend(BaseModel):
+    name: str
+    age: int
+
+class Profile(BaseModel):
+    title: str
+    friends: list[Friend]
+    count: int = Field(alias='total')
+
+    @model_validator(mode='after')
+    def count_matches(self):
+        if self.count != len(self.friends):
+            raise ValueError('total must match the number of friends')
+        return self
+
+class Contact(BaseModel):
+    name: str = Field(validation_alias='full_name', serialization_alias='fullName')
+    phone: str = Field(validation_alias=AliasChoices('phone', 'tel'))
+    age: int
+
+FRIENDS = [{'name': 'Ollama', 'age': 22}, {'name': 'Llama', 'age': 3}]
+MESSAGES = [{'role': 'user', 'content': 'profile'}]
+
+
+def test_retry_requests_only_failing_fields(fake_ollama):
+    fake = fake_ollama([
+        json.dumps({'title': 'Team', 'friends': FRIENDS, 'total': 'two'}),
+        json.dumps({'total': 2}),
+    ])
+    client = OllamaInstructor(transport=fake.transport, targeted_retry=True)
+
+    result = client.chat_parsed(format=Profile, model='llama3.2:latest', messages=MESSAGES)
+
+    assert result.parsed == Profile(title='Team', friends=FRIENDS, total=2)
+    assert list(fake.requests[0]['format']['properties']) == ['title', 'friends', 'total']
+    assert list(fake.requests[1]['format']['properties']) == ['total']
+    assert json.loads(result.content) == {'title': 'Team', 'friends': FRIENDS, 'total': 2}
+
+
+def test_error_feedback_asks_only_for_failing_fields(fake_ollama):
+    fake = fake_ollama([
+        json.dumps({'title': 'Team', 'friends': FRIENDS, 'total': 'two'}),
+        json.dumps({'total': 2}),
+    ])
+    client = OllamaInstructor(transport=fake.transport, targeted_retry=True, retry_strategy=ErrorFeedbackRetry())
+
+    client.chat_parsed(format=Profile, model='llama3.2:latest', messages=MESSAGES)
+
+    assert fake.requests[1]['messages'][-1]['content'].endswith('containing only the fields total.')
+
+
+def test_nested_errors_regenerate_their_top_level_field(fake_ollama):
+    fake = fake_ollama([
+        json.dumps({'title': 'Team', 'friends': [{'name': 'Ollama', 'age': 'old'}, FRIENDS[1]]}),
+        json.dumps({'friends': FRIENDS, 'total': 2}),
+    ])
+    client = OllamaInstructor(transport=fake.transport, targeted_retry=True)
+
+    result = client.chat_parsed(format=Profile, model='llama3.2:latest', messages=MESSAGES)
+
+    assert list(fake.requests[1]['format']['properties']) == ['friends', 'total']
+    assert result.parsed.friends[0].age == 22
+
+
+def test_errors_without_field_retry_whole_object(fake_ollama):
+    fake = fake_ollama([
+        json.dumps({'title': 'Team', 'friends': FRIENDS, 'total': 5}),
+        json.dumps({'title': 'Team', 'friends': FRIENDS, 'total': 2}),
+    ])
+    client = OllamaInstructor(transport=fake.transport, targeted_retry=True)
+
+    client.chat_parsed(format=Profile, model='llama3.2:latest', messages=MESSAGES)
+
+    assert list(fake.requests[1]['format']['properties']) == ['title', 'friends', 'total']
+
+
+def test_validation_and_serialization_aliases_map_to_their_fields(fake_ollama):
+    fake = fake_ollama([
+        json.dumps({'full_name': 42, 'phone': '123', 'age': 'old'}),
+        json.dumps({'full_name': 'Ollama', 'age': 22}),
+    ])
+    client = OllamaInstructor(transport=fake.transport, targeted_retry=True)
+
+    result = client.chat_parsed(format=Contact, model='llama3.2:latest', messages=MESSAGES)
+
+    assert result.parsed == Contact(full_name='Ollama', phone='123', age=22)
+    assert list(fake.requests[1]['format']['properties']) == ['full_name', 'age']
+
+
+@pytest.mark.asyncio
+async def test_async_targeted_retry_keeps_valid_fields_across_attempts(fake_ollama):
+    fake = fake_ollama([
+        json.dumps({'title': 'Team', 'friends': FRIENDS}),
+        'not json',
+        json.dumps({'total': 2}),
+    ])
+    client = OllamaInstructorAsync(transport=fake.transport, targeted_retry=True)
+
+    result = await client.chat_parsed(format=Profile, model='llama3.2:latest', messages=MESSAGES)
+
+    assert result.parsed.count == 2
+    assert [list(request['format']['properties']) for request in fake.requests[1:]] == [['total'], ['total']]
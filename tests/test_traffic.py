@@ -0,0 +1,166 @@
+import json
+import time
+
+import httpx
+import pytest
+from pydantic import BaseModel
+from src.ollama_instructor import (
+    OllamaInstructor,
+    OllamaInstructorAsync,
+    ReplayMismatchError,
+    TrafficRecord,
+    TrafficRecorder,
+    TrafficReplay,
+    read_traffic,
+)
+
+class Person(BaseModel):
+    name: str
+    age: int
+
+VALID = json.dumps({'name': 'Ollama', 'age': 22})
+INVALID = json.dumps({'name': 'Ollama', 'age': 'old'})
+MESSAGES = [{'role': 'user', 'content': 'person'}]
+
+
+def record_session(path, fake):
+    with TrafficRecorder(path) as recorder:
+        client = OllamaInstructor(transport=recorder.transport(fake.transport))
+        completion = client.chat_parsed(format=Person, model='llama3.2:latest', messages=MESSAGES)
+        chunks = list(client.chat_stream(format=Person, model='llama3.2:latest', messages=MESSAGES))
+    return completion, chunks
+
+
+def test_records_completions_and_streams(tmp_path, fake_ollama):
+    path = tmp_path / 'traffic.oit'
+    fake = fake_ollama([INVALID, VALID, VALID])
+    record_session(path, fake)
+
+    records = list(read_traffic(path))
+
+    assert path.read_bytes().startswith(b'OITRAFFIC1\n')
+    assert [record.status for record in records] == [200, 200, 200]
+    assert {record.model for record in records} == {'llama3.2:latest'}
+    assert records[0].request == fake.requests[0]
+    assert json.loads(records[1].content)['message']['content'] == VALID
+    assert records[2].request['stream'] is True
+    assert records[2].response_at <= records[2].duration
+
+
+def test_replay_reproduces_calls_and_retries(tmp_path, fake_ollama):
+    path = tmp_path / 'traffic.oit'
+    completion, chunks = record_session(path, fake_ollama([INVALID, VALID, VALID]))
+
+    replay = TrafficReplay(path, speed=None)
+    client = OllamaInstructor(transport=replay.transport)
+    replayed = client.chat_parsed(format=Person, model='llama3.2:latest', messages=MESSAGES)
+    replayed_chunks = list(client.chat_stream(format=Person, model='llama3.2:latest', messages=MESSAGES))
+
+    assert replayed.parsed == completion.parsed
+    assert replayed.attempts == 2
+    assert [chunk.message.content for chunk in replayed_chunks] == [chunk.message.content for chunk in chunks]
+    assert replay.remaining == 0
+    with pytest.raises(ReplayMismatchError):
+        client.chat_parsed(format=Person, model='llama3.2:latest', messages=MESSAGES)
+
+
+def test_replay_keeps_timings(fake_ollama):
+    fake = fake_ollama([VALID])
+    request = httpx.Request('POST', 'http://localhost/api/chat', json={'model': 'llama3.2:latest'})
+    body = fake.handler(request).read()
+    record = TrafficRecord(
+        started=0.0,
+        method='POST',
+        path='/api/chat',
+        request={'model': 'llama3.2:latest'},
+        status=200,
+        headers=(('content-type', 'application/json'),),
+        response_at=0.05,
+        chunks=((0.2, body),),
+    )
+
+    for speed, minimum, maximum in ((1.0, 0.2, 1.0), (2.0, 0.1, 0.2), (None, 0.0, 0.1)):
+        with httpx.Client(transport=TrafficReplay([record], speed=speed).transport) as client:
+            started = time.perf_counter()
+            response = client.post('http://other-host/api/chat', json={'model': 'llama3.2:latest'})
+            elapsed = time.perf_counter() - started
+        assert response.content == body
+        assert minimum <= elapsed < maximum
+
+
+def test_transport_errors_are_recorded_and_replayed(tmp_path):
+    path = tmp_path / 'traffic.oit'
+
+    def refuse(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError('connection refused', request=request)
+
+    with TrafficRecorder(path) as recorder:
+        client = OllamaInstructor(transport=recorder.transport(httpx.MockTransport(refuse)))
+        with pytest.raises(ConnectionError):
+            client.chat_parsed(format=Person, model='llama3.2:latest', messages=MESSAGES)
+
+    [record] = read_traffic(path)
+    assert (record.status, record.error) == (None, 'ConnectError')
+
+    client = OllamaInstructor(transport=TrafficReplay(path, speed=None).transport)
+    with pytest.raises(ConnectionError):
+        client.chat_parsed(format=Person, model='llama3.2:latest', messages=MESSAGES)
+
+
+def test_incomplete_record_is_dropped_on_append(tmp_path, fake_ollama):
+    path = tmp_path / 'traffic.oit'
+    record_session(path, fake_ollama([VALID, VALID]))
+    complete = path.read_bytes()
+    path.write_bytes(complete + complete[-40:-10])
+
+    assert len(list(read_traffic(path))) == 2
+
+    record_session(path, fake_ollama([VALID, VALID]))
+    assert len(list(read_traffic(path))) == 4
+
+
+def test_chunks_splitting_a_character_are_replayed(tmp_path):
+    path = tmp_path / 'traffic.oit'
+    body = json.dumps({'name': 'Zoé'}, ensure_ascii=False).encode()
+    split = body.index('é'.encode()) + 1
+
+    class Chunks(httpx.SyncByteStream):
+        def __iter__(self):
+            yield body[:split]
+            yield body[split:]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, stream=Chunks())
+
+    with TrafficRecorder(path) as recorder:
+        with httpx.Client(transport=recorder.transport(httpx.MockTransport(handler))) as client:
+            client.post('http://localhost/api/chat', json={'model': 'llama3.2:latest'})
+
+    [record] = read_traffic(path)
+    assert [part for _, part in record.chunks] == [body[:split], body[split:]]
+    with httpx.Client(transport=TrafficReplay(path, speed=None).transport) as client:
+        assert client.post('http://localhost/api/chat', json={'model': 'llama3.2:latest'}).json() == {'name': 'Zoé'}
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / 'traffic.oit'
+    path.write_text('{"not": "a recording"}')
+
+    with pytest.raises(ValueError):
+        list(read_traffic(path))
+    with pytest.raises(ValueError):
+        TrafficRecorder(path)
+
+
+@pytest.mark.asyncio
+async def test_async_record_and_replay(tmp_path, fake_ollama):
+    path = tmp_path / 'traffic.oit'
+    fake = fake_ollama([VALID])
+    with TrafficRecorder(path) as recorder:
+        client = OllamaInstructorAsync(transport=recorder.async_transport(fake.transport))
+        chunks = [chunk async for chunk in await client.chat_stream(format=Person, model='llama3.2:latest', messages=MESSAGES)]
+
+    client = OllamaInstructorAsync(transport=TrafficReplay(path).async_transport)
+    replayed = [chunk async for chunk in await client.chat_stream(format=Person, model='llama3.2:latest', messages=MESSAGES)]
+
+    assert [chunk.message.content for chunk in replayed] == [chunk.message.content for chunk in chunks]
@@ -0,0 +1,85 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from pydantic import BaseModel
+from src.ollama_instructor import FormatRegistry, ModelKeeper, OllamaInstructor, OllamaInstructorAsync
+
+class FriendInfo(BaseModel):
+    name: str
+    age: int
+    is_available: bool
+
+
+class FakeServer:
+    """Answers /api/ps with `running` and records the models loaded through /api/chat"""
+    def __init__(self, running: dict[str, timedelta] | None = None):
+        self.running = running or {}
+        self.loaded: list[tuple[str, object]] = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        now = datetime.now(timezone.utc)
+        if request.url.path == '/api/ps':
+            return httpx.Response(200, json={'models': [
+                {'name': name, 'model': name, 'expires_at': (now + left).isoformat()}
+                for name, left in self.running.items()
+            ]})
+        body = json.loads(request.content)
+        self.loaded.append((body['model'], body.get('keep_alive')))
+        return httpx.Response(200, json={
+            'model': body['model'],
+            'created_at': now.isoformat(),
+            'message': {'role': 'assistant', 'content': ''},
+            'done': True,
+            'done_reason': 'load',
+            'load_duration': 1_500_000_000,
+        })
+
+
+def test_warmup_loads_models_and_compiles_formats():
+    server = FakeServer()
+    registry = FormatRegistry()
+    client = OllamaInstructor(format_registry=registry, transport=httpx.MockTransport(server.handler))
+
+    durations = client.warmup(['llama3.2', 'qwen3:8b'], keep_alive='30m', formats=[FriendInfo])
+
+    assert durations == {'llama3.2': 1.5, 'qwen3:8b': 1.5}
+    assert server.loaded == [('llama3.2', '30m'), ('qwen3:8b', '30m')]
+    assert FriendInfo in registry
+
+
+async def test_async_warmup():
+    server = FakeServer()
+    client = OllamaInstructorAsync(transport=httpx.MockTransport(server.handler))
+
+    assert await client.warmup('llama3.2') == {'llama3.2': 1.5}
+
+
+def test_keeper_refreshes_only_idle_models():
+    server = FakeServer(running={
+        'llama3.2:latest': timedelta(seconds=30),  # expires before the next check
+        'qwen3:8b': timedelta(minutes=20),  # kept loaded by traffic
+    })
+    client = OllamaInstructor(transport=httpx.MockTransport(server.handler))
+    keeper = ModelKeeper(client, ['llama3.2', 'qwen3:8b', 'mistral'], keep_alive='1h', interval=60)
+
+    assert keeper.refresh() == ['llama3.2', 'mistral']
+    assert server.loaded == [('llama3.2', '1h'), ('mistral', '1h')]
+
+
+def test_keep_warm_runs_in_background():
+    server = FakeServer()
+    client = OllamaInstructor(transport=httpx.MockTransport(server.handler))
+
+    with client.keep_warm(['llama3.2'], interval=60):
+        pass
+
+    assert server.loaded == [('llama3.2', '30m')]
+
+
+async def test_async_keep_warm():
+    server = FakeServer()
+    client = OllamaInstructorAsync(transport=httpx.MockTransport(server.handler))
+
+    async with await client.keep_warm(['llama3.2'], interval=60) as keeper:
+        assert await keeper.refresh() == ['llama3.2']